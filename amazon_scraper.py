@@ -0,0 +1,3877 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Amazon Product Scraper - Core
+Scraping engine dùng chung cho GUI (amazon_scraper_gui.py) và CLI (amazon_scraper_cli.py)
+Không import tkinter - có thể chạy trên server
+
+Requires: requests, beautifulsoup4, lxml
+Optional: aiohttp (asyncio engine)
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+import soupsieve
+import re
+import time
+import random
+from urllib.parse import urlparse, urlencode, parse_qs, urljoin
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from collections import Counter, deque
+from collections.abc import Mapping
+import asyncio
+import heapq
+import bisect
+import json
+import functools
+import itertools
+from email.utils import parsedate_to_datetime
+import sqlite3
+import zlib
+import hashlib
+import math
+from array import array
+import os
+import sys
+
+# Optional: only needed by the asyncio engine (AsyncAmazonScraper)
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Optional: vectorized analytics (ProductAnalytics falls back to pure Python)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Supported Amazon marketplaces
+AMAZON_DOMAINS = ['amazon.com', 'amazon.co.uk', 'amazon.de', 'amazon.fr', 'amazon.it', 'amazon.es', 'amazon.jp']
+
+def get_marketplace(url):
+    """Return the Amazon marketplace domain of a URL (e.g. 'amazon.de')"""
+    netloc = urlparse(url).netloc.lower().split(':')[0]
+    matches = [domain for domain in AMAZON_DOMAINS if netloc == domain or netloc.endswith('.' + domain)]
+    # Fall back to the raw host so unknown hosts still get their own bucket
+    return max(matches, key=len) if matches else netloc
+
+# ===================================================================
+# HTML PARSING
+# ===================================================================
+
+# BeautifulSoup tree builders, fastest first
+PARSER_BACKENDS = ['lxml', 'html.parser', 'html5lib']
+
+def is_parser_available(parser):
+    """Check whether a BeautifulSoup tree builder is installed"""
+    return builder_registry.lookup(parser) is not None
+
+def get_default_parser():
+    """Return the fastest installed parser backend (lxml, else html.parser)"""
+    return 'lxml' if is_parser_available('lxml') else 'html.parser'
+
+def resolve_parser(parser=None):
+    """Validate a parser backend name, or pick the default one when None"""
+    if parser is None:
+        return get_default_parser()
+    if parser not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser '{parser}', expected one of: {', '.join(PARSER_BACKENDS)}")
+    if not is_parser_available(parser):
+        raise ValueError(f"Parser '{parser}' is not installed (pip install {parser})")
+    return parser
+
+def get_declared_encoding(content_type):
+    """Get the charset declared in a Content-Type header, or None"""
+    match = re.search(r'charset=[\'"]?([\w.:-]+)', content_type or '', re.IGNORECASE)
+    return match.group(1).lower() if match else None
+
+def make_soup(content, parser, encoding=None, parse_only=None):
+    """Build a BeautifulSoup tree; a known encoding skips charset detection"""
+    if encoding and isinstance(content, bytes):
+        return BeautifulSoup(content, parser, from_encoding=encoding, parse_only=parse_only)
+    return BeautifulSoup(content, parser, parse_only=parse_only)
+
+# Containers of a product page that extract_product_info reads. A "lean" parse
+# only builds these subtrees and skips scripts, styles, ads and carousels.
+LEAN_PARSE_IDS = frozenset([
+    'ppd', 'centerCol', 'leftCol', 'rightCol', 'buybox',
+    'title_feature_div', 'bylineInfo_feature_div', 'averageCustomerReviews_feature_div',
+    'corePrice_feature_div', 'apex_desktop', 'imageBlock', 'imgTagWrapperId',
+    'feature-bullets', 'availability', 'poExpander', 'productOverview_feature_div',
+    'deliveryBlockMessage', 'merchant-info', 'sellerProfileTriggerId',
+    'wayfinding-breadcrumbs_feature_div',
+    'productDescription_feature_div', 'productDescription', 'aplus_feature_div',
+    'prodDetails', 'productDetails_feature_div', 'productDetails_techSpec_section_1',
+    'productDetails_detailBullets_sections1', 'SalesRank',
+    'variation_color_name', 'variation_size_name', 'ASIN',
+])
+
+def _lean_parse_filter(name, attrs):
+    """SoupStrainer filter keeping the extractor's containers (and the canonical link)"""
+    if attrs.get('id') in LEAN_PARSE_IDS:
+        return True
+    return name == 'link' and 'canonical' in (attrs.get('rel') or '')
+
+LEAN_PARSE_STRAINER = SoupStrainer(_lean_parse_filter)
+
+def _split_top_level(text, separators):
+    """Split a CSS selector on separators that are outside quotes, brackets and parentheses"""
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif depth == 0 and ch in separators:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+def _compound_keys(compound):
+    """Index keys (id, classes, tag, attribute names) required by a compound selector"""
+    attributes = re.findall(r'\[\s*([\w-]+)', compound)
+    # Drop attribute values, pseudo-class arguments and strings before reading #id / .class
+    bare = re.sub(r'\[[^\]]*\]|\([^)]*\)|"[^"]*"|\'[^\']*\'', '', compound)
+    tag_match = re.match(r'([a-zA-Z][\w-]*)', bare)
+    return {
+        'id': re.findall(r'#([\w-]+)', bare),
+        'class': re.findall(r'\.([\w-]+)', bare),
+        'tag': [tag_match.group(1).lower()] if tag_match else [],
+        'attr': [name.lower() for name in attributes],
+    }
+
+# Compiled selectors and their index keys, shared by every index
+_compiled_selectors = {}
+_selector_keys = {}
+
+def compile_selector(selector):
+    """Compile (and cache) a CSS selector with soupsieve"""
+    pattern = _compiled_selectors.get(selector)
+    if pattern is None:
+        pattern = soupsieve.compile(selector)
+        _compiled_selectors[selector] = pattern
+    return pattern
+
+def get_selector_keys(selector):
+    """Index keys of the last compound of each selector in a group (cached)"""
+    keys = _selector_keys.get(selector)
+    if keys is None:
+        keys = [_compound_keys(_split_top_level(part, ' \t\n>+~')[-1])
+                for part in _split_top_level(selector, ',')]
+        _selector_keys[selector] = keys
+    return keys
+
+
+class DomIndex:
+    """One-pass index of a parsed page by id, class, tag name and attribute name
+    
+    select() / select_one() return the same elements as soup.select() /
+    soup.select_one(), but only test the indexed candidates for the last
+    compound of each selector (matching walks ancestors, not the whole tree).
+    """
+    
+    def __init__(self, soup):
+        self.by_id = {}
+        self.by_class = {}
+        self.by_tag = {}
+        self.by_attr = {}
+        self.all = []
+        self._candidate_cache = {}
+        
+        # Entries are (document position, tag) so results keep document order
+        for entry in enumerate(soup.find_all(True)):
+            tag = entry[1]
+            self.all.append(entry)
+            self.by_tag.setdefault(tag.name, []).append(entry)
+            for name, value in tag.attrs.items():
+                self.by_attr.setdefault(name, []).append(entry)
+                if name == 'class':
+                    for class_name in value:
+                        self.by_class.setdefault(class_name, []).append(entry)
+                elif name == 'id':
+                    self.by_id.setdefault(value, []).append(entry)
+
+    def _lookup(self, keys):
+        """Smallest candidate list satisfying one key of a compound selector"""
+        lists = [self.by_id.get(key, []) for key in keys['id']]
+        lists += [self.by_class.get(key, []) for key in keys['class']]
+        lists += [self.by_tag.get(key, []) for key in keys['tag']]
+        lists += [self.by_attr.get(key, []) for key in keys['attr']]
+        return min(lists, key=len) if lists else self.all
+
+    def candidates(self, selector):
+        """Elements that may match the selector, in document order"""
+        cached = self._candidate_cache.get(selector)
+        if cached is not None:
+            return cached
+        
+        lists = [self._lookup(keys) for keys in get_selector_keys(selector)]
+        
+        if len(lists) == 1:
+            result = lists[0]
+        else:
+            # Merge the lists of a selector group, dropping duplicates
+            result = []
+            last_pos = -1
+            for entry in heapq.merge(*lists, key=lambda item: item[0]):
+                if entry[0] != last_pos:
+                    result.append(entry)
+                    last_pos = entry[0]
+        
+        self._candidate_cache[selector] = result
+        return result
+
+    def select(self, selector):
+        """Same as soup.select(selector)"""
+        pattern = compile_selector(selector)
+        return [tag for _, tag in self.candidates(selector) if pattern.match(tag)]
+
+    def select_one(self, selector):
+        """Same as soup.select_one(selector)"""
+        pattern = compile_selector(selector)
+        for _, tag in self.candidates(selector):
+            if pattern.match(tag):
+                return tag
+        return None
+
+# ===================================================================
+# PRODUCT EXTRACTION SCHEMA
+# ===================================================================
+
+PRICE_CLEAN_RE = re.compile(r'[^\d.,]')
+RATING_RE = re.compile(r'(\d+\.?\d*)')
+REVIEW_COUNT_RE = re.compile(r'([\d,]+)')
+
+# Specification keys (first present wins) behind the shortcut fields
+COLOR_KEYS = ['Color', 'Colour', 'Color Name', 'Item Color']
+MATERIAL_KEYS = ['Material', 'Materials', 'Item Material', 'Frame Material', 'Fabric Type']
+SIZE_KEYS = ['Size', 'Dimensions', 'Item Dimensions', 'Package Dimensions', 'Product Dimensions']
+WEIGHT_KEYS = ['Weight', 'Item Weight', 'Package Weight', 'Shipping Weight']
+MODEL_KEYS = ['Model Number', 'Model', 'Item model number', 'Part Number']
+
+
+class Field:
+    """One product field: candidate selectors and how matches become a value
+    
+    mode is how the selectors are used:
+      first    value of the first selector whose first match gives one
+      list     values of all matches of the first selector giving any (max `limit`)
+      all      values of all matches of every selector, duplicates dropped
+      exists   True when any selector matches, else False
+      spec     value of the first of `keys` in the specifications dict
+      asin     AmazonScraper.resolve_asin()
+      custom   value(index)
+      derived  value(product_info), once the `requires` fields are extracted
+    value() returns None to reject a match (or leave the field out). group is
+    the extraction timing group the field is counted in.
+    """
+    
+    def __init__(self, name, selectors=(), mode='first', value=None, limit=None, keys=(), requires=(),
+                 group=None):
+        self.name = name
+        self.selectors = list(selectors)
+        self.mode = mode
+        self.value = value or _get_text
+        self.limit = limit
+        self.keys = keys
+        self.requires = tuple(requires) + (('specifications',) if mode == 'spec' else ())
+        self.group = group or name
+
+
+def _get_text(element):
+    return element.get_text().strip()
+
+def _non_empty_text(element):
+    return element.get_text().strip() or None
+
+def _brand_value(element):
+    text = element.get_text().strip()
+    if not text or text.lower().startswith('visit'):
+        return None
+    return text.replace('Brand: ', '').replace('Visit the ', '').replace(' Store', '')
+
+def _price_value(element):
+    return PRICE_CLEAN_RE.sub('', element.get_text().strip())
+
+def _rating_value(element):
+    match = RATING_RE.search(element.get('alt', '') or element.get_text())
+    return match.group(1) if match else None
+
+def _review_count_value(element):
+    match = REVIEW_COUNT_RE.search(element.get_text().strip())
+    return match.group(1) if match else None
+
+def _image_value(element):
+    src = element.get('src') or element.get('data-src')
+    return src if src and src.startswith('http') else None
+
+def _feature_value(element):
+    text = element.get_text().strip()
+    return text if len(text) > 10 else None  # Filter out short/empty text
+
+def _description_value(element):
+    text = element.get_text().strip()
+    return text if len(text) > 20 else None
+
+def _rank_value(element):
+    text = element.get_text().strip()
+    return text if 'Best Sellers Rank' in text or '#' in text else None
+
+def _shipping_value(element):
+    text = element.get_text().strip()
+    return text if 'delivery' in text.lower() or 'shipping' in text.lower() else None
+
+def _extract_specifications(index):
+    """Technical details, spec-like feature bullets, product overview and additional information"""
+    specifications = {}
+    
+    # Method 1: Technical Details table
+    tech_table = index.select_one('#productDetails_techSpec_section_1')
+    if tech_table:
+        for row in tech_table.select('tr'):
+            cols = row.select('td')
+            if len(cols) >= 2:
+                key = cols[0].get_text().strip()
+                value = cols[1].get_text().strip()
+                if key and value:
+                    specifications[key] = value
+    
+    # Method 2: Feature bullets for specifications
+    for bullet in index.select('#feature-bullets ul li, .a-unordered-list.a-nostyle li'):
+        text = bullet.get_text().strip()
+        if ':' in text and len(text) < 200:  # Likely a specification
+            key, value = (part.strip() for part in text.split(':', 1))
+            if key and value and not key.lower().startswith('make sure'):
+                specifications[key] = value
+    
+    # Method 3: Product Overview section
+    overview_section = index.select_one('#poExpander')
+    if overview_section:
+        overview_values = overview_section.select('.po-break-word')
+        for row, value_element in zip(overview_section.select('.po-display-name'), overview_values):
+            key = row.get_text().strip()
+            value = value_element.get_text().strip()
+            if key and value:
+                specifications[key] = value
+    
+    # Method 4: Additional Information table
+    for row in index.select('#productDetails_detailBullets_sections1 tr'):
+        th = row.select_one('th')
+        td = row.select_one('td')
+        if th and td:
+            key = th.get_text().strip()
+            value = td.get_text().strip()
+            if key and value:
+                specifications[key] = value
+    
+    return specifications
+
+def _extract_variations(index):
+    """Color and size options"""
+    variations = {}
+    
+    color_options = []
+    for swatch in index.select('.imgSwatch, .a-button-text .a-size-base'):
+        color_name = swatch.get('title') or swatch.get_text().strip()
+        if color_name and color_name not in color_options:
+            color_options.append(color_name)
+    if color_options:
+        variations['colors'] = color_options
+    
+    size_options = []
+    for size in index.select('#native_dropdown_selected_size_name option, .a-size-base.a-color-base'):
+        size_name = size.get_text().strip()
+        if size_name and size_name not in ['Select', 'Choose', ''] and size_name not in size_options:
+            size_options.append(size_name)
+    if size_options:
+        variations['sizes'] = size_options
+    
+    return variations or None
+
+
+# Every product field, in output order
+PRODUCT_FIELDS = [
+    Field('title', ['#productTitle', '.product-title', 'h1.a-size-large', 'h1#title']),
+    Field('asin', mode='asin'),
+    Field('brand', ['#bylineInfo', '.a-row .a-link-normal[href*="/stores/"]', 'tr:-soup-contains("Brand") td.a-span9',
+                    '.po-brand .po-break-word', '#brand'], value=_brand_value),
+    Field('price', ['.a-price-whole', '.a-price .a-offscreen', '#price_inside_buybox', '.a-price-range',
+                    '#ap_desktop_sns_detail_page .a-price .a-offscreen'], value=_price_value),
+    Field('rating', ['.a-icon-alt', '[data-hook="average-star-rating"] .a-icon-alt', '.a-star-medium .a-icon-alt'],
+          value=_rating_value),
+    Field('review_count', ['#acrCustomerReviewText', '[data-hook="total-review-count"]', '.a-link-normal .a-size-base'],
+          value=_review_count_value, group='reviews'),
+    Field('images', ['#landingImage', '.a-dynamic-image', '#imgTagWrapperId img'], mode='all', value=_image_value),
+    Field('features', ['#feature-bullets ul li', '.a-unordered-list .a-list-item', '#productDescription p'],
+          mode='list', value=_feature_value, limit=5),
+    Field('availability', ['#availability span', '.a-size-medium.a-color-success', '.a-size-medium.a-color-price']),
+    Field('specifications', mode='custom', value=_extract_specifications),
+    Field('color', mode='spec', keys=COLOR_KEYS, group='specifications'),
+    Field('material', mode='spec', keys=MATERIAL_KEYS, group='specifications'),
+    Field('dimensions', mode='spec', keys=SIZE_KEYS, group='specifications'),
+    Field('weight', mode='spec', keys=WEIGHT_KEYS, group='specifications'),
+    Field('model_number', mode='spec', keys=MODEL_KEYS, group='specifications'),
+    Field('categories', ['#wayfinding-breadcrumbs_feature_div a', '.a-breadcrumb a', '[data-hook="breadcrumb"] a'],
+          mode='all', value=_non_empty_text),
+    Field('primary_category', mode='derived', value=lambda info: info['categories'][-1], requires=['categories'],
+          group='categories'),
+    Field('bestsellers_rank', ['#SalesRank, .a-icon-badge'], value=_rank_value),
+    Field('prime_eligible', ['.a-icon-prime, [data-csa-c-content-id="prime-sash"]'], mode='exists', group='prime'),
+    Field('detailed_description', ['#productDescription p', '#aplus_feature_div',
+                                   '.a-section.a-spacing-medium.apm-A1sMoFEeI'],
+          mode='all', value=_description_value, group='description'),
+    Field('variations', mode='custom', value=_extract_variations),
+    Field('shipping_info', ['#deliveryBlockMessage, .a-spacing-top-base .a-color-price'], value=_shipping_value,
+          group='shipping'),
+    Field('seller', ['#sellerProfileTriggerId, .a-size-small.mbcMerchantName'], value=_non_empty_text),
+]
+
+PRODUCT_FIELD_NAMES = [field.name for field in PRODUCT_FIELDS]
+
+
+class ExtractionSchema:
+    """A list of Fields compiled once: selectors precompiled, one plan per field subset
+    
+    plan(names) returns the fields to extract for the requested names (plus
+    the fields they are derived from), in schema order, each paired with the
+    timing group it closes (None while the next field is in the same group).
+    """
+    
+    def __init__(self, fields=None):
+        self.fields = fields or PRODUCT_FIELDS
+        self.by_name = {field.name: field for field in self.fields}
+        for field in self.fields:
+            for selector in field.selectors:
+                compile_selector(selector)
+                get_selector_keys(selector)
+        self._plans = {}
+
+    def plan(self, names=None):
+        """(steps, output names) for the requested field names (None = every field)"""
+        key = None if names is None else frozenset(names)
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+        
+        if key is None:
+            needed = set(self.by_name)
+        else:
+            unknown = sorted(key - set(self.by_name))
+            if unknown:
+                raise ValueError(f"Unknown product field(s): {', '.join(unknown)}")
+            needed = set()
+            pending = list(key)
+            while pending:
+                name = pending.pop()
+                if name not in needed:
+                    needed.add(name)
+                    pending.extend(self.by_name[name].requires)
+        
+        fields = [field for field in self.fields if field.name in needed]
+        steps = []
+        for i, field in enumerate(fields):
+            next_group = fields[i + 1].group if i + 1 < len(fields) else None
+            steps.append((field, field.group if field.group != next_group else None))
+        # Dependencies that were not asked for are dropped from the result
+        output = None if key is None or key == needed else key
+        
+        plan = (tuple(steps), output)
+        self._plans[key] = plan
+        return plan
+
+# ===================================================================
+# COMPACT PRODUCT RECORDS
+# ===================================================================
+
+# Digits after the decimal separator of each marketplace's currency (default 2)
+CURRENCY_EXPONENTS = {'amazon.co.jp': 0, 'amazon.jp': 0}
+MARKETPLACE_CURRENCIES = {
+    'amazon.com': 'USD', 'amazon.co.uk': 'GBP', 'amazon.de': 'EUR', 'amazon.fr': 'EUR',
+    'amazon.it': 'EUR', 'amazon.es': 'EUR', 'amazon.co.jp': 'JPY', 'amazon.jp': 'JPY',
+}
+
+# A cleaned price: whole part (optionally grouped by thousands) and an optional decimal part
+PRICE_NUMBER_RE = re.compile(r'(\d{1,3}(?:([.,])\d{3})*|\d+)(?:([.,])(\d*))?')
+
+# A review count as the extractor cleans it ('12,345')
+REVIEW_COUNT_NUMBER_RE = re.compile(r'\d{1,3}(?:,\d{3})*')
+
+# Price formats (thousands separator, decimal separator, decimals, exponent), shared by every record
+_price_styles = {}
+
+# Record fields holding short values that repeat across products
+_INTERNED_FIELDS = frozenset([
+    'brand', 'availability', 'color', 'material', 'dimensions', 'weight', 'primary_category',
+    'bestsellers_rank', 'shipping_info', 'seller', 'scraped_at',
+])
+_LIST_FIELDS = frozenset(['images', 'features', 'categories', 'detailed_description'])
+
+# Key orders seen so far, shared by every record with the same keys
+_record_key_orders = {}
+
+
+def get_marketplace_setting(settings, marketplace):
+    """Value of a per-marketplace setting (also matches hosts like www.amazon.co.jp)"""
+    for domain, value in settings.items():
+        if marketplace == domain or marketplace.endswith('.' + domain):
+            return value
+    return None
+
+
+def parse_price(text, exponent=2):
+    """(minor units, format) of a cleaned price such as '1,299.99' or '1.299,99'
+    
+    format_price(minor, format) gives back exactly the same text; None when
+    the text is not a single price that can be written back that way.
+    """
+    match = PRICE_NUMBER_RE.fullmatch(text)
+    if not match:
+        return None
+    whole, thousands, decimal, fraction = match.groups()
+    if thousands and thousands == decimal:
+        return None
+    fraction = fraction or ''
+    if len(fraction) > exponent:
+        return None
+    minor = int(whole.replace(thousands or ',', '')) * 10 ** exponent + int(fraction.ljust(exponent, '0') or 0)
+    key = (thousands or '', decimal or '', len(fraction), exponent)
+    style = _price_styles.setdefault(key, key)
+    if format_price(minor, style) != text:
+        return None
+    return minor, style
+
+
+def parse_rating(text):
+    """Rating text as an int or float that str() turns back into the same text, else None"""
+    for number_type in (int, float):
+        try:
+            number = number_type(text)
+        except (TypeError, ValueError):
+            continue
+        if str(number) == text:
+            return number
+    return None
+
+
+def parse_review_count(text):
+    """Review count text ('12,345') as an int, None unless f'{n:,}' gives back the same text"""
+    if not isinstance(text, str) or not REVIEW_COUNT_NUMBER_RE.fullmatch(text):
+        return None
+    number = int(text.replace(',', ''))
+    return number if f'{number:,}' == text else None
+
+
+def format_price(minor, style):
+    """Price text of minor units in a format returned by parse_price()"""
+    thousands, decimal, decimals, exponent = style
+    whole, fraction = divmod(minor, 10 ** exponent)
+    text = f'{whole:,}'.replace(',', thousands)
+    if decimal:
+        text += decimal + str(fraction).zfill(exponent)[:decimals]
+    return text
+
+
+class ProductRecord(Mapping):
+    """Compact, read-only form of a product dict for large result sets
+    
+    Values live in __slots__: price as integer minor units (plus a shared
+    format), rating as a number, review count as an int, lists as tuples,
+    specifications as a flat key/value tuple and repeated short strings
+    interned. Reading it as a mapping (record['price'], to_dict(), to_json())
+    gives back exactly the original dict, key order included; record.price,
+    record.rating and record.review_count are the typed values. Keys outside
+    the product schema (error, source, ...) are kept as they are.
+    """
+    
+    __slots__ = tuple(name for name in PRODUCT_FIELD_NAMES if name not in ('price', 'rating', 'review_count')) + (
+        'url', 'scraped_at', 'page_number', 'position_on_page',
+        '_price', '_price_style', '_rating', '_review_count', '_keys', '_extra')
+
+    def __init__(self, product):
+        keys = tuple(product)
+        self._keys = _record_key_orders.setdefault(keys, keys)
+        self._price_style = None
+        self._extra = None
+        for name, value in product.items():
+            self._store(name, value, product)
+
+    @classmethod
+    def from_dict(cls, product):
+        return product if isinstance(product, cls) else cls(product)
+
+    def _store(self, name, value, product):
+        if name == 'price':
+            if isinstance(value, str):
+                exponent = get_marketplace_setting(CURRENCY_EXPONENTS, get_marketplace(product.get('url') or ''))
+                parsed = parse_price(value, 2 if exponent is None else exponent)
+                if parsed:
+                    value, self._price_style = parsed
+            self._price = value
+        elif name == 'rating':
+            # int or float when str() gives the text back ('4', '4.5'), else the text
+            if isinstance(value, str):
+                number = parse_rating(value)
+                value = value if number is None else number
+            self._rating = value
+        elif name == 'review_count':
+            number = parse_review_count(value)
+            self._review_count = value if number is None else number
+        elif name in _LIST_FIELDS and type(value) is list:
+            setattr(self, name, tuple(sys.intern(item) if name == 'categories' else item for item in value))
+        elif name == 'specifications' and type(value) is dict:
+            self.specifications = tuple(item for key, val in value.items() for item in (sys.intern(key), val))
+        elif name == 'variations' and type(value) is dict and all(type(val) is list for val in value.values()):
+            self.variations = tuple(item for key, val in value.items() for item in (key, tuple(val)))
+        elif name in _RECORD_VALUE_SLOTS:
+            if name in _INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, name, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[name] = value
+
+    # Typed values
+
+    @property
+    def price(self):
+        """Price in integer minor units (cents; yen on amazon.co.jp), None if unknown"""
+        return self._price if self._price_style is not None else None
+
+    @property
+    def price_exponent(self):
+        """Decimal places of the price's currency (price / 10 ** price_exponent = amount)"""
+        return self._price_style[3] if self._price_style is not None else None
+
+    @property
+    def currency(self):
+        return get_marketplace_setting(MARKETPLACE_CURRENCIES, get_marketplace(getattr(self, 'url', None) or ''))
+
+    @property
+    def rating(self):
+        value = getattr(self, '_rating', None)
+        return float(value) if isinstance(value, (int, float)) else None
+
+    @property
+    def review_count(self):
+        value = getattr(self, '_review_count', None)
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+    # Dict view
+
+    def _load(self, name):
+        if self._extra is not None and name in self._extra:
+            return self._extra[name]
+        if name == 'price':
+            return format_price(self._price, self._price_style) if self._price_style is not None else self._price
+        if name == 'rating':
+            value = self._rating
+            return str(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+        if name == 'review_count':
+            value = self._review_count
+            return f'{value:,}' if isinstance(value, int) and not isinstance(value, bool) else value
+        value = getattr(self, name)
+        if name in _LIST_FIELDS and type(value) is tuple:
+            return list(value)
+        if name == 'specifications' and type(value) is tuple:
+            return dict(zip(value[::2], value[1::2]))
+        if name == 'variations' and type(value) is tuple:
+            return {key: list(values) for key, values in zip(value[::2], value[1::2])}
+        return value
+
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        return self._load(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __repr__(self):
+        return f"ProductRecord({self.to_dict()!r})"
+
+    def to_dict(self):
+        """The original product dict"""
+        return {name: self._load(name) for name in self._keys}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))
+
+# Slots holding a product key's value as is
+_RECORD_VALUE_SLOTS = frozenset(name for name in ProductRecord.__slots__ if not name.startswith('_'))
+
+# ===================================================================
+# METRICS
+# ===================================================================
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 524288, 1048576, 2097152, 4194304, 8388608)
+
+# name: (type, help, buckets)
+METRIC_DEFINITIONS = {
+    'amazon_scraper_request_seconds': (
+        'histogram', 'HTTP request latency by stage (connect = DNS + TCP + TLS of new connections)', SECONDS_BUCKETS),
+    'amazon_scraper_response_bytes': ('histogram', 'Response body size', BYTES_BUCKETS),
+    'amazon_scraper_requests_total': ('counter', 'HTTP requests sent, by marketplace and status', None),
+    'amazon_scraper_bytes_received_total': ('counter', 'Response body bytes received', None),
+    'amazon_scraper_sleep_seconds': ('histogram', 'Time spent sleeping (rate limiter, retry backoff)', SECONDS_BUCKETS),
+    'amazon_scraper_parse_seconds': ('histogram', 'HTML parse (soup construction) time', SECONDS_BUCKETS),
+    'amazon_scraper_extract_seconds': ('histogram', 'Product field extraction time, by field group', SECONDS_BUCKETS),
+    'amazon_scraper_incremental_total': (
+        'counter', 'Incremental re-scrapes by result (not_modified, same_content, unchanged, changed, new)', None),
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus semantics: bucket counts are cumulative on export)"""
+    
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot: +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def cumulative_counts(self):
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+
+class ScrapeMetrics:
+    """Thread-safe timing / size metrics of a crawl, exportable as JSON or Prometheus text
+    
+    Shared by every scraper passed the same instance. Series are keyed by
+    metric name and labels, see METRIC_DEFINITIONS.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+            self.started_at = time.time()
+
+    def _get_series(self, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        series = self._series.get(key)
+        if series is None:
+            kind, _, buckets = METRIC_DEFINITIONS[name]
+            series = Histogram(buckets) if kind == 'histogram' else [0.0]
+            self._series[key] = series
+        return series
+
+    def observe(self, name, value, **labels):
+        """Record one value in a histogram"""
+        with self._lock:
+            self._get_series(name, labels).observe(value)
+
+    def inc(self, name, value=1, **labels):
+        """Increase a counter"""
+        with self._lock:
+            self._get_series(name, labels)[0] += value
+
+    def stopwatch(self, name, **labels):
+        """Return lap(label_value): records the time since the previous lap (or creation)
+        
+        Used to time consecutive stages, e.g. field groups: lap('title'), lap('price').
+        The label name is 'group'.
+        """
+        last = [time.perf_counter()]
+        
+        def lap(group):
+            now = time.perf_counter()
+            self.observe(name, now - last[0], group=group, **labels)
+            last[0] = now
+        return lap
+
+    def snapshot(self):
+        """JSON-serializable dict of every series, with count/sum/mean/p50/p90/p99 for histograms"""
+        metrics = {}
+        with self._lock:
+            for (name, labels), series in sorted(self._series.items()):
+                kind, help_text, _ = METRIC_DEFINITIONS[name]
+                entry = metrics.setdefault(name, {'type': kind, 'help': help_text, 'series': []})
+                row = {'labels': dict(labels)}
+                if kind == 'histogram':
+                    row.update({
+                        'count': series.count,
+                        'sum': round(series.sum, 6),
+                        'mean': round(series.sum / series.count, 6) if series.count else 0.0,
+                        'p50': round(series.quantile(0.5), 6),
+                        'p90': round(series.quantile(0.9), 6),
+                        'p99': round(series.quantile(0.99), 6),
+                        'buckets': dict(zip([str(b) for b in series.buckets] + ['+Inf'],
+                                            series.cumulative_counts())),
+                    })
+                else:
+                    row['value'] = series[0]
+                entry['series'].append(row)
+        return {'started_at': self.started_at, 'exported_at': time.time(), 'metrics': metrics}
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        def format_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+            return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+        
+        lines = []
+        with self._lock:
+            described = set()
+            for (name, labels), series in sorted(self._series.items()):
+                kind, help_text, _ = METRIC_DEFINITIONS[name]
+                if name not in described:
+                    described.add(name)
+                    lines.append(f'# HELP {name} {help_text}')
+                    lines.append(f'# TYPE {name} {kind}')
+                if kind == 'histogram':
+                    bounds = [repr(float(b)) for b in series.buckets] + ['+Inf']
+                    for bound, count in zip(bounds, series.cumulative_counts()):
+                        lines.append(f'{name}_bucket{format_labels(labels, [("le", bound)])} {count}')
+                    lines.append(f'{name}_sum{format_labels(labels)} {series.sum!r}')
+                    lines.append(f'{name}_count{format_labels(labels)} {series.count}')
+                else:
+                    lines.append(f'{name}{format_labels(labels)} {series[0]!r}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        """Write the metrics to a file: Prometheus text for .prom / .txt, JSON otherwise"""
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith(('.prom', '.txt')):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+
+# ===================================================================
+# RATE LIMITING
+# ===================================================================
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens/sec, holding at most `burst`"""
+    
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate, burst=None):
+        """Change the refill rate (and optionally the burst size)"""
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            if burst is not None:
+                self.burst = max(1, int(burst))
+                self._tokens = min(self._tokens, self.burst)
+
+    def reserve(self):
+        """Take one token without blocking. Returns seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Reserve the token right away; a negative balance is the queue of
+            # callers ahead of us, so concurrent threads are served in order
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self):
+        """Take one token, sleeping until it is available. Returns seconds waited"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class DomainRateLimiter:
+    """Token buckets shared by all scrapers and threads, one per marketplace"""
+    
+    def __init__(self, rate=0.5, burst=1, domain_limits=None):
+        # Default: on average one request every 2 seconds per marketplace
+        self.rate = rate
+        self.burst = burst
+        # Per-marketplace overrides, e.g. {'amazon.de': (1.0, 2)}
+        self.domain_limits = dict(domain_limits or {})
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def get_bucket(self, url):
+        """Get (or create) the bucket for the marketplace of a URL"""
+        domain = get_marketplace(url)
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                rate, burst = self.domain_limits.get(domain, (self.rate, self.burst))
+                bucket = TokenBucket(rate, burst)
+                self._buckets[domain] = bucket
+            return bucket
+
+    def wait(self, url):
+        """Block until a request to the URL's marketplace is allowed. Returns seconds waited"""
+        return self.get_bucket(url).acquire()
+
+    def reserve(self, url):
+        """Reserve a request slot without blocking (for asyncio callers). Returns seconds to wait"""
+        return self.get_bucket(url).reserve()
+
+    def record_response(self, url, throttled):
+        """Feedback hook called after every request (fixed rate: nothing to do)"""
+        pass
+
+    def get_rate(self, url):
+        """Current requests/sec allowed for the URL's marketplace"""
+        return self.get_bucket(url).rate
+
+
+# HTTP statuses and page markers Amazon uses when it throttles a client.
+# Only markers specific to the robot-check page: contact addresses and the like
+# also appear in footers / JSON of normal pages
+THROTTLE_STATUS_CODES = (429, 503)
+CAPTCHA_MARKERS = [
+    b'/errors/validateCaptcha',
+    b'Type the characters you see in this image',
+    b'<title dir="ltr">Robot Check</title>',
+]
+
+def is_throttled_page(status_code, content):
+    """Check whether a status/body pair is a 503/429 or a robot-check (captcha) page"""
+    if status_code in THROTTLE_STATUS_CODES:
+        return True
+    content = content or b''
+    return any(marker in content for marker in CAPTCHA_MARKERS)
+
+def is_throttled_response(response):
+    """Check whether a requests response is a 503/429 or a robot-check (captcha) page"""
+    return is_throttled_page(response.status_code, response.content)
+
+
+class AdaptiveRateLimiter(DomainRateLimiter):
+    """Per-marketplace limiter whose rate follows AIMD feedback
+    
+    Every healthy response adds `increase_step` req/s (up to `max_rate`); a
+    throttled one multiplies the rate by `decrease_factor` (down to `min_rate`).
+    Cuts are applied at most once per `decrease_cooldown` seconds per marketplace,
+    so a burst of in-flight requests failing together only counts once. Starting
+    rates (default and per-marketplace) are clamped to [min_rate, max_rate].
+    """
+    
+    def __init__(self, rate=0.5, burst=1, min_rate=0.05, max_rate=5.0,
+                 increase_step=0.02, decrease_factor=0.5, decrease_cooldown=5.0,
+                 domain_limits=None, max_events=200):
+        clamp = lambda value: min(max_rate, max(min_rate, value))
+        domain_limits = {domain: (clamp(limit_rate), limit_burst)
+                         for domain, (limit_rate, limit_burst) in (domain_limits or {}).items()}
+        super().__init__(rate=clamp(rate), burst=burst, domain_limits=domain_limits)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self._last_decrease = {}
+        self._feedback_lock = threading.Lock()
+        
+        # Recent back-off events, newest last, and the total number of back-offs
+        self.backoff_events = deque(maxlen=max_events)
+        self.backoff_count = 0
+
+    def record_response(self, url, throttled):
+        """Raise the rate additively on success, cut it multiplicatively on throttling"""
+        domain = get_marketplace(url)
+        bucket = self.get_bucket(url)
+        
+        with self._feedback_lock:
+            old_rate = bucket.rate
+            now = time.monotonic()
+            
+            if not throttled:
+                new_rate = min(self.max_rate, old_rate + self.increase_step)
+            elif now - self._last_decrease.get(domain, float('-inf')) >= self.decrease_cooldown:
+                new_rate = max(self.min_rate, old_rate * self.decrease_factor)
+                self._last_decrease[domain] = now
+                self.backoff_count += 1
+                self.backoff_events.append({
+                    'domain': domain,
+                    'old_rate': old_rate,
+                    'new_rate': new_rate,
+                    'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                })
+            else:
+                return
+            
+            if new_rate != old_rate:
+                bucket.set_rate(new_rate)
+
+    def get_rates(self):
+        """Current rate of every marketplace seen so far"""
+        with self._lock:
+            return {domain: bucket.rate for domain, bucket in self._buckets.items()}
+
+# ===================================================================
+# RETRIES AND CIRCUIT BREAKER
+# ===================================================================
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Network failures worth retrying (connection resets, timeouts, truncated bodies)
+RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """How often and how long to retry a transient failure
+    
+    Delays grow exponentially (backoff_base * 2^attempt, capped at backoff_max)
+    with full jitter, so parallel workers do not retry in lockstep. A
+    Retry-After header from the server takes precedence (up to retry_after_max).
+    """
+    
+    def __init__(self, max_retries=3, backoff_base=1.0, backoff_max=30.0, jitter=True,
+                 timeout=(10, 30), retry_after_max=120.0, retry_statuses=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        # requests timeout: (connect, read) seconds
+        self.timeout = timeout
+        self.retry_after_max = retry_after_max
+        self.retry_statuses = set(RETRY_STATUS_CODES if retry_statuses is None else retry_statuses)
+
+    def get_delay(self, attempt, retry_after=None):
+        """Seconds to sleep before retry number attempt + 1 (attempt counts from 0)"""
+        retry_after = parse_retry_after(retry_after)
+        if retry_after is not None:
+            return min(retry_after, self.retry_after_max)
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def should_retry(self, attempt, status=None, throttled=False):
+        """Whether a response with this status (or a network error when status is None) is retried"""
+        if attempt >= self.max_retries:
+            return False
+        return status is None or throttled or status in self.retry_statuses
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request to a marketplace whose circuit is open"""
+
+
+class ThrottledError(requests.exceptions.RequestException):
+    """Raised when a search page is still throttled (503/429 or robot check) once the retries are used up"""
+
+
+class CircuitBreaker:
+    """Per-marketplace circuit breaker
+    
+    After failure_threshold consecutive failures (network errors, 5xx, throttling)
+    the marketplace's circuit opens: requests fail fast with CircuitOpenError
+    instead of hammering a domain that is blocking us. After cooldown seconds one
+    trial request is let through (half-open); success closes the circuit again,
+    failure reopens it for another cooldown.
+    """
+    
+    def __init__(self, failure_threshold=5, cooldown=60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._opened_at = {}
+        self._trial_running = set()
+
+    def before_request(self, url):
+        """Raise CircuitOpenError if the marketplace's circuit is open"""
+        marketplace = get_marketplace(url)
+        with self._lock:
+            opened_at = self._opened_at.get(marketplace)
+            if opened_at is None:
+                return
+            remaining = opened_at + self.cooldown - time.monotonic()
+            if remaining > 0 or marketplace in self._trial_running:
+                raise CircuitOpenError(
+                    f'Circuit open for {marketplace} after {self._failures.get(marketplace, 0)} '
+                    f'consecutive failures (retry in {max(remaining, 0):.1f}s)'
+                )
+            # Half-open: this request is the trial
+            self._trial_running.add(marketplace)
+
+    def record_success(self, url):
+        marketplace = get_marketplace(url)
+        with self._lock:
+            self._failures.pop(marketplace, None)
+            self._opened_at.pop(marketplace, None)
+            self._trial_running.discard(marketplace)
+
+    def record_failure(self, url):
+        marketplace = get_marketplace(url)
+        with self._lock:
+            failures = self._failures.get(marketplace, 0) + 1
+            self._failures[marketplace] = failures
+            if failures >= self.failure_threshold or marketplace in self._trial_running:
+                self._opened_at[marketplace] = time.monotonic()
+            self._trial_running.discard(marketplace)
+
+    def get_state(self, url_or_marketplace):
+        """'closed', 'open' or 'half-open' for a URL's marketplace"""
+        marketplace = get_marketplace(url_or_marketplace) if '/' in url_or_marketplace else url_or_marketplace
+        with self._lock:
+            opened_at = self._opened_at.get(marketplace)
+            if opened_at is None:
+                return 'closed'
+            if marketplace in self._trial_running or time.monotonic() - opened_at >= self.cooldown:
+                return 'half-open'
+            return 'open'
+
+# ===================================================================
+# RESPONSE CACHE
+# ===================================================================
+
+def normalize_product_url(url):
+    """Clean a product URL (remove tracking parameters after dp/ASIN)"""
+    return re.sub(r'(/dp/[A-Z0-9]{10}).*', r'\1', url)
+
+def get_cache_key(url):
+    """Cache key of a page: marketplace + ASIN for products, else the normalized URL"""
+    for pattern in ASIN_URL_PATTERNS:
+        asin_match = pattern.search(url)
+        if asin_match:
+            return f"{get_marketplace(url)}:asin:{asin_match.group(1)}"
+    parsed_url = urlparse(normalize_product_url(url))
+    return f"{get_marketplace(url)}:url:{parsed_url.path}?{parsed_url.query}"
+
+
+class ResponseCache:
+    """Persistent, compressed on-disk cache of downloaded pages
+    
+    Entries live in a SQLite database (WAL mode, so threads and processes can
+    share it), bodies are zlib-compressed. Each entry has its own TTL, and the
+    least recently used entries are evicted once the compressed total exceeds
+    `max_size_mb`. The total is kept as a running count (re-read from the
+    database every `resync_interval` writes, as other processes may write
+    too) and expired entries are purged every `purge_interval` writes, so a
+    write does not scan the whole table.
+    """
+    
+    # Least recently used entries deleted per query while the cache is too large
+    EVICT_BATCH = 64
+    
+    def __init__(self, path='amazon_cache.sqlite3', ttl=3600, max_size_mb=500, compression_level=6,
+                 purge_interval=100, resync_interval=1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.compression_level = compression_level
+        self.purge_interval = purge_interval
+        self.resync_interval = resync_interval
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY, url TEXT, encoding TEXT, body BLOB, size INTEGER,'
+            ' stored_at REAL, expires_at REAL, last_access REAL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)')
+        self._size = self._read_size()
+
+    def _read_size(self):
+        return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, url):
+        """Return (content bytes, encoding) of a fresh cached page, or None"""
+        key = get_cache_key(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, encoding, expires_at, size FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or row[2] < now:
+                if row is not None:
+                    self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    self._size -= row[3]
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+            self.hits += 1
+        return zlib.decompress(row[0]), row[1]
+
+    def set(self, url, content, encoding=None, ttl=None):
+        """Store a downloaded page, evicting least recently used pages if needed"""
+        body = zlib.compress(content, self.compression_level)
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        key = get_cache_key(url)
+        with self._lock:
+            size = self._size
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                previous = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, url, encoding, body, len(body), now, expires_at, now)
+                )
+                self._size += len(body) - (previous[0] if previous else 0)
+                self._writes += 1
+                self._evict()
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                self._size = size
+                raise
+
+    def _evict(self):
+        """Drop expired entries (every purge_interval writes), then LRU entries until the cache fits in max_size"""
+        if self._writes % self.resync_interval == 0:
+            self._size = self._read_size()
+        if self._writes % self.purge_interval == 0 or self._size > self.max_size:
+            now = time.time()
+            expired = self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM responses WHERE expires_at < ?', (now,)
+            ).fetchone()[0]
+            if expired:
+                self._conn.execute('DELETE FROM responses WHERE expires_at < ?', (now,))
+                self._size -= expired
+        while self._size > self.max_size:
+            batch = self._conn.execute(
+                'SELECT key, size FROM responses ORDER BY last_access LIMIT ?', (self.EVICT_BATCH,)
+            ).fetchall()
+            if not batch:
+                self._size = 0
+                break
+            for key, size in batch:
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._size -= size
+                if self._size <= self.max_size:
+                    break
+
+    def clear(self):
+        """Remove every cached page"""
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._size = 0
+
+    def stats(self):
+        """Entry count, compressed size and hit/miss counters"""
+        with self._lock:
+            entries, size = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        return {'entries': entries, 'size_bytes': size, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# ===================================================================
+# INCREMENTAL RE-SCRAPE
+# ===================================================================
+
+# Start tag of a container the extractor reads (see LEAN_PARSE_IDS)
+CONTENT_REGION_RE = re.compile(
+    rb'<([a-zA-Z][a-zA-Z0-9]*)\b[^<>]*?\sid\s*=\s*["\'](' +
+    b'|'.join(re.escape(region_id.encode()) for region_id in sorted(LEAN_PARSE_IDS)) + rb')["\']'
+)
+CANONICAL_LINK_RE = re.compile(rb'<link\b[^>]*\brel\s*=\s*["\']?canonical\b[^>]*>', re.I)
+
+# Parts of a page that change on every request without changing any field:
+# scripts, styles, comments and hidden form inputs (session ids, CSRF tokens)
+CONTENT_NOISE_RE = re.compile(
+    rb'<script\b.*?</script\s*>|<style\b.*?</style\s*>|<!--.*?-->|<input\b[^>]*\btype\s*=\s*["\']?hidden\b[^>]*>',
+    re.S | re.I
+)
+VOID_ELEMENTS = frozenset([b'area', b'base', b'br', b'col', b'embed', b'hr', b'img', b'input', b'link', b'meta',
+                           b'source', b'track', b'wbr'])
+
+# Open/close tag patterns per element name, compiled on first use
+_element_tag_res = {}
+
+# Product keys that change on every scrape and are left out of diffs
+DIFF_IGNORED_FIELDS = frozenset(['scraped_at'])
+
+
+def _element_end(content, name, start):
+    """Offset just past the element whose start tag begins at `start` (end of content if unclosed)"""
+    if name.lower() in VOID_ELEMENTS:
+        return content.find(b'>', start) + 1
+    tag_re = _element_tag_res.get(name.lower())
+    if tag_re is None:
+        tag_re = _element_tag_res.setdefault(
+            name.lower(), re.compile(rb'<(/?)' + re.escape(name.lower()) + rb'[\s/>]', re.I))
+    depth = 0
+    for match in tag_re.finditer(content, start):
+        if not match.group(1):
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0:
+            return content.find(b'>', match.start()) + 1
+    return len(content)
+
+
+def get_content_hash(content, fields=None):
+    """Hash of the parts of a product page the extractor reads, computed without parsing
+    
+    Covers the LEAN_PARSE_IDS containers and the canonical link, minus
+    scripts, styles, comments and hidden inputs, so ads, recommendations and
+    per-request tokens do not change it. Pages without any known container
+    are hashed whole (minus the same noise). `fields` is part of the hash:
+    a page extracted with other fields never counts as unchanged.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    content = CONTENT_NOISE_RE.sub(b'', content)
+    digest = hashlib.blake2b(repr(sorted(fields) if fields else None).encode(), digest_size=16)
+    for link in CANONICAL_LINK_RE.findall(content):
+        digest.update(link)
+    
+    position = 0
+    found = False
+    while True:
+        match = CONTENT_REGION_RE.search(content, position)
+        if match is None:
+            break
+        found = True
+        position = _element_end(content, match.group(1), match.start())
+        digest.update(content[match.start():position])
+    if not found:
+        digest.update(content)
+    return digest.hexdigest()
+
+
+def diff_products(old, new, ignore=DIFF_IGNORED_FIELDS):
+    """{field: {'old': ..., 'new': ...}} for each field whose value differs (a missing field is None)"""
+    changes = {}
+    for name in list(old) + [name for name in new if name not in old]:
+        if name in ignore:
+            continue
+        old_value, new_value = old.get(name), new.get(name)
+        if old_value != new_value:
+            changes[name] = {'old': old_value, 'new': new_value}
+    return changes
+
+
+class ScrapeState:
+    """What the last scrape of each product page saw, for incremental re-scrapes
+    
+    One SQLite row per product page (keyed like ResponseCache: marketplace +
+    ASIN) with the response's ETag / Last-Modified validators, the page's
+    content hash (get_content_hash) and the last extracted product. See
+    AmazonScraper.scrape_product_changes.
+    """
+    
+    def __init__(self, path='amazon_scrape_state.sqlite3'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' key TEXT PRIMARY KEY, url TEXT, etag TEXT, last_modified TEXT, content_hash TEXT,'
+            ' product TEXT, checked_at TEXT, changed_at TEXT)'
+        )
+
+    def get(self, url):
+        """Stored state of a product page as a dict, or None if it was never scraped"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified, content_hash, product, checked_at, changed_at FROM pages WHERE key = ?',
+                (get_cache_key(url),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'content_hash': row[2],
+            'product': json.loads(row[3]),
+            'checked_at': row[4],
+            'changed_at': row[5],
+        }
+
+    def touch(self, url, etag=None, last_modified=None):
+        """Record an unchanged check (keeping the stored validators unless new ones are given)"""
+        with self._lock:
+            self._conn.execute(
+                'UPDATE pages SET checked_at = ?, etag = COALESCE(?, etag),'
+                ' last_modified = COALESCE(?, last_modified) WHERE key = ?',
+                (time.strftime('%Y-%m-%d %H:%M:%S'), etag, last_modified, get_cache_key(url))
+            )
+
+    def update(self, url, product, content_hash, etag=None, last_modified=None, changed=True):
+        """Store a freshly extracted product with its page's hash and validators"""
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET'
+                ' url = excluded.url, etag = excluded.etag, last_modified = excluded.last_modified,'
+                ' content_hash = excluded.content_hash, product = excluded.product,'
+                ' checked_at = excluded.checked_at,'
+                ' changed_at = CASE WHEN ? THEN excluded.changed_at ELSE pages.changed_at END',
+                (get_cache_key(url), url, etag, last_modified, content_hash,
+                 json.dumps(product, ensure_ascii=False), now, now, changed)
+            )
+
+    def stats(self):
+        """Number of product pages tracked"""
+        with self._lock:
+            return {'pages': self._conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# ===================================================================
+# CONNECTION POOL
+# ===================================================================
+
+class ConnectionPool:
+    """HTTP connection layer shared by AmazonScraper and AmazonSearchScraper
+    
+    One requests.Session whose per-host urllib3 pools hold up to pool_maxsize
+    keep-alive connections. With pool_block=True, a thread that finds every
+    connection of a host busy waits for one instead of opening a throwaway
+    connection (and TLS handshake) that is discarded afterwards.
+    
+    stats() reports how many requests reused a kept-alive connection, how many
+    had to open a new one, and how often / how long they waited for the pool.
+    """
+    
+    def __init__(self, pool_maxsize=10, pool_connections=10, pool_block=True, keep_alive=True, metrics=None):
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        # Optional ScrapeMetrics receiving the connect time of every new connection
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self.reset_stats()
+        
+        adapter = _CountingAdapter(self, pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                   pool_block=pool_block)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, headers=None, **kwargs):
+        """GET through the shared session"""
+        if not self.keep_alive:
+            headers = dict(headers or {}, Connection='close')
+        return self.session.get(url, headers=headers, **kwargs)
+
+    def record_checkout(self, new_connection, waited, wait_seconds):
+        """Called by the urllib3 pools each time a request takes a connection"""
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['new_connections' if new_connection else 'reused_connections'] += 1
+            if waited:
+                self._stats['pool_waits'] += 1
+                self._stats['pool_wait_seconds'] += wait_seconds
+
+    def stats(self):
+        """Connection reuse statistics since the last reset"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pool_wait_seconds'] = round(stats['pool_wait_seconds'], 3)
+        stats['reuse_ratio'] = round(stats['reused_connections'] / stats['requests'], 3) if stats['requests'] else 0.0
+        stats['pool_maxsize'] = self.pool_maxsize
+        stats['keep_alive'] = self.keep_alive
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'requests': 0, 'new_connections': 0, 'reused_connections': 0,
+                           'pool_waits': 0, 'pool_wait_seconds': 0.0}
+
+    def close(self):
+        self.session.close()
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose per-host pools report connection checkouts to a ConnectionPool"""
+    
+    def __init__(self, connection_pool, **kwargs):
+        self.connection_pool = connection_pool
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self._count_pools(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        # Requests through a proxy (proxies= or HTTP(S)_PROXY) use their own manager per proxy
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        self._count_pools(manager)
+        return manager
+
+    def _count_pools(self, manager):
+        """Make a urllib3 pool manager create counting pools (plain, TLS or SOCKS)"""
+        manager.pool_classes_by_scheme = {
+            scheme: pool_class if issubclass(pool_class, _CountingPoolMixin) else
+            type(f'Counting{pool_class.__name__}', (_CountingPoolMixin, pool_class),
+                 {'connection_pool': self.connection_pool})
+            for scheme, pool_class in manager.pool_classes_by_scheme.items()
+        }
+
+
+class _CountingPoolMixin:
+    """urllib3 connection pool mixin that counts new vs reused connections and pool waits"""
+    
+    connection_pool = None
+
+    def _get_conn(self, timeout=None):
+        # An empty queue means every connection of this host is checked out
+        waited = self.pool is not None and self.pool.empty()
+        start = time.perf_counter()
+        conn = super()._get_conn(timeout)
+        if self.connection_pool is not None:
+            # A connection without a socket (never used, or dropped) has to connect first
+            self.connection_pool.record_checkout(getattr(conn, 'sock', None) is None, waited,
+                                                 time.perf_counter() - start)
+        return conn
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        connect = conn.connect
+        connection_pool = self.connection_pool
+        marketplace = get_marketplace(f'//{self.host}')
+        
+        def timed_connect():
+            # Also runs when a dropped keep-alive connection reconnects
+            start = time.perf_counter()
+            connect()
+            if connection_pool is not None and connection_pool.metrics is not None:
+                connection_pool.metrics.observe('amazon_scraper_request_seconds', time.perf_counter() - start,
+                                                stage='connect', marketplace=marketplace)
+        conn.connect = timed_connect
+        return conn
+
+# ===================================================================
+# SELECTOR STATISTICS
+# ===================================================================
+
+class SelectorStats:
+    """Which fallback selector wins each product field, per marketplace
+    
+    extract_product_info() tries a list of candidate selectors per field and
+    keeps the first that matches; every page records the winner (or a miss)
+    and how many selectors were tried. With adaptive=True, once a field has
+    min_samples pages on a marketplace, candidates that never won there are
+    tried last. Candidates that did win keep their relative order, so a page
+    where several of them match still yields the same value as before; only a
+    page where a demoted selector would have matched first can differ.
+    
+    Stats persist as JSON (load() / save()); report() flags dead selectors.
+    """
+    
+    def __init__(self, adaptive=False, min_samples=20):
+        self.adaptive = adaptive
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        # (marketplace, field) -> {'pages', 'misses', 'selectors_tried', 'wins': {selector: count}}
+        self._fields = {}
+
+    def _get_field(self, marketplace, field):
+        stats = self._fields.get((marketplace, field))
+        if stats is None:
+            stats = {'pages': 0, 'misses': 0, 'selectors_tried': 0, 'wins': {}}
+            self._fields[(marketplace, field)] = stats
+        return stats
+
+    def order(self, marketplace, field, selectors):
+        """Candidates in the order to try them"""
+        if not self.adaptive:
+            return selectors
+        with self._lock:
+            stats = self._fields.get((marketplace, field))
+            if stats is None or stats['pages'] < self.min_samples:
+                return selectors
+            wins = dict(stats['wins'])
+        # Stable sort: winners first in their original order, then the rest
+        return sorted(selectors, key=lambda selector: wins.get(selector, 0) == 0)
+
+    def record(self, marketplace, field, selectors, winner):
+        """Record one page: the selector that matched (None = no candidate matched)"""
+        with self._lock:
+            stats = self._get_field(marketplace, field)
+            stats['pages'] += 1
+            if winner is None:
+                stats['misses'] += 1
+                stats['selectors_tried'] += len(selectors)
+            else:
+                stats['wins'][winner] = stats['wins'].get(winner, 0) + 1
+                stats['selectors_tried'] += selectors.index(winner) + 1
+            # Candidates that never won still appear in the report
+            for selector in selectors:
+                stats['wins'].setdefault(selector, 0)
+
+    def report(self, min_pages=None):
+        """Per marketplace and field: hit rate of each selector, dead ones flagged
+        
+        A selector is dead when it never won on a field seen on at least
+        min_pages pages (default: min_samples).
+        """
+        if min_pages is None:
+            min_pages = self.min_samples
+        report = {}
+        with self._lock:
+            for (marketplace, field), stats in sorted(self._fields.items()):
+                pages = stats['pages']
+                report.setdefault(marketplace, {})[field] = {
+                    'pages': pages,
+                    'miss_rate': round(stats['misses'] / pages, 3) if pages else 0.0,
+                    'avg_selectors_tried': round(stats['selectors_tried'] / pages, 2) if pages else 0.0,
+                    'selectors': [
+                        {
+                            'selector': selector,
+                            'wins': wins,
+                            'hit_rate': round(wins / pages, 3) if pages else 0.0,
+                            'dead': wins == 0 and pages >= min_pages,
+                        }
+                        for selector, wins in sorted(stats['wins'].items(), key=lambda item: -item[1])
+                    ],
+                }
+        return report
+
+    def format_report(self, min_pages=None):
+        """report() as text"""
+        lines = []
+        for marketplace, fields in self.report(min_pages).items():
+            lines.append(f"[{marketplace}]")
+            for field, stats in fields.items():
+                lines.append(f"  {field}: {stats['pages']} pages, miss rate {stats['miss_rate']:.0%}, "
+                             f"{stats['avg_selectors_tried']} selectors tried per page")
+                for row in stats['selectors']:
+                    flag = '  DEAD' if row['dead'] else ''
+                    lines.append(f"    {row['hit_rate']:>6.1%}  {row['selector']}{flag}")
+        return '\n'.join(lines)
+
+    def load(self, path):
+        """Merge stats saved by save() (a missing file is ignored)"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            for marketplace, fields in saved.get('fields', {}).items():
+                for field, data in fields.items():
+                    stats = self._get_field(marketplace, field)
+                    for key in ('pages', 'misses', 'selectors_tried'):
+                        stats[key] += data.get(key, 0)
+                    for selector, wins in data.get('wins', {}).items():
+                        stats['wins'][selector] = stats['wins'].get(selector, 0) + wins
+
+    def save(self, path):
+        with self._lock:
+            fields = {}
+            for (marketplace, field), stats in sorted(self._fields.items()):
+                fields.setdefault(marketplace, {})[field] = stats
+            data = json.dumps({'version': 1, 'fields': fields}, indent=2, ensure_ascii=False)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(data)
+
+# ===================================================================
+# PROCESS POOL PARSING
+# ===================================================================
+
+# The scraper each worker process parses with, built once by _init_parse_worker
+_worker_scraper = None
+
+
+def _init_parse_worker(parser, lean_parse):
+    global _worker_scraper
+    _worker_scraper = AmazonScraper(parser=parser, lean_parse=lean_parse)
+
+
+def _parse_product_in_worker(content, url, encoding, fields):
+    return _worker_scraper.parse_product(content, url, encoding, fields)
+
+
+class ParsePool:
+    """Parse product pages in worker processes, outside the GIL
+    
+    Fetching stays in the caller's threads; only the raw response bytes go to
+    a worker, which builds the soup, runs extract_product_info and sends back
+    the product dict, so parsing scales with cores instead of one. Results
+    are the same dicts an in-process parse returns. Selector statistics and
+    per-group extraction timings stay in the workers and are not reported.
+    """
+    
+    def __init__(self, processes=None, parser=None, lean_parse=False):
+        self.processes = processes or os.cpu_count() or 1
+        self.parser = resolve_parser(parser)
+        self.executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_parse_worker,
+                                            initargs=(self.parser, lean_parse))
+
+    def submit(self, content, url, encoding=None, fields=None):
+        """Queue one page; returns a concurrent.futures.Future of the product dict"""
+        return self.executor.submit(_parse_product_in_worker, content, url, encoding, fields)
+
+    def parse_product(self, content, url, encoding=None, fields=None):
+        return self.submit(content, url, encoding, fields).result()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# ===================================================================
+# CORE AMAZON SCRAPER CLASS
+# ===================================================================
+
+# ASIN (Amazon Standard Identification Number) patterns
+ASIN_RE = re.compile(r'[A-Z0-9]{10}')
+ASIN_URL_PATTERNS = [
+    re.compile(r'/dp/([A-Z0-9]{10})'),
+    re.compile(r'/gp/product/([A-Z0-9]{10})'),
+]
+ASIN_BYTES_PATTERNS = [
+    re.compile(rb'/dp/([A-Z0-9]{10})'),
+    re.compile(rb'/gp/product/([A-Z0-9]{10})'),
+    re.compile(rb'data-asin="([A-Z0-9]{10})"'),
+]
+
+class AmazonScraper:
+    def __init__(self, rate_limiter=None, parser=None, lean_parse=False, cache=None, connection_pool=None,
+                 retry_policy=None, circuit_breaker=None, metrics=None, selector_stats=None, parse_pool=None,
+                 fields=None, schema=None, state=None, pool_maxsize=10):
+        # Timing / size metrics (network, sleep, parse, extraction), see ScrapeMetrics
+        self.metrics = metrics or ScrapeMetrics()
+        
+        # Extraction schema, compiled once; fields = names to extract (None = all)
+        self.schema = schema or ExtractionSchema()
+        self.fields = fields
+        self.schema.plan(fields)  # unknown field names fail here, not on every page
+        
+        # Optional SelectorStats: records (and may reorder) the fallback selectors per field
+        self.selector_stats = selector_stats
+        
+        # Optional ParsePool: product pages are parsed in worker processes
+        self.parse_pool = parse_pool
+        
+        # Optional ScrapeState: validators, content hashes and last products for scrape_product_changes
+        self.state = state
+        
+        # HTTP connections (keep-alive pool), shared with any other scraper passed the same one.
+        # Without one, a pool of pool_maxsize connections is created on first use, so the
+        # asyncio engine (aiohttp) never builds one
+        self._connection_pool = connection_pool
+        if connection_pool is not None and connection_pool.metrics is None:
+            connection_pool.metrics = self.metrics
+        self.pool_maxsize = pool_maxsize
+        self._pool_lock = threading.Lock()
+        
+        # Transient failures are retried with backoff; a marketplace that keeps
+        # failing is cut off for a while by the circuit breaker
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        
+        # Optional ResponseCache; fresh cached pages skip the network entirely
+        self.cache = cache
+        
+        # Per-marketplace rate limiter, shared with any other scraper passed the same one
+        self.rate_limiter = rate_limiter or DomainRateLimiter()
+        
+        # HTML parser backend (lxml, html.parser or html5lib), chosen once
+        self.parser = resolve_parser(parser)
+        
+        # Lean parse: only build the page regions the extractor reads
+        if lean_parse and self.parser == 'html5lib':
+            raise ValueError('lean_parse is not supported by the html5lib parser')
+        self.lean_parse = lean_parse
+        
+        # Rotate user agents to avoid detection
+        self.user_agents = [
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36',
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
+            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        ]
+        
+        # Headers to mimic real browser
+        self.headers = {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+        }
+
+    @property
+    def connection_pool(self):
+        if self._connection_pool is None:
+            with self._pool_lock:
+                if self._connection_pool is None:
+                    self._connection_pool = ConnectionPool(pool_maxsize=self.pool_maxsize, metrics=self.metrics)
+        return self._connection_pool
+
+    @property
+    def session(self):
+        return self.connection_pool.session
+
+    def get_random_headers(self):
+        """Get random headers to avoid detection"""
+        headers = self.headers.copy()
+        headers['User-Agent'] = random.choice(self.user_agents)
+        return headers
+
+    def validate_amazon_url(self, url):
+        """Validate if the URL is an Amazon product URL"""
+        parsed_url = urlparse(url)
+        
+        if not any(domain in parsed_url.netloc for domain in AMAZON_DOMAINS):
+            return False
+        
+        # Check if it's a product URL (contains /dp/ or /gp/product/)
+        if '/dp/' in url or '/gp/product/' in url:
+            return True
+        
+        return False
+
+    def resolve_asin(self, soup, index, url=None, raw_content=None):
+        """Find the product ASIN without re-serializing the parsed tree
+        
+        Fallback order:
+        1. the request URL (/dp/ASIN or /gp/product/ASIN)
+        2. the <link rel="canonical"> URL
+        3. the hidden ASIN input, then the first element with a valid data-asin
+        4. the raw response bytes, searched with the URL and data-asin patterns
+        5. only when no raw bytes were given: the serialized tree (legacy behaviour)
+        """
+        for candidate_url in (url, (index.select_one('link[rel~="canonical"]') or {}).get('href')):
+            if candidate_url:
+                for pattern in ASIN_URL_PATTERNS:
+                    asin_match = pattern.search(candidate_url)
+                    if asin_match:
+                        return asin_match.group(1)
+        
+        asin_input = index.select_one('input#ASIN')
+        if asin_input and ASIN_RE.fullmatch(asin_input.get('value', '')):
+            return asin_input['value']
+        for _, element in index.by_attr.get('data-asin', []):
+            if ASIN_RE.fullmatch(element['data-asin']):
+                return element['data-asin']
+        
+        if raw_content is not None:
+            if isinstance(raw_content, str):
+                raw_content = raw_content.encode('utf-8', 'ignore')
+            for pattern in ASIN_BYTES_PATTERNS:
+                asin_match = pattern.search(raw_content)
+                if asin_match:
+                    return asin_match.group(1).decode('ascii')
+            return None
+        
+        page_content = str(soup)
+        for pattern in ASIN_BYTES_PATTERNS:
+            asin_match = re.search(pattern.pattern.decode('ascii'), page_content)
+            if asin_match:
+                return asin_match.group(1)
+        return None
+
+    def order_selectors(self, marketplace, field, selectors):
+        """Candidate selectors of a field in the order to try them"""
+        if self.selector_stats is None:
+            return selectors
+        return self.selector_stats.order(marketplace, field, selectors)
+
+    def record_selector(self, marketplace, field, selectors, winner):
+        if self.selector_stats is not None:
+            self.selector_stats.record(marketplace, field, selectors, winner)
+
+    def extract_product_info(self, soup, url=None, raw_content=None, fields=None):
+        """Extract product information from BeautifulSoup object
+        
+        url and raw_content (the response bytes) are optional and only used to
+        resolve the ASIN cheaply, see resolve_asin(). fields limits the result
+        to those PRODUCT_FIELDS names (default: the scraper's fields, or all);
+        the other fields are not extracted at all.
+        """
+        steps, output = self.schema.plan(self.fields if fields is None else fields)
+        product_info = {}
+        error = None
+        
+        try:
+            # Time spent per field group; each lap() closes the group above it
+            lap = self.metrics.stopwatch('amazon_scraper_extract_seconds')
+            
+            # Walk the tree once; every field selector is resolved against this index
+            index = DomIndex(soup)
+            marketplace = get_marketplace(url) if url else 'unknown'
+            lap('index')
+            
+            for field, closes_group in steps:
+                value = self.extract_field(field, soup, index, marketplace, product_info, url, raw_content)
+                if value is not None:
+                    product_info[field.name] = value
+                if closes_group:
+                    lap(closes_group)
+            
+        except Exception as e:
+            # Fields extracted before the failure are kept; the 'error' marks the product as failed
+            error = f'Extraction error: {str(e)}'
+        
+        if output is not None:
+            product_info = {name: value for name, value in product_info.items() if name in output}
+        if error is not None:
+            product_info['error'] = error
+        return product_info
+
+    def extract_field(self, field, soup, index, marketplace, product_info, url=None, raw_content=None):
+        """Value of one schema Field on a page (None = not found)"""
+        mode = field.mode
+        if mode == 'first':
+            selectors = self.order_selectors(marketplace, field.name, field.selectors)
+            winner = value = None
+            for selector in selectors:
+                element = index.select_one(selector)
+                if element is not None:
+                    value = field.value(element)
+                    if value is not None:
+                        winner = selector
+                        break
+            if len(selectors) > 1:
+                self.record_selector(marketplace, field.name, selectors, winner)
+            return value
+        
+        if mode == 'list':
+            selectors = self.order_selectors(marketplace, field.name, field.selectors)
+            winner = None
+            values = []
+            for selector in selectors:
+                values = [value for value in map(field.value, index.select(selector)) if value is not None]
+                if values:
+                    winner = selector
+                    break
+            self.record_selector(marketplace, field.name, selectors, winner)
+            return values[:field.limit] if values else None
+        
+        if mode == 'all':
+            # dict keeps the first occurrence of each value, in document order
+            values = {}
+            for selector in field.selectors:
+                for element in index.select(selector):
+                    value = field.value(element)
+                    if value is not None:
+                        values[value] = None
+            return list(values) if values else None
+        
+        if mode == 'exists':
+            return any(index.select_one(selector) is not None for selector in field.selectors)
+        
+        if mode == 'spec':
+            specs = product_info.get('specifications') or {}
+            for key in field.keys:
+                if key in specs:
+                    return specs[key]
+            return None
+        
+        if mode == 'asin':
+            return self.resolve_asin(soup, index, url, raw_content)
+        
+        if mode == 'custom':
+            return field.value(index)
+        
+        if mode == 'derived':
+            if all(name in product_info for name in field.requires):
+                return field.value(product_info)
+            return None
+        
+        raise ValueError(f"Unknown field mode: {mode}")
+
+    def parse_product(self, content, url, encoding=None, fields=None):
+        """Parse a downloaded product page into a product info dict (fields: see extract_product_info)"""
+        # Parse HTML
+        start = time.perf_counter()
+        if self.parse_pool is not None:
+            product_info = self.parse_pool.parse_product(content, url, encoding,
+                                                         self.fields if fields is None else fields)
+            # Round trip through the pool: queueing, parse and extraction
+            self.metrics.observe('amazon_scraper_parse_seconds', time.perf_counter() - start,
+                                 page='product_process', parser=self.parse_pool.parser)
+            return product_info
+        if self.lean_parse:
+            soup = make_soup(content, self.parser, encoding, parse_only=LEAN_PARSE_STRAINER)
+            # Unknown page layout: fall back to the full tree
+            if soup.find(id='productTitle') is None:
+                soup = make_soup(content, self.parser, encoding)
+        else:
+            soup = make_soup(content, self.parser, encoding)
+        self.metrics.observe('amazon_scraper_parse_seconds', time.perf_counter() - start,
+                             page='product', parser=self.parser)
+        
+        # Extract product information
+        product_info = self.extract_product_info(soup, url, content, fields)
+        
+        # Add URL and timestamp
+        product_info['url'] = url
+        product_info['scraped_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        
+        return product_info
+
+    def fetch(self, url, headers=None):
+        """GET a page through the rate limiter, retry policy and circuit breaker
+        
+        `headers` are sent on top of the rotated browser headers. Returns the
+        last response (which may still be throttled or an HTTP error once the
+        retries are used up); raises the last network error, or
+        CircuitOpenError when the marketplace's circuit is open.
+        """
+        marketplace = get_marketplace(url)
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_request(url)
+            
+            # Wait for the marketplace's rate limiter
+            waited = self.rate_limiter.wait(url)
+            self.metrics.observe('amazon_scraper_sleep_seconds', waited, reason='rate_limit')
+            
+            try:
+                # Make request with random headers
+                start = time.perf_counter()
+                request_headers = self.get_random_headers()
+                if headers:
+                    request_headers.update(headers)
+                response = self.connection_pool.get(url, headers=request_headers, timeout=self.retry_policy.timeout)
+            except RETRY_EXCEPTIONS:
+                self.metrics.inc('amazon_scraper_requests_total', marketplace=marketplace, status='error')
+                self.circuit_breaker.record_failure(url)
+                if not self.retry_policy.should_retry(attempt):
+                    raise
+                self.sleep_before_retry(attempt)
+                attempt += 1
+                continue
+            except Exception:
+                self.circuit_breaker.record_failure(url)
+                raise
+            
+            self.record_request_metrics(marketplace, response.status_code, time.perf_counter() - start,
+                                        response.elapsed.total_seconds(), len(response.content))
+            
+            # Let the rate limiter adapt
+            throttled = is_throttled_response(response)
+            self.rate_limiter.record_response(url, throttled)
+            
+            if throttled or response.status_code >= 500:
+                self.circuit_breaker.record_failure(url)
+            else:
+                self.circuit_breaker.record_success(url)
+            
+            if not self.retry_policy.should_retry(attempt, response.status_code, throttled):
+                return response
+            self.sleep_before_retry(attempt, response.headers.get('Retry-After'))
+            attempt += 1
+
+    def sleep_before_retry(self, attempt, retry_after=None):
+        delay = self.retry_policy.get_delay(attempt, retry_after)
+        self.metrics.observe('amazon_scraper_sleep_seconds', delay, reason='retry_backoff')
+        time.sleep(delay)
+
+    def record_request_metrics(self, marketplace, status, total_seconds, ttfb_seconds, size):
+        """Record one response: time to first byte (headers), body download, total, and size"""
+        metrics = self.metrics
+        metrics.inc('amazon_scraper_requests_total', marketplace=marketplace, status=str(status))
+        metrics.inc('amazon_scraper_bytes_received_total', size, marketplace=marketplace)
+        metrics.observe('amazon_scraper_response_bytes', size, marketplace=marketplace)
+        metrics.observe('amazon_scraper_request_seconds', total_seconds, stage='total', marketplace=marketplace)
+        if ttfb_seconds is not None:
+            metrics.observe('amazon_scraper_request_seconds', ttfb_seconds, stage='ttfb', marketplace=marketplace)
+            metrics.observe('amazon_scraper_request_seconds', max(0.0, total_seconds - ttfb_seconds),
+                            stage='download', marketplace=marketplace)
+
+    def scrape_product(self, url):
+        """Main method to scrape product from Amazon URL"""
+        
+        # Validate URL
+        if not self.validate_amazon_url(url):
+            return {
+                'error': 'Invalid Amazon product URL. Please provide a valid Amazon product link.'
+            }
+        
+        try:
+            if self.cache is not None:
+                cached = self.cache.get(url)
+                if cached is not None:
+                    return self.parse_product(cached[0], url, cached[1])
+            
+            # Rate-limited request with retries
+            response = self.fetch(url)
+            
+            # Report throttling explicitly
+            if is_throttled_response(response):
+                return {
+                    'error': f'Throttled by Amazon (HTTP {response.status_code}, robot check or rate limit)',
+                    'throttled': True
+                }
+            
+            response.raise_for_status()
+            
+            encoding = get_declared_encoding(response.headers.get('Content-Type'))
+            if self.cache is not None:
+                self.cache.set(url, response.content, encoding)
+            return self.parse_product(response.content, url, encoding)
+            
+        except requests.exceptions.RequestException as e:
+            return {
+                'error': f'Network error: {str(e)}'
+            }
+        except Exception as e:
+            return {
+                'error': f'Scraping error: {str(e)}'
+            }
+
+    def scrape_product_changes(self, url, product_sink=None):
+        """Re-scrape a product page against self.state and return only what changed
+        
+        Sends If-None-Match / If-Modified-Since from the last scrape; a 304, or a
+        page whose content hash is unchanged, is not parsed at all. Returns a
+        change record: 'change' is 'new' (with the full 'product'), 'changed'
+        (with field-level 'changes', see diff_products) or 'unchanged' (with
+        'skipped': 'not_modified' / 'same_content' when parsing was skipped);
+        errors are returned like scrape_product. product_sink, if given, gets
+        the full product of every new or changed page. The response cache is
+        not used: the point is to see the live page.
+        """
+        if self.state is None:
+            raise ValueError('scrape_product_changes needs a ScrapeState (state=...)')
+        if not self.validate_amazon_url(url):
+            return {
+                'error': 'Invalid Amazon product URL. Please provide a valid Amazon product link.'
+            }
+        
+        marketplace = get_marketplace(url)
+        previous = self.state.get(url)
+        record = {'record_type': 'change', 'asin': None, 'url': url}
+        for pattern in ASIN_URL_PATTERNS:
+            asin_match = pattern.search(url)
+            if asin_match:
+                record['asin'] = asin_match.group(1)
+                break
+        
+        try:
+            headers = {}
+            if previous is not None:
+                if previous['etag']:
+                    headers['If-None-Match'] = previous['etag']
+                if previous['last_modified']:
+                    headers['If-Modified-Since'] = previous['last_modified']
+            response = self.fetch(url, headers)
+            record['scraped_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            
+            if is_throttled_response(response):
+                return {
+                    'error': f'Throttled by Amazon (HTTP {response.status_code}, robot check or rate limit)',
+                    'throttled': True
+                }
+            
+            if response.status_code == 304 and previous is not None:
+                # A 304 may carry new validators: keep them, or later requests never match again
+                self.state.touch(url, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                self.metrics.inc('amazon_scraper_incremental_total', marketplace=marketplace, result='not_modified')
+                record.update(change='unchanged', skipped='not_modified')
+                return record
+            
+            response.raise_for_status()
+            
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            content_hash = get_content_hash(response.content, self.fields)
+            if previous is not None and content_hash == previous['content_hash']:
+                self.state.touch(url, etag, last_modified)
+                self.metrics.inc('amazon_scraper_incremental_total', marketplace=marketplace, result='same_content')
+                record.update(change='unchanged', skipped='same_content')
+                return record
+            
+            encoding = get_declared_encoding(response.headers.get('Content-Type'))
+            product = self.parse_product(response.content, url, encoding)
+            if 'error' in product:
+                # Not saved: the next run must parse this page again
+                return {
+                    'error': product['error']
+                }
+            record['asin'] = product.get('asin') or record['asin']
+            changes = diff_products(previous['product'], product) if previous is not None else None
+            self.state.update(url, product, content_hash, etag, last_modified, changed=changes != {})
+            
+            if previous is None:
+                record.update(change='new', product=product)
+            elif changes:
+                record.update(change='changed', changes=changes)
+            else:
+                record.update(change='unchanged')
+            self.metrics.inc('amazon_scraper_incremental_total', marketplace=marketplace, result=record['change'])
+            if product_sink is not None and record['change'] != 'unchanged':
+                product_sink(product)
+            return record
+            
+        except requests.exceptions.RequestException as e:
+            return {
+                'error': f'Network error: {str(e)}'
+            }
+        except Exception as e:
+            return {
+                'error': f'Scraping error: {str(e)}'
+            }
+
+# ===================================================================
+# AMAZON SEARCH SCRAPER CLASS
+# ===================================================================
+
+class AmazonSearchScraper:
+    def __init__(self, max_workers=1, rate_limiter=None, parser=None, lean_parse=False, cache=None,
+                 pipelined=False, queue_size=None, connection_pool=None, retry_policy=None, circuit_breaker=None,
+                 metrics=None, selector_stats=None, parse_pool=None, fields=None, compact=False, state=None):
+        # One set of metrics for search and product pages
+        self.metrics = metrics or ScrapeMetrics()
+        
+        self.parser = resolve_parser(parser)
+        self.cache = cache
+        
+        # Search pages and product pages draw from the same per-marketplace budget
+        self.rate_limiter = rate_limiter or DomainRateLimiter()
+        # Search pages and product pages share the base scraper's keep-alive connections;
+        # the default pool is large enough for every worker plus the search page fetcher
+        self.base_scraper = AmazonScraper(rate_limiter=self.rate_limiter, parser=self.parser,
+                                          lean_parse=lean_parse, cache=cache,
+                                          connection_pool=connection_pool,
+                                          retry_policy=retry_policy, circuit_breaker=circuit_breaker,
+                                          metrics=self.metrics, selector_stats=selector_stats,
+                                          parse_pool=parse_pool, fields=fields, state=state,
+                                          pool_maxsize=max(10, max_workers + 1))
+        self.retry_policy = self.base_scraper.retry_policy
+        self.circuit_breaker = self.base_scraper.circuit_breaker
+        
+        # Number of product pages fetched in parallel (1 = serial)
+        self.max_workers = max_workers
+        
+        # Pipelined crawl: search pages are fetched while product details are
+        # still being scraped; queue_size bounds the product links waiting in between
+        self.pipelined = pipelined
+        self.queue_size = queue_size or max(16, 2 * max_workers)
+        
+        # Keep collected products as ProductRecord instead of dicts (large crawls without a product_sink)
+        self.compact = compact
+        
+        # User agents for rotation
+        self.user_agents = [
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36',
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
+            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        ]
+        
+        self.headers = {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+        }
+
+    @property
+    def connection_pool(self):
+        return self.base_scraper.connection_pool
+
+    @property
+    def session(self):
+        return self.base_scraper.session
+
+    def get_random_headers(self):
+        """Get random headers to avoid detection"""
+        headers = self.headers.copy()
+        headers['User-Agent'] = random.choice(self.user_agents)
+        return headers
+
+    def validate_search_url(self, url):
+        """Validate if the URL is an Amazon search URL"""
+        parsed_url = urlparse(url)
+        
+        if not any(domain in parsed_url.netloc for domain in AMAZON_DOMAINS):
+            return False
+        
+        # Check if it's a search URL (contains /s? or has 'k=' parameter)
+        if '/s?' in url or 'k=' in url:
+            return True
+        
+        return False
+
+    def build_page_url(self, base_url, page_num):
+        """Build URL for specific page number"""
+        if page_num == 1:
+            return base_url
+        
+        # Parse the URL and add page parameter
+        parsed_url = urlparse(base_url)
+        query_params = parse_qs(parsed_url.query)
+        
+        # Add page parameter
+        query_params['page'] = [str(page_num)]
+        
+        # Reconstruct URL
+        new_query = urlencode(query_params, doseq=True)
+        new_url = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}?{new_query}"
+        
+        return new_url
+
+    def extract_product_links(self, soup, base_url='https://www.amazon.com'):
+        """Extract product links from search results page"""
+        product_links = []
+        
+        # Various selectors for product links
+        selectors = [
+            'h2.a-size-mini a',
+            '.s-result-item h3 a',
+            '[data-component-type="s-search-result"] h3 a',
+            '.s-product-image-container a',
+            'a.a-link-normal.s-underline-text'
+        ]
+        
+        for selector in selectors:
+            links = soup.select(selector)
+            for link in links:
+                href = link.get('href')
+                if href and ('/dp/' in href or '/gp/product/' in href):
+                    # Convert relative URL to absolute (on the search page's marketplace)
+                    if href.startswith('/'):
+                        href = urljoin(base_url, href)
+                    product_links.append(href)
+        
+        # Remove duplicates while preserving order
+        seen = set()
+        unique_links = []
+        for link in product_links:
+            # Clean URL (remove tracking parameters after dp/ASIN)
+            clean_link = normalize_product_url(link)
+            if clean_link not in seen:
+                seen.add(clean_link)
+                unique_links.append(clean_link)
+        
+        return unique_links
+
+    def extract_search_cards(self, soup, base_url='https://www.amazon.com'):
+        """Extract product data straight from the search result cards (no detail page)
+        
+        Returns one dict per card, in on-page order, with the same keys as
+        extract_product_info() for the fields a card shows: title, asin, price,
+        rating, review_count, prime_eligible and url.
+        """
+        cards = []
+        seen = set()
+        
+        for card in compile_selector('[data-component-type="s-search-result"]').select(soup):
+            asin = card.get('data-asin', '').strip()
+            if not ASIN_RE.fullmatch(asin) or asin in seen:
+                continue
+            seen.add(asin)
+            
+            product_info = {'asin': asin}
+            
+            title_element = compile_selector('h2').select_one(card)
+            if title_element:
+                product_info['title'] = title_element.get_text().strip()
+            
+            # Same text cleanup as the detail page extractor
+            price_element = compile_selector('.a-price .a-offscreen').select_one(card)
+            if price_element:
+                product_info['price'] = PRICE_CLEAN_RE.sub('', price_element.get_text().strip())
+            
+            rating_element = compile_selector('.a-icon-alt').select_one(card)
+            if rating_element:
+                rating_match = RATING_RE.search(rating_element.get_text())
+                if rating_match:
+                    product_info['rating'] = rating_match.group(1)
+            
+            review_selectors = [
+                'a[href*="customerReviews"] .a-size-base',
+                'span.a-size-base.s-underline-text',
+            ]
+            for selector in review_selectors:
+                review_element = compile_selector(selector).select_one(card)
+                if review_element:
+                    review_match = REVIEW_COUNT_RE.search(review_element.get_text())
+                    if review_match:
+                        product_info['review_count'] = review_match.group(1)
+                        break
+            
+            prime_element = compile_selector('.a-icon-prime, [aria-label="Amazon Prime"]').select_one(card)
+            product_info['prime_eligible'] = prime_element is not None
+            
+            # Product URL on the search page's marketplace, without tracking parameters
+            href = f'/dp/{asin}'
+            for link in compile_selector('a[href]').select(card):
+                if '/dp/' in link['href'] or '/gp/product/' in link['href']:
+                    href = link['href']
+                    break
+            product_info['url'] = normalize_product_url(urljoin(base_url, href))
+            
+            cards.append(product_info)
+        
+        return cards
+
+    def fetch_search_page(self, page_url):
+        """Download a search results page (or read it from the cache). Returns (content, encoding)"""
+        if self.cache is not None:
+            cached = self.cache.get(page_url)
+            if cached is not None:
+                return cached
+        
+        # Same rate limiter, retries and circuit breaker as the product pages
+        response = self.base_scraper.fetch(page_url)
+        
+        # A robot check served as HTTP 200 would otherwise parse as "no more results"
+        if is_throttled_response(response):
+            raise ThrottledError(f'Throttled by Amazon (HTTP {response.status_code}, robot check or rate limit) '
+                                 f'for url: {page_url}', response=response)
+        response.raise_for_status()
+        
+        encoding = get_declared_encoding(response.headers.get('Content-Type'))
+        if self.cache is not None:
+            self.cache.set(page_url, response.content, encoding)
+        return response.content, encoding
+
+    def parse_search_page(self, content, page_url, encoding=None):
+        """Parse a downloaded search results page into its product links"""
+        start = time.perf_counter()
+        soup = make_soup(content, self.parser, encoding)
+        parsed = time.perf_counter()
+        self.metrics.observe('amazon_scraper_parse_seconds', parsed - start, page='search', parser=self.parser)
+        product_links = self.extract_product_links(soup, base_url=page_url)
+        self.metrics.observe('amazon_scraper_extract_seconds', time.perf_counter() - parsed, group='search_links')
+        return product_links
+
+    def parse_search_cards(self, content, page_url, encoding=None):
+        """Parse a downloaded search results page into its card products"""
+        start = time.perf_counter()
+        soup = make_soup(content, self.parser, encoding)
+        parsed = time.perf_counter()
+        self.metrics.observe('amazon_scraper_parse_seconds', parsed - start, page='search', parser=self.parser)
+        cards = self.extract_search_cards(soup, base_url=page_url)
+        self.metrics.observe('amazon_scraper_extract_seconds', time.perf_counter() - parsed, group='search_cards')
+        return cards
+
+    def retain_products(self, products):
+        """Products as they are kept in the search result (compact records with compact=True)"""
+        if self.compact:
+            return [ProductRecord(product) for product in products]
+        return products
+
+    def build_search_result(self, search_url, max_pages, products, pages_processed, last_page_links, total_products=None):
+        """Build the final search result dict (products may be empty when they were streamed)"""
+        total_scraped = len(products) if total_products is None else total_products
+        return {
+            'search_url': search_url,
+            'total_pages_scraped': max_pages,
+            'total_products': total_scraped,
+            'products': products,
+            'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'summary': {
+                'pages_processed': pages_processed,
+                'products_found': total_scraped,
+                'success_rate': f"{(total_scraped/max(len(last_page_links)*max_pages, 1)*100):.1f}%" if last_page_links else "0%"
+            }
+        }
+
+    def scrape_page_products(self, product_links, page_num, max_workers=1, progress_callback=None,
+                             positions=None, result_callback=None):
+        """Scrape product details of one search page, in parallel when max_workers > 1
+        
+        positions are the on-page positions of product_links (default 1..n);
+        result_callback(position, url, product_data) is called for every finished
+        product, including failed ones, as soon as it completes.
+        """
+        if positions is None:
+            positions = list(range(1, len(product_links) + 1))
+        
+        if max_workers <= 1:
+            page_products = []
+            for count, (i, product_url) in enumerate(zip(positions, product_links), 1):  # Scrape ALL products on page
+                if progress_callback:
+                    progress_callback(f"Trang {page_num}: Scraping sản phẩm {count}/{len(product_links)}")
+                
+                try:
+                    # Use the base scraper to get product details
+                    product_data = self.base_scraper.scrape_product(product_url)
+                    
+                    if 'error' not in product_data:
+                        product_data['page_number'] = page_num
+                        product_data['position_on_page'] = i
+                        page_products.append(product_data)
+                    
+                except Exception as e:
+                    product_data = {'error': f'Scraping error: {str(e)}'}
+                    if progress_callback:
+                        progress_callback(f"Lỗi scraping {product_url}: {str(e)}")
+                
+                if result_callback:
+                    result_callback(i, product_url, product_data)
+            
+            return page_products
+        
+        # Worker-pool mode: politeness is enforced globally by the shared rate
+        # limiter, so workers only overlap network latency and parsing
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.base_scraper.scrape_product, product_url): (i, product_url)
+                for i, product_url in zip(positions, product_links)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                i, product_url = futures[future]
+                try:
+                    product_data = future.result()
+                    if 'error' not in product_data:
+                        product_data['page_number'] = page_num
+                        product_data['position_on_page'] = i
+                        results[i] = product_data
+                except Exception as e:
+                    product_data = {'error': f'Scraping error: {str(e)}'}
+                    if progress_callback:
+                        progress_callback(f"Lỗi scraping {product_url}: {str(e)}")
+                
+                if result_callback:
+                    result_callback(i, product_url, product_data)
+                
+                if progress_callback:
+                    progress_callback(f"Trang {page_num}: Đã scrape {done}/{len(product_links)} sản phẩm")
+        
+        # Keep products in their on-page order
+        return [results[i] for i in sorted(results)]
+
+    def get_page_links(self, search_url, page_num, journal=None, crawl_id=None):
+        """Return (page_url, product links) of one search page, from the journal when it has them"""
+        page_url = self.build_page_url(search_url, page_num)
+        journaled_links = journal.get_page_links(crawl_id, page_num) if journal else None
+        if journaled_links is not None:
+            return page_url, journaled_links
+        
+        # Throttled pages raise ThrottledError before this point; pages without
+        # links are not journaled either, so --resume fetches them again
+        content, encoding = self.fetch_search_page(page_url)
+        product_links = self.parse_search_page(content, page_url, encoding)
+        if journal and product_links:
+            journal.record_page(crawl_id, page_num, page_url, product_links)
+        return page_url, product_links
+
+    def scrape_journaled_page(self, product_links, page_num, max_workers, progress_callback, journal, crawl_id):
+        """Scrape one page through the crawl journal: products already done are not fetched again"""
+        done_products = journal.get_done_products(crawl_id, page_num)
+        todo = [(i, url) for i, url in enumerate(product_links, 1) if i not in done_products]
+        
+        if progress_callback and done_products:
+            progress_callback(f"Trang {page_num}: {len(done_products)} sản phẩm đã có trong journal, còn {len(todo)}")
+        
+        def record(position, url, product_data):
+            journal.record_product(crawl_id, page_num, position, url, product_data)
+        
+        new_products = self.scrape_page_products(
+            [url for _, url in todo], page_num, max_workers, progress_callback,
+            positions=[i for i, _ in todo], result_callback=record
+        )
+        
+        products = dict(done_products)
+        for product in new_products:
+            products[product['position_on_page']] = product
+        return [products[i] for i in sorted(products)]
+
+    def crawl_sequential(self, search_url, max_pages, progress_callback, max_workers, product_sink,
+                         journal=None, crawl_id=None):
+        """Crawl search pages one after another, scraping each page's products before the next page
+        
+        Returns (products, total_products, pages_processed, last_page_links).
+        """
+        all_products = []
+        total_products = 0
+        product_links = []
+        page_num = 0
+        
+        for page_num in range(1, max_pages + 1):
+            if progress_callback:
+                progress_callback(f"Đang scrape trang {page_num}/{max_pages}...")
+            
+            # Get search results page and extract product links
+            _, product_links = self.get_page_links(search_url, page_num, journal, crawl_id)
+            
+            if not product_links:
+                if progress_callback:
+                    progress_callback(f"Không tìm thấy sản phẩm ở trang {page_num}")
+                break
+            
+            if progress_callback:
+                progress_callback(f"Tìm thấy {len(product_links)} sản phẩm ở trang {page_num}")
+            
+            # Scrape each product
+            if journal:
+                page_products = self.scrape_journaled_page(product_links, page_num, max_workers,
+                                                           progress_callback, journal, crawl_id)
+            else:
+                page_products = self.scrape_page_products(product_links, page_num, max_workers, progress_callback)
+            
+            total_products += len(page_products)
+            if product_sink:
+                for product in page_products:
+                    product_sink(product)
+            else:
+                all_products.extend(self.retain_products(page_products))
+            
+            if progress_callback:
+                progress_callback(f"Hoàn thành trang {page_num}: {len(page_products)} sản phẩm")
+        
+        return all_products, total_products, page_num, product_links
+
+    def crawl_pipelined(self, search_url, max_pages, progress_callback, max_workers, product_sink,
+                        journal=None, crawl_id=None):
+        """Crawl search pages and product details as a producer/consumer pipeline
+        
+        The calling thread walks the search pages and puts (page, position, url)
+        items into a bounded queue that max_workers threads consume. When the
+        queue is full, pagination waits for the workers (backpressure), so memory
+        stays bounded however many pages are crawled. Pages are still handed to
+        product_sink / the result in page order.
+        
+        Returns (products, total_products, pages_processed, last_page_links).
+        """
+        max_workers = max(1, max_workers)
+        link_queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        lock = threading.Lock()
+        expected = {}      # page_num -> number of product links, once the page is enumerated
+        finished = {}      # page_num -> {position: product dict, or None when it failed}
+        worker_errors = []
+        state = {'next_page': 1, 'total_products': 0}
+        all_products = []
+        
+        def flush_pages():
+            # Hand over every completed page, in page order (called with the lock held)
+            while True:
+                page = state['next_page']
+                results = finished.get(page, {})
+                if page not in expected or len(results) < expected[page]:
+                    return
+                del finished[page]
+                page_products = [results[i] for i in sorted(results) if results[i] is not None]
+                state['total_products'] += len(page_products)
+                if product_sink:
+                    for product in page_products:
+                        product_sink(product)
+                else:
+                    all_products.extend(self.retain_products(page_products))
+                
+                if progress_callback:
+                    progress_callback(f"Hoàn thành trang {page}: {len(page_products)} sản phẩm")
+                state['next_page'] += 1
+        
+        def scrape_links():
+            while True:
+                item = link_queue.get()
+                if item is None:
+                    return
+                if stop.is_set():
+                    continue  # Crawl aborted: just drain the queue
+                
+                page, position, product_url = item
+                try:
+                    product_data = self.base_scraper.scrape_product(product_url)
+                except Exception as e:
+                    product_data = {'error': f'Scraping error: {str(e)}'}
+                    if progress_callback:
+                        progress_callback(f"Lỗi scraping {product_url}: {str(e)}")
+                
+                try:
+                    if 'error' not in product_data:
+                        product_data['page_number'] = page
+                        product_data['position_on_page'] = position
+                    if journal:
+                        journal.record_product(crawl_id, page, position, product_url, product_data)
+                    
+                    with lock:
+                        page_results = finished.setdefault(page, {})
+                        page_results[position] = None if 'error' in product_data else product_data
+                        if progress_callback:
+                            progress_callback(f"Trang {page}: Đã scrape {len(page_results)}/{expected[page]} sản phẩm")
+                        flush_pages()
+                except Exception as e:
+                    # e.g. the sink failed: stop the crawl, keep draining so pagination never blocks
+                    worker_errors.append(e)
+                    stop.set()
+        
+        product_links = []
+        page_num = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            workers = [executor.submit(scrape_links) for _ in range(max_workers)]
+            try:
+                for page_num in range(1, max_pages + 1):
+                    if stop.is_set():
+                        break
+                    
+                    if progress_callback:
+                        progress_callback(f"Đang lấy danh sách trang {page_num}/{max_pages}...")
+                    
+                    _, product_links = self.get_page_links(search_url, page_num, journal, crawl_id)
+                    
+                    if not product_links:
+                        if progress_callback:
+                            progress_callback(f"Không tìm thấy sản phẩm ở trang {page_num}")
+                        break
+                    
+                    if progress_callback:
+                        progress_callback(f"Tìm thấy {len(product_links)} sản phẩm ở trang {page_num}")
+                    
+                    done_products = journal.get_done_products(crawl_id, page_num) if journal else {}
+                    with lock:
+                        expected[page_num] = len(product_links)
+                        finished.setdefault(page_num, {}).update(done_products)
+                        flush_pages()
+                    
+                    for position, product_url in enumerate(product_links, 1):
+                        if position not in done_products:
+                            # Blocks while the detail workers are behind
+                            link_queue.put((page_num, position, product_url))
+            except BaseException:
+                stop.set()
+                raise
+            finally:
+                for _ in workers:
+                    link_queue.put(None)
+        
+        if worker_errors:
+            raise worker_errors[0]
+        
+        return all_products, state['total_products'], page_num, product_links
+
+    def crawl_shallow(self, search_url, max_pages, progress_callback, max_workers, product_sink,
+                      journal=None, crawl_id=None, deep_asins=None):
+        """Crawl search pages only, taking the products from the result cards
+        
+        One request per page instead of one per product. Products whose ASIN is
+        in deep_asins are additionally scraped from their detail page; the
+        detail fields are merged over the card fields.
+        
+        Returns (products, total_products, pages_processed, last_page_links).
+        """
+        deep_asins = set(deep_asins or ())
+        all_products = []
+        total_products = 0
+        product_links = []
+        page_num = 0
+        
+        for page_num in range(1, max_pages + 1):
+            if progress_callback:
+                progress_callback(f"Đang scrape trang {page_num}/{max_pages} (chỉ trang search)...")
+            
+            page_url = self.build_page_url(search_url, page_num)
+            journaled_links = journal.get_page_links(crawl_id, page_num) if journal else None
+            if journaled_links is not None:
+                product_links = journaled_links
+                cards = []
+                done_products = journal.get_done_products(crawl_id, page_num)
+            else:
+                content, encoding = self.fetch_search_page(page_url)
+                cards = self.parse_search_cards(content, page_url, encoding)
+                product_links = [card['url'] for card in cards]
+                for position, card in enumerate(cards, 1):
+                    card['scraped_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+                    card['page_number'] = page_num
+                    card['position_on_page'] = position
+                    card['source'] = 'search_card'
+                done_products = {}
+                if journal and product_links:
+                    # The cards are journaled with the page: a crawl interrupted before
+                    # the deep fetches below resumes with them
+                    journal.record_page(crawl_id, page_num, page_url, product_links, products=cards)
+                    done_products = dict(enumerate(cards, 1))
+            
+            if not product_links:
+                if progress_callback:
+                    progress_callback(f"Không tìm thấy sản phẩm ở trang {page_num}")
+                break
+            
+            page_products = dict(enumerate(cards, 1))
+            page_products.update(done_products)
+            
+            # Opt-in detail pages for the selected ASINs
+            deep_positions = [
+                position for position, product in page_products.items()
+                if product.get('asin') in deep_asins and product.get('source') != 'detail_page'
+            ]
+            if deep_positions:
+                if progress_callback:
+                    progress_callback(f"Trang {page_num}: scrape chi tiết {len(deep_positions)} sản phẩm đã chọn")
+                detailed = self.scrape_page_products(
+                    [page_products[position]['url'] for position in deep_positions], page_num, max_workers,
+                    progress_callback, positions=deep_positions
+                )
+                for product in detailed:
+                    position = product['position_on_page']
+                    page_products[position] = {**page_products[position], **product, 'source': 'detail_page'}
+            
+            if journal:
+                for position, product in page_products.items():
+                    if position not in done_products or position in deep_positions:
+                        journal.record_product(crawl_id, page_num, position, product['url'], product)
+            
+            page_products = [page_products[position] for position in sorted(page_products)]
+            total_products += len(page_products)
+            if product_sink:
+                for product in page_products:
+                    product_sink(product)
+            else:
+                all_products.extend(self.retain_products(page_products))
+            
+            if progress_callback:
+                progress_callback(f"Hoàn thành trang {page_num}: {len(page_products)} sản phẩm")
+        
+        return all_products, total_products, page_num, product_links
+
+    def scrape_search_results(self, search_url, max_pages=1, progress_callback=None, max_workers=None,
+                              product_sink=None, journal=None, resume=False, shallow=False, deep_asins=None):
+        """Scrape products from Amazon search results
+        
+        With a product_sink (e.g. NdjsonWriter.write_product), every product is
+        handed to the sink as soon as its page is done instead of being kept in
+        memory; the returned result then has an empty 'products' list.
+        
+        With a CrawlJournal, enumerated pages and every product's status are
+        recorded as the crawl goes. resume=True continues a previous crawl of the
+        same search: journaled pages and finished products are not fetched again
+        (they are still included in the result / sent to the sink). A crawl
+        started with another shallow / deep_asins / fields setting is not
+        resumed (an error is returned instead).
+        
+        When the scraper is pipelined, see crawl_pipelined().
+        
+        shallow=True takes the products from the search result cards only (see
+        crawl_shallow()); deep_asins lists the ASINs still scraped from their
+        detail page.
+        """
+        
+        if max_workers is None:
+            max_workers = self.max_workers
+        
+        if not self.validate_search_url(search_url):
+            return {
+                'error': 'Invalid Amazon search URL. Please provide a valid Amazon search link.'
+            }
+        
+        crawl_id = None
+        if journal:
+            # A shallow crawl journals card data where a deep crawl journals detail pages,
+            # and a fields projection changes the shape of the journaled products
+            fields = self.base_scraper.fields
+            params = {'mode': 'shallow' if shallow else 'deep',
+                      'fields': sorted(set(fields)) if fields is not None else None}
+            if shallow:
+                params['deep_asins'] = sorted(set(deep_asins or ()))
+            try:
+                crawl_id = journal.start_crawl(search_url, max_pages, resume, params)
+            except ValueError as e:
+                return {
+                    'error': str(e)
+                }
+        if shallow:
+            crawl = functools.partial(self.crawl_shallow, deep_asins=deep_asins)
+        else:
+            crawl = self.crawl_pipelined if self.pipelined else self.crawl_sequential
+        
+        try:
+            all_products, total_products, page_num, product_links = crawl(
+                search_url, max_pages, progress_callback, max_workers, product_sink, journal, crawl_id
+            )
+            
+            if journal:
+                journal.finish_crawl(crawl_id, 'done')
+            
+            # Prepare final result
+            return self.build_search_result(search_url, max_pages, all_products, page_num, product_links, total_products)
+            
+        except ThrottledError as e:
+            error_result = {
+                'error': str(e),
+                'throttled': True
+            }
+        except requests.exceptions.RequestException as e:
+            error_result = {
+                'error': f'Network error: {str(e)}'
+            }
+        except Exception as e:
+            error_result = {
+                'error': f'Scraping error: {str(e)}'
+            }
+        
+        # Work done so far stays in the journal; the crawl can be resumed
+        if journal:
+            journal.finish_crawl(crawl_id, 'interrupted')
+            error_result['resumable'] = True
+            error_result['journal_progress'] = journal.get_progress(crawl_id)
+        return error_result
+
+# ===================================================================
+# CRAWL JOURNAL
+# ===================================================================
+
+class CrawlJournal:
+    """SQLite journal of search crawls, used to resume them after a failure
+    
+    Records every enumerated search page with its product links, and for each
+    product whether it is pending, done (with the scraped data) or failed.
+    A crawl is identified by its search URL and keeps the parameters it was
+    started with, so it is only resumed with the same ones.
+    """
+    
+    def __init__(self, path='amazon_crawl_journal.sqlite3'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS crawls ('
+            ' crawl_id TEXT PRIMARY KEY, max_pages INTEGER, status TEXT, started_at TEXT, updated_at TEXT,'
+            ' params TEXT);'
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' crawl_id TEXT, page_num INTEGER, page_url TEXT, product_count INTEGER,'
+            ' PRIMARY KEY (crawl_id, page_num));'
+            'CREATE TABLE IF NOT EXISTS products ('
+            ' crawl_id TEXT, page_num INTEGER, position INTEGER, url TEXT, status TEXT,'
+            ' error TEXT, data TEXT, updated_at TEXT,'
+            ' PRIMARY KEY (crawl_id, page_num, position));'
+        )
+        # Journals written before the crawl parameters were recorded
+        if 'params' not in [row[1] for row in self._conn.execute('PRAGMA table_info(crawls)')]:
+            self._conn.execute('ALTER TABLE crawls ADD COLUMN params TEXT')
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def start_crawl(self, search_url, max_pages, resume=False, params=None):
+        """Register a crawl (wiping any previous one unless resume=True). Returns its id
+        
+        params (e.g. {'mode': 'shallow', 'deep_asins': [...]}) are stored with the
+        crawl. Resuming with other params would mix in pages and products of a
+        different shape, so it raises ValueError; crawls journaled before params
+        were recorded are resumed as they are.
+        """
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        params = json.dumps(params or {}, sort_keys=True)
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            if resume:
+                row = self._conn.execute('SELECT params FROM crawls WHERE crawl_id = ?', (search_url,)).fetchone()
+                if row is not None and row[0] is not None and row[0] != params:
+                    self._conn.execute('ROLLBACK')
+                    raise ValueError(f'The journaled crawl of {search_url} was started with {row[0]}, not {params}: '
+                                     f'run it again without resume to start over')
+            else:
+                for table in ('crawls', 'pages', 'products'):
+                    self._conn.execute(f'DELETE FROM {table} WHERE crawl_id = ?', (search_url,))
+            self._conn.execute(
+                'INSERT INTO crawls (crawl_id, max_pages, status, started_at, updated_at, params)'
+                ' VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (crawl_id) DO UPDATE SET'
+                ' max_pages = excluded.max_pages, status = excluded.status, updated_at = excluded.updated_at,'
+                ' params = excluded.params',
+                (search_url, max_pages, 'running', now, now, params)
+            )
+            self._conn.execute('COMMIT')
+        return search_url
+
+    def finish_crawl(self, crawl_id, status):
+        """Mark a crawl as 'done' or 'interrupted'"""
+        self._execute('UPDATE crawls SET status = ?, updated_at = ? WHERE crawl_id = ?',
+                      (status, time.strftime('%Y-%m-%d %H:%M:%S'), crawl_id))
+
+    def record_page(self, crawl_id, page_num, page_url, product_links, products=None):
+        """Record an enumerated search page and queue its products as pending
+        
+        products (one dict per link, e.g. shallow crawl cards) are recorded as
+        done in the same transaction instead, so they survive an interruption.
+        """
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)',
+                               (crawl_id, page_num, page_url, len(product_links)))
+            if products is None:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO products VALUES (?, ?, ?, ?, ?, NULL, NULL, ?)',
+                    [(crawl_id, page_num, i, url, 'pending', now) for i, url in enumerate(product_links, 1)]
+                )
+            else:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, NULL, ?, ?)',
+                    [(crawl_id, page_num, i, url, 'done', json.dumps(product, ensure_ascii=False), now)
+                     for i, (url, product) in enumerate(zip(product_links, products), 1)]
+                )
+            self._conn.execute('COMMIT')
+
+    def get_page_links(self, crawl_id, page_num):
+        """Product links of a journaled page in on-page order, or None if it has to be fetched (again)
+        
+        Pages journaled without any link (by older versions, e.g. a robot check
+        served as HTTP 200) count as never fetched, so a resume does not stop there.
+        """
+        if not self._execute('SELECT 1 FROM pages WHERE crawl_id = ? AND page_num = ? AND product_count > 0',
+                             (crawl_id, page_num)):
+            return None
+        rows = self._execute('SELECT url FROM products WHERE crawl_id = ? AND page_num = ? ORDER BY position',
+                             (crawl_id, page_num))
+        return [row[0] for row in rows]
+
+    def record_product(self, crawl_id, page_num, position, url, product_data):
+        """Record a finished product: done with its data, or failed with its error"""
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        if 'error' in product_data:
+            values = ('failed', product_data['error'], None)
+        else:
+            values = ('done', None, json.dumps(product_data, ensure_ascii=False))
+        self._execute('INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                      (crawl_id, page_num, position, url) + values + (now,))
+
+    def get_done_products(self, crawl_id, page_num):
+        """Products of a page already scraped, as {position: product dict}"""
+        rows = self._execute(
+            'SELECT position, data FROM products WHERE crawl_id = ? AND page_num = ? AND status = ?',
+            (crawl_id, page_num, 'done')
+        )
+        return {position: json.loads(data) for position, data in rows}
+
+    def get_progress(self, crawl_id):
+        """Number of pages and of pending / done / failed products of a crawl"""
+        progress = {'pages': 0, 'pending': 0, 'done': 0, 'failed': 0}
+        progress['pages'] = self._execute('SELECT COUNT(*) FROM pages WHERE crawl_id = ?', (crawl_id,))[0][0]
+        for status, count in self._execute(
+            'SELECT status, COUNT(*) FROM products WHERE crawl_id = ? GROUP BY status', (crawl_id,)
+        ):
+            progress[status] = count
+        return progress
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# ===================================================================
+# STREAMING OUTPUT
+# ===================================================================
+
+class NdjsonWriter:
+    """Thread-safe writer appending one compact JSON line per record
+    
+    Each line is flushed as soon as it is written, so a crash only loses the
+    products still in flight. Use write_product() as a scraper product_sink and
+    write_summary() once at the end: the summary is always the last line.
+    """
+    
+    def __init__(self, path_or_file, append=False):
+        if hasattr(path_or_file, 'write'):
+            self._file = path_or_file
+            self._owns_file = False
+        else:
+            self._file = open(path_or_file, 'a' if append else 'w', encoding='utf-8')
+            self._owns_file = True
+        self._lock = threading.Lock()
+        self.records_written = 0
+
+    def write_record(self, record):
+        """Append one record as a single JSON line"""
+        if isinstance(record, ProductRecord):
+            record = record.to_dict()
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.records_written += 1
+
+    def write_product(self, product):
+        """Append one product (usable as product_sink)"""
+        self.write_record(product)
+
+    def write_summary(self, result):
+        """Append the final summary: the search result without its product list"""
+        summary = {key: value for key, value in result.items() if key != 'products'}
+        summary['record_type'] = 'summary'
+        self.write_record(summary)
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# ===================================================================
+# PRODUCT STORE
+# ===================================================================
+
+class ProductStore:
+    """SQLite database of scraped products, accumulated across runs
+    
+    write_product() (usable as a product_sink, thread-safe) buffers rows and
+    writes them `batch_size` at a time with executemany in one transaction
+    (WAL mode). Each product is one row of `products` with typed, indexed
+    columns (asin, marketplace, scraped_at, price in minor units); its
+    specifications, images and features go to side tables and every other
+    field is kept as JSON in `products.data`. Products with an error are
+    skipped. Call flush() / close() (or use it as a context manager) to write
+    the last batch.
+    """
+    
+    # Product keys stored in their own column or side table; the rest goes to `data`
+    COLUMN_FIELDS = ('asin', 'url', 'title', 'brand', 'price', 'rating', 'review_count', 'availability',
+                     'prime_eligible', 'scraped_at', 'specifications', 'images', 'features')
+    
+    def __init__(self, path='amazon_products.sqlite3', batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.write_seconds = 0.0
+        self._pending = []
+        self._lock = threading.Lock()
+        
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS products ('
+            ' id INTEGER PRIMARY KEY, asin TEXT, marketplace TEXT, url TEXT, title TEXT, brand TEXT,'
+            ' price TEXT, price_minor INTEGER, currency TEXT, rating REAL, review_count INTEGER,'
+            ' availability TEXT, prime_eligible INTEGER, scraped_at TEXT, data TEXT);'
+            'CREATE INDEX IF NOT EXISTS products_asin ON products (asin, marketplace, scraped_at);'
+            'CREATE INDEX IF NOT EXISTS products_marketplace ON products (marketplace, scraped_at);'
+            'CREATE INDEX IF NOT EXISTS products_scraped_at ON products (scraped_at);'
+            'CREATE INDEX IF NOT EXISTS products_price ON products (price_minor);'
+            'CREATE TABLE IF NOT EXISTS product_specs ('
+            ' product_id INTEGER, key TEXT, value TEXT, PRIMARY KEY (product_id, key)) WITHOUT ROWID;'
+            'CREATE TABLE IF NOT EXISTS product_images ('
+            ' product_id INTEGER, position INTEGER, url TEXT, PRIMARY KEY (product_id, position)) WITHOUT ROWID;'
+            'CREATE TABLE IF NOT EXISTS product_features ('
+            ' product_id INTEGER, position INTEGER, text TEXT, PRIMARY KEY (product_id, position)) WITHOUT ROWID;'
+            'CREATE INDEX IF NOT EXISTS product_specs_key ON product_specs (key, value);'
+        )
+
+    def write_product(self, product):
+        """Queue one product (usable as product_sink); written once a batch is full"""
+        if 'error' in product:
+            return
+        with self._lock:
+            self._pending.append(product)
+            if len(self._pending) >= self.batch_size:
+                self._write_pending()
+
+    def flush(self):
+        with self._lock:
+            self._write_pending()
+
+    def _write_pending(self):
+        if not self._pending:
+            return
+        start = time.perf_counter()
+        products, self._pending = self._pending, []
+        
+        # Rows are numbered from 0 here and offset by the next free id inside the transaction
+        rows, specs, images, features = [], [], [], []
+        for i, product in enumerate(products):
+            if isinstance(product, ProductRecord):
+                product = product.to_dict()
+            url = product.get('url')
+            marketplace = get_marketplace(url) if url else None
+            price = product.get('price')
+            exponent = get_marketplace_setting(CURRENCY_EXPONENTS, marketplace or '')
+            parsed_price = parse_price(price, 2 if exponent is None else exponent) if isinstance(price, str) else None
+            rating = parse_rating(product.get('rating'))
+            prime = product.get('prime_eligible')
+            extra = {key: value for key, value in product.items() if key not in self.COLUMN_FIELDS}
+            rows.append([
+                i, product.get('asin'), marketplace, url, product.get('title'), product.get('brand'), price,
+                parsed_price[0] if parsed_price else None, get_marketplace_setting(MARKETPLACE_CURRENCIES, marketplace or ''),
+                None if rating is None else float(rating), parse_review_count(product.get('review_count')),
+                product.get('availability'), None if prime is None else int(prime), product.get('scraped_at'),
+                json.dumps(extra, ensure_ascii=False) if extra else None,
+            ])
+            specs.extend([i, key, value] for key, value in (product.get('specifications') or {}).items())
+            images.extend([i, position, image] for position, image in enumerate(product.get('images') or ()))
+            features.extend([i, position, text] for position, text in enumerate(product.get('features') or ()))
+        
+        with self._conn:
+            # IMMEDIATE: no other writer can take the same ids in between
+            self._conn.execute('BEGIN IMMEDIATE')
+            next_id = self._conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM products').fetchone()[0]
+            for row in itertools.chain(rows, specs, images, features):
+                row[0] += next_id
+            self._conn.executemany('INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self._conn.executemany('INSERT OR REPLACE INTO product_specs VALUES (?, ?, ?)', specs)
+            self._conn.executemany('INSERT INTO product_images VALUES (?, ?, ?)', images)
+            self._conn.executemany('INSERT INTO product_features VALUES (?, ?, ?)', features)
+        
+        self.rows_written += len(rows)
+        self.write_seconds += time.perf_counter() - start
+
+    def latest_prices(self, asins=None, marketplace=None):
+        """Most recent price of each ASIN (per marketplace), optionally only for some ASINs
+        
+        Returns dicts with asin, marketplace, scraped_at, price (text as
+        scraped), price_minor and currency.
+        """
+        self.flush()
+        # SQLite takes the bare columns from the row holding MAX(scraped_at)
+        sql = ('SELECT asin, marketplace, MAX(scraped_at), price, price_minor, currency FROM products'
+               ' WHERE price IS NOT NULL')
+        params = []
+        if asins is not None:
+            asins = list(asins)
+            sql += f" AND asin IN ({', '.join('?' * len(asins))})"
+            params += asins
+        if marketplace is not None:
+            sql += ' AND marketplace = ?'
+            params.append(marketplace)
+        sql += ' GROUP BY asin, marketplace'
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        columns = ('asin', 'marketplace', 'scraped_at', 'price', 'price_minor', 'currency')
+        return [dict(zip(columns, row)) for row in rows]
+
+    def price_history(self, asin, marketplace=None):
+        """(scraped_at, price, price_minor) of one ASIN, oldest first"""
+        self.flush()
+        sql = 'SELECT scraped_at, price, price_minor FROM products WHERE asin = ?'
+        params = [asin]
+        if marketplace is not None:
+            sql += ' AND marketplace = ?'
+            params.append(marketplace)
+        with self._lock:
+            return self._conn.execute(sql + ' ORDER BY scraped_at', params).fetchall()
+
+    def count(self):
+        self.flush()
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM products').fetchone()[0]
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# ===================================================================
+# ANALYTICS
+# ===================================================================
+
+ANALYTICS_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def _quantile(sorted_values, q):
+    """Linear-interpolated quantile of sorted values (numpy's default method)"""
+    position = q * (len(sorted_values) - 1)
+    low = math.floor(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def _histogram(sorted_values, bins):
+    """(counts, edges) with numpy.histogram's equal-width bins (the last bin includes its right edge)"""
+    low, high = sorted_values[0], sorted_values[-1]
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    width = (high - low) / bins
+    edges = [i * width + low for i in range(bins)] + [high]
+    counts = [0] * bins
+    for value in sorted_values:
+        counts[min(bisect.bisect_right(edges, value) - 1, bins - 1)] += 1
+    return counts, edges
+
+
+def _describe_sorted(present, missing):
+    """Summary of one column's sorted non-missing values (no histogram)"""
+    if not present:
+        return {'count': 0, 'missing': missing}
+    return {
+        'count': len(present),
+        'missing': missing,
+        'min': present[0],
+        'max': present[-1],
+        'mean': math.fsum(present) / len(present),
+        'quantiles': {f'p{round(q * 100)}': _quantile(present, q) for q in ANALYTICS_QUANTILES},
+    }
+
+
+class ProductAnalytics:
+    """Price, rating and review count distributions of a set of products
+    
+    add() (usable as a product_sink) turns the price, rating and
+    review_count strings into numbers kept in flat arrays; summary() computes
+    quantiles, histograms, IQR price outliers and a price-per-rating ranking
+    for all products and per search page, vectorized with NumPy when it is
+    installed (the same numbers in pure Python otherwise). Prices are in
+    currency units of each product's marketplace, so mixing marketplaces
+    mixes currencies.
+    """
+    
+    def __init__(self, products=(), bins=10, top=10):
+        self.bins = bins
+        self.top = top
+        self.prices = array('d')
+        self.ratings = array('d')
+        self.review_counts = array('d')
+        self.pages = array('l')
+        self.labels = []  # (asin, title, price text) per product
+        self.currencies = set()
+        self._lock = threading.Lock()
+        self._number_cache = {}
+        for product in products:
+            self.add(product)
+
+    def _to_number(self, kind, text, marketplace=None):
+        """Float value of a price / rating / review count text (nan if it is not a number)"""
+        key = (kind, text, marketplace)
+        value = self._number_cache.get(key)
+        if value is not None:
+            return value
+        value = math.nan
+        if isinstance(text, (int, float)) and not isinstance(text, bool):
+            value = float(text)
+        elif isinstance(text, str):
+            if kind == 'price':
+                exponent = get_marketplace_setting(CURRENCY_EXPONENTS, marketplace or '')
+                exponent = 2 if exponent is None else exponent
+                parsed = parse_price(PRICE_CLEAN_RE.sub('', text), exponent)
+                if parsed:
+                    value = parsed[0] / 10 ** exponent
+            elif kind == 'rating':
+                match = RATING_RE.search(text)
+                if match:
+                    value = float(match.group(1))
+            else:
+                match = REVIEW_COUNT_RE.search(text)
+                if match and match.group(1).replace(',', ''):
+                    value = float(match.group(1).replace(',', ''))
+        if len(self._number_cache) < 100000:
+            self._number_cache[key] = value
+        return value
+
+    def add(self, product):
+        """Add one product (usable as product_sink); products with an error are skipped"""
+        if 'error' in product:
+            return
+        url = product.get('url')
+        marketplace = get_marketplace(url) if url else None
+        price = self._to_number('price', product.get('price'), marketplace)
+        rating = self._to_number('rating', product.get('rating'))
+        review_count = self._to_number('review_count', product.get('review_count'))
+        with self._lock:
+            self.prices.append(price)
+            self.ratings.append(rating)
+            self.review_counts.append(review_count)
+            self.pages.append(product.get('page_number') or 0)
+            self.labels.append((product.get('asin'), product.get('title'), product.get('price')))
+            currency = get_marketplace_setting(MARKETPLACE_CURRENCIES, marketplace) if marketplace else None
+            if currency and not math.isnan(price):
+                self.currencies.add(currency)
+
+    def __len__(self):
+        return len(self.prices)
+
+    def _describe(self, values):
+        """count, missing, min, max, mean, quantiles and histogram of one column"""
+        if np is not None:
+            values = np.asarray(values)
+            present = np.sort(values[~np.isnan(values)])
+            if not len(present):
+                return {'count': 0, 'missing': int(len(values))}
+            counts, edges = np.histogram(present, bins=self.bins)
+            quantiles = np.quantile(present, ANALYTICS_QUANTILES)
+            return {
+                'count': int(len(present)),
+                'missing': int(len(values) - len(present)),
+                'min': float(present[0]),
+                'max': float(present[-1]),
+                'mean': float(present.mean()),
+                'quantiles': {f'p{round(q * 100)}': float(value) for q, value in zip(ANALYTICS_QUANTILES, quantiles)},
+                'histogram': {'counts': counts.tolist(), 'edges': edges.tolist()},
+            }
+        present = sorted(value for value in values if not math.isnan(value))
+        described = _describe_sorted(present, len(values) - len(present))
+        if present:
+            counts, edges = _histogram(present, self.bins)
+            described['histogram'] = {'counts': counts, 'edges': edges}
+        return described
+
+    def _describe_pages(self, values):
+        """{page: summary of the column on that page}, one sort for all pages"""
+        if np is None:
+            groups = {}
+            for page, value in zip(self.pages, values):
+                groups.setdefault(page, []).append(value)
+            result = {}
+            for page in sorted(groups):
+                present = sorted(value for value in groups[page] if not math.isnan(value))
+                result[page] = _describe_sorted(present, len(groups[page]) - len(present))
+            return result
+        
+        pages, values = np.asarray(self.pages), np.asarray(values)
+        order = np.lexsort((values, pages))  # by page, then value; nan last within a page
+        pages, values = pages[order], values[order]
+        unique, starts, sizes = np.unique(pages, return_index=True, return_counts=True)
+        present = ~np.isnan(values)
+        counts = np.add.reduceat(present, starts)
+        means = np.add.reduceat(np.where(present, values, 0.0), starts) / np.maximum(counts, 1)
+        last = np.maximum(counts - 1, 0)
+        quantiles = {}
+        for q in ANALYTICS_QUANTILES:
+            position = q * last
+            low = np.floor(position).astype(np.int64)
+            high = np.minimum(low + 1, last)
+            below, above = values[starts + low], values[starts + high]
+            quantiles[f'p{round(q * 100)}'] = (below + (above - below) * (position - low)).tolist()
+        
+        mins, maxes = values[starts].tolist(), values[starts + last].tolist()
+        means, counts, sizes = means.tolist(), counts.tolist(), sizes.tolist()
+        result = {}
+        for i, page in enumerate(unique.tolist()):
+            if not counts[i]:
+                result[page] = {'count': 0, 'missing': sizes[i]}
+                continue
+            result[page] = {
+                'count': counts[i],
+                'missing': sizes[i] - counts[i],
+                'min': mins[i],
+                'max': maxes[i],
+                'mean': means[i],
+                'quantiles': {name: column[i] for name, column in quantiles.items()},
+            }
+        return result
+
+    def _label(self, index, **values):
+        asin, title, price = self.labels[index]
+        return {'asin': asin, 'title': title, 'price': price, **values}
+
+    def _price_outliers(self, price_summary):
+        """Products priced outside the 1.5 x IQR fences, most extreme first"""
+        if price_summary.get('count', 0) < 4:
+            return []
+        q1, q3 = price_summary['quantiles']['p25'], price_summary['quantiles']['p75']
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        median = price_summary['quantiles']['p50']
+        if np is not None:
+            prices = np.asarray(self.prices)
+            indexes = np.flatnonzero((prices < low) | (prices > high))
+            order = indexes[np.argsort(-np.abs(prices[indexes] - median), kind='stable')].tolist()
+        else:
+            prices = self.prices
+            indexes = [i for i, price in enumerate(prices) if price < low or price > high]
+            order = sorted(indexes, key=lambda i: -abs(prices[i] - median))
+        return [self._label(i, price_value=self.prices[i]) for i in order[:self.top]]
+
+    def _best_value(self):
+        """Lowest price per rating star first (products with both a price and a rating)"""
+        if np is not None:
+            prices, ratings = np.asarray(self.prices), np.asarray(self.ratings)
+            valid = np.flatnonzero(~np.isnan(prices) & (ratings > 0))
+            per_star = prices[valid] / ratings[valid]
+            order = valid[np.argsort(per_star, kind='stable')[:self.top]].tolist()
+        else:
+            valid = [i for i, (price, rating) in enumerate(zip(self.prices, self.ratings))
+                     if not math.isnan(price) and rating > 0]
+            order = sorted(valid, key=lambda i: self.prices[i] / self.ratings[i])[:self.top]
+        return [self._label(i, price_value=self.prices[i], rating=self.ratings[i],
+                            price_per_rating=self.prices[i] / self.ratings[i]) for i in order]
+
+    def summary(self, by_page=True):
+        """Aggregate view: overall distributions, outliers, best value and (optionally) per page"""
+        with self._lock:
+            price = self._describe(self.prices)
+            result = {
+                'products': len(self.prices),
+                'engine': 'numpy' if np is not None else 'python',
+                'currency': next(iter(self.currencies)) if len(self.currencies) == 1 else sorted(self.currencies),
+                'price': price,
+                'rating': self._describe(self.ratings),
+                'review_count': self._describe(self.review_counts),
+                'price_outliers': self._price_outliers(price),
+                'best_value': self._best_value(),
+            }
+            if by_page:
+                columns = {name: self._describe_pages(values) for name, values in
+                           (('price', self.prices), ('rating', self.ratings), ('review_count', self.review_counts))}
+                sizes = Counter(self.pages)
+                result['pages'] = {page: {'products': sizes[page], **{name: column[page] for name, column in columns.items()}}
+                                   for page in sorted(sizes)}
+        return result
+
+
+def analyze_products(products, bins=10, top=10, by_page=True):
+    """ProductAnalytics(products).summary() in one call"""
+    return ProductAnalytics(products, bins=bins, top=top).summary(by_page=by_page)
+
+
+def format_analytics(summary):
+    """Text report of ProductAnalytics.summary()"""
+    def number(value, digits=2):
+        return f'{value:,.{digits}f}'
+    
+    currency = summary['currency'] if isinstance(summary['currency'], str) else ', '.join(summary['currency']) or '-'
+    lines = [f"📈 Thống kê {summary['products']} sản phẩm (tiền tệ: {currency})"]
+    for name, label, digits in (('price', '💰 Giá', 2), ('rating', '⭐ Rating', 2), ('review_count', '📝 Reviews', 0)):
+        stats = summary[name]
+        if not stats['count']:
+            lines.append(f"{label}: không có dữ liệu")
+            continue
+        quantiles = stats['quantiles']
+        lines.append(f"{label}: min {number(stats['min'], digits)} | p25 {number(quantiles['p25'], digits)} | "
+                     f"trung vị {number(quantiles['p50'], digits)} | p75 {number(quantiles['p75'], digits)} | "
+                     f"max {number(stats['max'], digits)} | TB {number(stats['mean'], digits)} "
+                     f"({stats['count']} có dữ liệu, {stats['missing']} thiếu)")
+    
+    price = summary['price']
+    if price['count']:
+        lines.append("📊 Phân bố giá:")
+        peak = max(price['histogram']['counts']) or 1
+        edges = price['histogram']['edges']
+        for i, count in enumerate(price['histogram']['counts']):
+            bar = '█' * round(count / peak * 30)
+            lines.append(f"   {number(edges[i]):>12} - {number(edges[i + 1]):>12}  {count:>6}  {bar}")
+    
+    if summary['price_outliers']:
+        lines.append("⚠️ Giá bất thường (ngoài 1.5 x IQR):")
+        for product in summary['price_outliers']:
+            lines.append(f"   {product['price']:>12}  {product['asin']}  {(product['title'] or '')[:60]}")
+    
+    if summary['best_value']:
+        lines.append("🏆 Giá tốt nhất theo rating (giá / sao):")
+        for product in summary['best_value']:
+            lines.append(f"   {number(product['price_per_rating']):>10}/⭐  {product['price']:>10}  "
+                         f"⭐ {product['rating']:g}  {product['asin']}  {(product['title'] or '')[:50]}")
+    
+    if len(summary.get('pages', {})) > 1:
+        lines.append("📄 Theo trang (giá trung vị | rating trung vị):")
+        for page, stats in itertools.islice(summary['pages'].items(), 20):
+            price_median = number(stats['price']['quantiles']['p50']) if stats['price']['count'] else '-'
+            rating_median = number(stats['rating']['quantiles']['p50']) if stats['rating']['count'] else '-'
+            lines.append(f"   Trang {page}: {stats['products']} sản phẩm | {price_median} | {rating_median}")
+        if len(summary['pages']) > 20:
+            lines.append(f"   ... và {len(summary['pages']) - 20} trang khác")
+    return '\n'.join(lines)
+
+# ===================================================================
+# ASYNCIO SCRAPING ENGINE
+# ===================================================================
+
+class AsyncAmazonScraper:
+    """asyncio engine producing the same results as AmazonScraper / AmazonSearchScraper
+    
+    Fetches run on one event loop through aiohttp (up to `max_concurrency` in
+    flight), while HTML parsing and extraction run in `executor` (the loop's
+    default thread pool when None), or in worker processes with a ParsePool.
+    Use as `async with AsyncAmazonScraper() as s`. Set validate_urls=False to point it at a local stand-in server.
+    """
+    
+    def __init__(self, max_concurrency=100, rate_limiter=None, executor=None, validate_urls=True, parser=None,
+                 lean_parse=False, cache=None, retry_policy=None, circuit_breaker=None, metrics=None,
+                 selector_stats=None, parse_pool=None, fields=None, compact=False):
+        if aiohttp is None:
+            raise ImportError('AsyncAmazonScraper requires aiohttp: pip install aiohttp')
+        
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter or DomainRateLimiter()
+        self.executor = executor
+        self.validate_urls = validate_urls
+        
+        # Reuse the sync scrapers for headers, validation and parsing
+        self.cache = cache
+        self.search_scraper = AmazonSearchScraper(rate_limiter=self.rate_limiter, parser=parser,
+                                                  lean_parse=lean_parse, cache=cache,
+                                                  retry_policy=retry_policy, circuit_breaker=circuit_breaker,
+                                                  metrics=metrics, selector_stats=selector_stats,
+                                                  parse_pool=parse_pool, fields=fields, compact=compact)
+        self.product_scraper = self.search_scraper.base_scraper
+        self.metrics = self.search_scraper.metrics
+        self.retry_policy = self.search_scraper.retry_policy
+        self.circuit_breaker = self.search_scraper.circuit_breaker
+        
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self):
+        """Close the underlying HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch(self, url, headers):
+        """Fetch a URL once the rate limiter allows it. Returns (status, body bytes, charset)"""
+        if self.cache is not None:
+            cached = await self._run_blocking(self.cache.get, url)
+            if cached is not None:
+                return 200, cached[0], cached[1]
+        
+        session = self._get_session()
+        connect_timeout, read_timeout = self.retry_policy.timeout
+        timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        marketplace = get_marketplace(url)
+        attempt = 0
+        while True:
+            # Same retry policy and circuit breaker as the sync engine
+            self.circuit_breaker.before_request(url)
+            try:
+                # Wait for the rate limiter before taking a slot, so a task held back by one
+                # marketplace's budget does not block requests to the others
+                wait = self.rate_limiter.reserve(url)
+                self.metrics.observe('amazon_scraper_sleep_seconds', wait, reason='rate_limit')
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                async with self._semaphore:
+                    start = time.perf_counter()
+                    async with session.get(url, headers=headers, timeout=timeout) as response:
+                        ttfb = time.perf_counter() - start
+                        content = await response.read()
+                        status = response.status
+                        retry_after = response.headers.get('Retry-After')
+                        encoding = get_declared_encoding(response.headers.get('Content-Type'))
+                    self.product_scraper.record_request_metrics(marketplace, status, time.perf_counter() - start,
+                                                                ttfb, len(content))
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError):
+                self.metrics.inc('amazon_scraper_requests_total', marketplace=marketplace, status='error')
+                self.circuit_breaker.record_failure(url)
+                if not self.retry_policy.should_retry(attempt):
+                    raise
+                delay = self.retry_policy.get_delay(attempt)
+                self.metrics.observe('amazon_scraper_sleep_seconds', delay, reason='retry_backoff')
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except Exception:
+                self.circuit_breaker.record_failure(url)
+                raise
+            
+            throttled = is_throttled_page(status, content)
+            self.rate_limiter.record_response(url, throttled)
+            if throttled or status >= 500:
+                self.circuit_breaker.record_failure(url)
+            else:
+                self.circuit_breaker.record_success(url)
+            
+            if not self.retry_policy.should_retry(attempt, status, throttled):
+                break
+            delay = self.retry_policy.get_delay(attempt, retry_after)
+            self.metrics.observe('amazon_scraper_sleep_seconds', delay, reason='retry_backoff')
+            await asyncio.sleep(delay)
+            attempt += 1
+        
+        if self.cache is not None and status == 200 and not throttled:
+            await self._run_blocking(self.cache.set, url, content, encoding)
+        return status, content, encoding
+
+    async def _run_blocking(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def scrape_product(self, url):
+        """Scrape one product page (same result dict as AmazonScraper.scrape_product)"""
+        if self.validate_urls and not self.product_scraper.validate_amazon_url(url):
+            return {
+                'error': 'Invalid Amazon product URL. Please provide a valid Amazon product link.'
+            }
+        
+        try:
+            status, content, encoding = await self.fetch(url, self.product_scraper.get_random_headers())
+            
+            if is_throttled_page(status, content):
+                return {
+                    'error': f'Throttled by Amazon (HTTP {status}, robot check or rate limit)',
+                    'throttled': True
+                }
+            # Redirects are followed, and no validators are sent, so a 3xx here (e.g. a 304
+            # from a proxy) has no page to parse
+            if status >= 300:
+                return {
+                    'error': f'Network error: HTTP {status} for url: {url}'
+                }
+            
+            return await self._run_blocking(self.product_scraper.parse_product, content, url, encoding)
+            
+        except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError) as e:
+            return {
+                'error': f'Network error: {str(e)}'
+            }
+        except Exception as e:
+            return {
+                'error': f'Scraping error: {str(e)}'
+            }
+
+    async def scrape_search_results(self, search_url, max_pages=1, progress_callback=None, product_sink=None):
+        """Scrape search results (same result dict as AmazonSearchScraper.scrape_search_results)"""
+        if self.validate_urls and not self.search_scraper.validate_search_url(search_url):
+            return {
+                'error': 'Invalid Amazon search URL. Please provide a valid Amazon search link.'
+            }
+        
+        all_products = []
+        total_products = 0
+        product_links = []
+        page_num = 0
+        
+        try:
+            for page_num in range(1, max_pages + 1):
+                if progress_callback:
+                    progress_callback(f"Đang scrape trang {page_num}/{max_pages}...")
+                
+                page_url = self.search_scraper.build_page_url(search_url, page_num)
+                status, content, encoding = await self.fetch(page_url, self.search_scraper.get_random_headers())
+                if is_throttled_page(status, content):
+                    raise ThrottledError(f'Throttled by Amazon (HTTP {status}, robot check or rate limit) '
+                                         f'for url: {page_url}')
+                if status >= 300:
+                    return {
+                        'error': f'Network error: HTTP {status} for url: {page_url}'
+                    }
+                
+                product_links = await self._run_blocking(self.search_scraper.parse_search_page, content, page_url, encoding)
+                
+                if not product_links:
+                    if progress_callback:
+                        progress_callback(f"Không tìm thấy sản phẩm ở trang {page_num}")
+                    break
+                
+                if progress_callback:
+                    progress_callback(f"Tìm thấy {len(product_links)} sản phẩm ở trang {page_num}")
+                
+                # All products of the page are in flight at once
+                done = 0
+                
+                async def scrape_one(product_url):
+                    nonlocal done
+                    product_data = await self.scrape_product(product_url)
+                    done += 1
+                    if progress_callback:
+                        progress_callback(f"Trang {page_num}: Đã scrape {done}/{len(product_links)} sản phẩm")
+                    return product_data
+                
+                results = await asyncio.gather(*(scrape_one(url) for url in product_links))
+                
+                page_products = []
+                for i, product_data in enumerate(results, 1):
+                    if 'error' not in product_data:
+                        product_data['page_number'] = page_num
+                        product_data['position_on_page'] = i
+                        page_products.append(product_data)
+                
+                total_products += len(page_products)
+                if product_sink:
+                    for product in page_products:
+                        product_sink(product)
+                else:
+                    all_products.extend(self.search_scraper.retain_products(page_products))
+                
+                if progress_callback:
+                    progress_callback(f"Hoàn thành trang {page_num}: {len(page_products)} sản phẩm")
+            
+            return self.search_scraper.build_search_result(search_url, max_pages, all_products, page_num,
+                                                           product_links, total_products)
+            
+        except ThrottledError as e:
+            return {
+                'error': str(e),
+                'throttled': True
+            }
+        except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError) as e:
+            return {
+                'error': f'Network error: {str(e)}'
+            }
+        except Exception as e:
+            return {
+                'error': f'Scraping error: {str(e)}'
+            }
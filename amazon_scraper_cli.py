@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Amazon Product Scraper - Headless CLI
+Chạy batch scraping trên server, không cần GUI (không import tkinter)
+
+Input: file hoặc stdin, mỗi dòng một product URL, ASIN hoặc search URL
+Output: NDJSON, mỗi sản phẩm một dòng (search results được ghi ngay khi xong từng trang,
+        dòng summary của mỗi search được ghi sau cùng), thống kê throughput ở stderr
+
+Với --journal, tiến độ của các search crawl được lưu lại; sau khi bị lỗi/dừng giữa chừng,
+chạy lại cùng lệnh với --resume để tiếp tục (output được ghi lại đầy đủ, kể cả các sản phẩm đã xong)
+
+Với --incremental, product URL/ASIN đã scrape ở lần trước chỉ được ghi khi có thay đổi (chỉ các trường thay đổi)
+
+Ví dụ:
+    python amazon_scraper_cli.py urls.txt -o results.ndjson --concurrency 4 --rate 1
+    cat asins.txt | python amazon_scraper_cli.py --marketplace amazon.de
+"""
+
+import argparse
+import functools
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from amazon_scraper import (
+    AMAZON_DOMAINS,
+    ASIN_RE,
+    PARSER_BACKENDS,
+    PRODUCT_FIELD_NAMES,
+    AdaptiveRateLimiter,
+    AmazonSearchScraper,
+    CircuitBreaker,
+    ConnectionPool,
+    CrawlJournal,
+    DomainRateLimiter,
+    NdjsonWriter,
+    ParsePool,
+    ProductAnalytics,
+    ProductStore,
+    ResponseCache,
+    ScrapeState,
+    SelectorStats,
+    RetryPolicy,
+    format_analytics,
+)
+
+
+def parse_input_line(line, marketplace='amazon.com'):
+    """Turn one input line into ('product' | 'search', url), or None for blank/comment lines"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    if ASIN_RE.fullmatch(line):
+        return 'product', f"https://www.{marketplace}/dp/{line}"
+    if '/dp/' in line or '/gp/product/' in line:
+        return 'product', line
+    return 'search', line
+
+
+def read_items(stream, marketplace='amazon.com'):
+    """Read all (kind, url) items from a file object"""
+    items = []
+    for line in stream:
+        item = parse_input_line(line, marketplace)
+        if item:
+            items.append(item)
+    return items
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description='Amazon Scraper - chế độ headless (batch) cho product URL, ASIN và search URL'
+    )
+    parser.add_argument('input', nargs='?', default='-',
+                        help='file chứa URL/ASIN, mỗi dòng một mục (mặc định: stdin)')
+    parser.add_argument('-o', '--output', default='-',
+                        help='file NDJSON để ghi kết quả (mặc định: stdout)')
+    parser.add_argument('--append', action='store_true', help='ghi nối vào file output thay vì ghi đè')
+    parser.add_argument('--marketplace', default='amazon.com', choices=AMAZON_DOMAINS,
+                        help='marketplace cho các dòng chỉ có ASIN (mặc định: amazon.com)')
+    parser.add_argument('--max-pages', type=int, default=1, help='số trang cho mỗi search URL (mặc định: 1)')
+    parser.add_argument('-c', '--concurrency', type=int, default=1,
+                        help='số sản phẩm scrape song song (mặc định: 1)')
+    parser.add_argument('--shallow', action='store_true',
+                        help='chỉ lấy dữ liệu từ các thẻ sản phẩm trên trang search (1 request mỗi trang)')
+    parser.add_argument('--deep-asins', metavar='ASIN,...', default='',
+                        help='với --shallow: các ASIN (cách nhau bởi dấu phẩy) vẫn được scrape trang chi tiết')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='lấy các trang search tiếp theo trong khi vẫn đang scrape chi tiết sản phẩm')
+    parser.add_argument('--queue-size', type=int, default=None,
+                        help='số link tối đa chờ trong pipeline (mặc định: max(16, 2 x concurrency))')
+    parser.add_argument('--rate', type=float, default=0.5,
+                        help='số requests/giây tối đa cho mỗi marketplace (mặc định: 0.5)')
+    parser.add_argument('--burst', type=int, default=1, help='burst của rate limiter (mặc định: 1)')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='số lần thử lại khi lỗi mạng, 5xx, 429 hoặc bị throttle (mặc định: 3)')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='timeout đọc response, giây (mặc định: 30)')
+    parser.add_argument('--breaker-threshold', type=int, default=5,
+                        help='số lỗi liên tiếp trước khi tạm ngừng gửi request tới marketplace (mặc định: 5)')
+    parser.add_argument('--breaker-cooldown', type=float, default=60,
+                        help='thời gian tạm ngừng trước khi thử lại marketplace, giây (mặc định: 60)')
+    parser.add_argument('--pool-size', type=int, default=None,
+                        help='số kết nối keep-alive tối đa cho mỗi host (mặc định: max(10, concurrency + 1))')
+    parser.add_argument('--no-keep-alive', action='store_true',
+                        help='đóng kết nối sau mỗi request (để so sánh với keep-alive)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='tự điều chỉnh rate theo phản hồi 503/captcha (AIMD)')
+    parser.add_argument('--parser', choices=PARSER_BACKENDS, default=None,
+                        help='HTML parser (mặc định: lxml nếu đã cài)')
+    parser.add_argument('--lean', action='store_true', help='lean parse: chỉ parse các vùng cần thiết')
+    parser.add_argument('--fields', metavar='FIELD,...',
+                        help='chỉ trích xuất các trường này của product page, ví dụ "price,availability" '
+                             f'(mặc định: tất cả: {", ".join(PRODUCT_FIELD_NAMES)})')
+    parser.add_argument('--parse-processes', type=int, default=0, metavar='N',
+                        help='parse product pages trong N process riêng (vượt qua GIL khi concurrency cao; '
+                             '0 = parse trong thread fetch, mặc định)')
+    parser.add_argument('--cache', metavar='PATH', help='dùng cache response trên đĩa (file SQLite)')
+    parser.add_argument('--cache-ttl', type=int, default=3600, help='TTL của cache, giây (mặc định: 3600)')
+    parser.add_argument('--journal', metavar='PATH',
+                        help='ghi journal của các search crawl (file SQLite) để có thể chạy tiếp khi bị lỗi')
+    parser.add_argument('--resume', action='store_true',
+                        help='chạy tiếp các search crawl trong --journal, bỏ qua trang/sản phẩm đã xong')
+    parser.add_argument('--incremental', metavar='PATH',
+                        help='với product URL/ASIN: chỉ ghi thay đổi so với lần chạy trước (state SQLite: '
+                             'ETag/Last-Modified, hash nội dung trang, sản phẩm lần trước); trang không đổi '
+                             'không bị parse lại và không được ghi ra output')
+    parser.add_argument('--db', metavar='PATH',
+                        help='ghi thêm sản phẩm vào database SQLite (cộng dồn qua các lần chạy, có index theo ASIN, '
+                             'marketplace, thời gian và giá)')
+    parser.add_argument('--analytics', metavar='PATH', nargs='?', const='',
+                        help='in thống kê giá/rating/reviews (phân vị, histogram, giá bất thường, giá tốt nhất '
+                             'theo rating) cho mỗi search URL ra stderr; ghi thêm JSON nếu có PATH')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='ghi metrics thời gian (network, sleep, parse, extract) khi kết thúc: '
+                             'Prometheus text nếu PATH kết thúc bằng .prom/.txt, JSON nếu không')
+    parser.add_argument('--selector-stats', metavar='PATH',
+                        help='thống kê selector nào khớp cho từng field/marketplace, đọc và lưu lại vào file JSON')
+    parser.add_argument('--adaptive-selectors', action='store_true',
+                        help='thử selector theo tỉ lệ khớp đã ghi nhận (cần đủ số trang, xem --selector-stats)')
+    parser.add_argument('--selector-report', action='store_true',
+                        help='in báo cáo tỉ lệ khớp của selector (đánh dấu selector không bao giờ khớp) ra stderr')
+    parser.add_argument('-q', '--quiet', action='store_true', help='không in tiến độ ra stderr')
+    return parser
+
+
+def main(argv=None):
+    """Headless entry point"""
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args(argv)
+    if args.resume and not args.journal:
+        arg_parser.error('--resume cần có --journal')
+    if args.lean and args.parser == 'html5lib':
+        arg_parser.error('--lean không dùng được với --parser html5lib')
+    # A shallow crawl fetches each search page once and has no product queue
+    if args.shallow and (args.pipeline or args.queue_size is not None):
+        arg_parser.error('--pipeline/--queue-size không dùng được với --shallow')
+    fields = None
+    if args.fields:
+        fields = [name.strip() for name in args.fields.split(',') if name.strip()]
+        unknown = sorted(set(fields) - set(PRODUCT_FIELD_NAMES))
+        if unknown:
+            arg_parser.error(f"--fields: không có trường {', '.join(unknown)}")
+
+    def log(message):
+        if not args.quiet:
+            print(message, file=sys.stderr, flush=True)
+
+    if args.input == '-':
+        items = read_items(sys.stdin, args.marketplace)
+    else:
+        with open(args.input, encoding='utf-8') as f:
+            items = read_items(f, args.marketplace)
+
+    if not items:
+        log("❌ Không có URL/ASIN nào trong input")
+        return 2
+
+    if args.adaptive:
+        rate_limiter = AdaptiveRateLimiter(rate=args.rate, burst=args.burst)
+    else:
+        rate_limiter = DomainRateLimiter(rate=args.rate, burst=args.burst)
+    cache = ResponseCache(args.cache, ttl=args.cache_ttl) if args.cache else None
+    journal = CrawlJournal(args.journal) if args.journal else None
+    state = ScrapeState(args.incremental) if args.incremental else None
+    connection_pool = ConnectionPool(pool_maxsize=args.pool_size or max(10, args.concurrency + 1),
+                                     keep_alive=not args.no_keep_alive)
+
+    retry_policy = RetryPolicy(max_retries=args.retries, timeout=(10, args.timeout))
+    circuit_breaker = CircuitBreaker(failure_threshold=args.breaker_threshold, cooldown=args.breaker_cooldown)
+    selector_stats = None
+    if args.selector_stats or args.adaptive_selectors or args.selector_report:
+        selector_stats = SelectorStats(adaptive=args.adaptive_selectors)
+        if args.selector_stats:
+            selector_stats.load(args.selector_stats)
+
+    parse_pool = ParsePool(args.parse_processes, parser=args.parser, lean_parse=args.lean) if args.parse_processes else None
+
+    search_scraper = AmazonSearchScraper(max_workers=args.concurrency, rate_limiter=rate_limiter,
+                                         parser=args.parser, lean_parse=args.lean, cache=cache,
+                                         pipelined=args.pipeline, queue_size=args.queue_size,
+                                         connection_pool=connection_pool, retry_policy=retry_policy,
+                                         circuit_breaker=circuit_breaker, selector_stats=selector_stats,
+                                         parse_pool=parse_pool, fields=fields, state=state)
+    product_scraper = search_scraper.base_scraper
+
+    writer = NdjsonWriter(sys.stdout if args.output == '-' else args.output, append=args.append)
+    store = ProductStore(args.db) if args.db else None
+    counts = {'products': 0, 'errors': 0}
+    changes = {'new': 0, 'changed': 0, 'unchanged': 0, 'skipped': 0}
+    analytics = ProductAnalytics() if args.analytics is not None else None
+    search_analytics = {}
+    current_analytics = None
+
+    def write_product(product):
+        writer.write_product(product)
+        record_product(product)
+
+    def record_product(product):
+        # Database and analytics get full products, also in incremental mode
+        if store is not None:
+            store.write_product(product)
+        if analytics is not None:
+            analytics.add(product)
+            if current_analytics is not None:
+                current_analytics.add(product)
+
+    deep_asins = {asin.strip() for asin in args.deep_asins.split(',') if asin.strip()}
+    product_urls = [url for kind, url in items if kind == 'product']
+    search_urls = [url for kind, url in items if kind == 'search']
+    log(f"🚀 {len(product_urls)} product URL/ASIN, {len(search_urls)} search URL "
+        f"(concurrency {args.concurrency}, rate {args.rate}/s)")
+
+    start = time.monotonic()
+    try:
+        # Product URLs: one shared scraper, results written in input order
+        if state is not None:
+            scrape = functools.partial(product_scraper.scrape_product_changes, product_sink=record_product)
+        else:
+            scrape = product_scraper.scrape_product
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+            for url, result in zip(product_urls, executor.map(scrape, product_urls)):
+                if 'error' in result:
+                    counts['errors'] += 1
+                    result.setdefault('url', url)
+                    log(f"❌ {url}: {result['error']}")
+                    writer.write_product(result)
+                    continue
+                counts['products'] += 1
+                if state is None:
+                    write_product(result)
+                    continue
+                changes[result['change']] += 1
+                changes['skipped'] += 'skipped' in result
+                if result['change'] != 'unchanged':
+                    writer.write_product(result)
+
+        # Search URLs: products are streamed page by page, the summary line comes last
+        for url in search_urls:
+            streamed_before = writer.records_written
+            if analytics is not None:
+                current_analytics = search_analytics[url] = ProductAnalytics()
+            result = search_scraper.scrape_search_results(url, args.max_pages, progress_callback=log,
+                                                          product_sink=write_product,
+                                                          journal=journal, resume=args.resume,
+                                                          shallow=args.shallow, deep_asins=deep_asins)
+            counts['products'] += writer.records_written - streamed_before
+            if 'error' in result:
+                counts['errors'] += 1
+                result.setdefault('search_url', url)
+                log(f"❌ {url}: {result['error']}")
+                if result.get('resumable'):
+                    log("   ↪ có thể chạy tiếp với --resume")
+            writer.write_summary(result)
+            if current_analytics is not None:
+                # Printed even with --quiet: it was asked for explicitly
+                print(f"🔎 {url}\n{format_analytics(current_analytics.summary())}", file=sys.stderr, flush=True)
+                current_analytics = None
+    except KeyboardInterrupt:
+        log("⚠️ Đã dừng (Ctrl+C) - kết quả đã ghi vẫn được giữ lại")
+    finally:
+        writer.close()
+        if store is not None:
+            store.close()
+        if state is not None:
+            state.close()
+        if cache is not None:
+            cache.close()
+        if journal is not None:
+            journal.close()
+        connection_pool.close()
+        if parse_pool is not None:
+            parse_pool.close()
+        if args.metrics:
+            search_scraper.metrics.export(args.metrics)
+        if args.selector_stats:
+            selector_stats.save(args.selector_stats)
+
+    elapsed = time.monotonic() - start
+    throughput = counts['products'] / elapsed if elapsed > 0 else 0.0
+    log(f"✅ {counts['products']} sản phẩm, {counts['errors']} lỗi trong {elapsed:.1f}s "
+        f"- throughput: {throughput:.2f} items/sec")
+    pool_stats = connection_pool.stats()
+    log(f"🔌 {pool_stats['requests']} requests: {pool_stats['reused_connections']} kết nối dùng lại, "
+        f"{pool_stats['new_connections']} kết nối mới, {pool_stats['pool_waits']} lần chờ pool "
+        f"({pool_stats['pool_wait_seconds']:.2f}s)")
+    if args.adaptive:
+        rates = ', '.join(f'{domain} {rate:.2f}/s' for domain, rate in sorted(rate_limiter.get_rates().items()))
+        log(f"🎚️ Adaptive rate: {rates or '-'} ({rate_limiter.backoff_count} lần giảm tốc)")
+    if state is not None:
+        log(f"🔁 Incremental: {changes['new']} mới, {changes['changed']} thay đổi, {changes['unchanged']} không đổi "
+            f"({changes['skipped']} trang không cần parse lại)")
+    if args.selector_report:
+        # Printed even with --quiet: it was asked for explicitly
+        print(selector_stats.format_report(), file=sys.stderr, flush=True)
+    if analytics is not None:
+        summary = analytics.summary()
+        if len(search_analytics) != 1 or product_urls:
+            print(f"📦 Tất cả sản phẩm\n{format_analytics(summary)}", file=sys.stderr, flush=True)
+        if args.analytics:
+            with open(args.analytics, 'w', encoding='utf-8') as f:
+                json.dump({'all': summary,
+                           'searches': {url: search.summary() for url, search in search_analytics.items()}},
+                          f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
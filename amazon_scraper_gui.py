@@ -3,636 +3,23 @@
 """
 Amazon Product Scraper - GUI Edition
 Giao diện đồ họa cho scraping Amazon products
-Gộp tất cả tính năng vào 1 file - CHỈ SỬ DỤNG GUI
+Scraping engine nằm trong amazon_scraper.py, chế độ headless: amazon_scraper_cli.py
 
 Requires: requests, beautifulsoup4, lxml, tkinter
+Optional: aiohttp (asyncio engine)
 """
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
-import requests
-from bs4 import BeautifulSoup
 import json
-import re
-import time
-import random
-from urllib.parse import urlparse, urlencode, parse_qs
 import threading
 import os
 from datetime import datetime
 import webbrowser
 import sys
 
-# ===================================================================
-# CORE AMAZON SCRAPER CLASS
-# ===================================================================
-
-class AmazonScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        
-        # Rotate user agents to avoid detection
-        self.user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        ]
-        
-        # Headers to mimic real browser
-        self.headers = {
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
-
-    def get_random_headers(self):
-        """Get random headers to avoid detection"""
-        headers = self.headers.copy()
-        headers['User-Agent'] = random.choice(self.user_agents)
-        return headers
-
-    def validate_amazon_url(self, url):
-        """Validate if the URL is an Amazon product URL"""
-        parsed_url = urlparse(url)
-        amazon_domains = ['amazon.com', 'amazon.co.uk', 'amazon.de', 'amazon.fr', 'amazon.it', 'amazon.es', 'amazon.jp']
-        
-        if not any(domain in parsed_url.netloc for domain in amazon_domains):
-            return False
-        
-        # Check if it's a product URL (contains /dp/ or /gp/product/)
-        if '/dp/' in url or '/gp/product/' in url:
-            return True
-        
-        return False
-
-    def extract_product_info(self, soup):
-        """Extract product information from BeautifulSoup object"""
-        product_info = {}
-        
-        try:
-            # Product title
-            title_selectors = [
-                '#productTitle',
-                '.product-title',
-                'h1.a-size-large',
-                'h1#title'
-            ]
-            
-            for selector in title_selectors:
-                title_element = soup.select_one(selector)
-                if title_element:
-                    product_info['title'] = title_element.get_text().strip()
-                    break
-            
-            # ASIN (Amazon Standard Identification Number)
-            asin_patterns = [
-                r'/dp/([A-Z0-9]{10})',
-                r'/gp/product/([A-Z0-9]{10})',
-                r'data-asin="([A-Z0-9]{10})"'
-            ]
-            page_content = str(soup)
-            for pattern in asin_patterns:
-                asin_match = re.search(pattern, page_content)
-                if asin_match:
-                    product_info['asin'] = asin_match.group(1)
-                    break
-            
-            # Brand
-            brand_selectors = [
-                '#bylineInfo',
-                '.a-row .a-link-normal[href*="/stores/"]',
-                'tr:contains("Brand") td.a-span9',
-                '.po-brand .po-break-word',
-                '#brand'
-            ]
-            
-            for selector in brand_selectors:
-                brand_element = soup.select_one(selector)
-                if brand_element:
-                    brand_text = brand_element.get_text().strip()
-                    if brand_text and not brand_text.lower().startswith('visit'):
-                        product_info['brand'] = brand_text.replace('Brand: ', '').replace('Visit the ', '').replace(' Store', '')
-                        break
-            
-            # Product price
-            price_selectors = [
-                '.a-price-whole',
-                '.a-price .a-offscreen',
-                '#price_inside_buybox',
-                '.a-price-range',
-                '#ap_desktop_sns_detail_page .a-price .a-offscreen'
-            ]
-            
-            for selector in price_selectors:
-                price_element = soup.select_one(selector)
-                if price_element:
-                    price_text = price_element.get_text().strip()
-                    # Clean price text
-                    price_text = re.sub(r'[^\d.,]', '', price_text)
-                    product_info['price'] = price_text
-                    break
-            
-            # Product rating
-            rating_selectors = [
-                '.a-icon-alt',
-                '[data-hook="average-star-rating"] .a-icon-alt',
-                '.a-star-medium .a-icon-alt'
-            ]
-            
-            for selector in rating_selectors:
-                rating_element = soup.select_one(selector)
-                if rating_element:
-                    rating_text = rating_element.get('alt', '') or rating_element.get_text()
-                    rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                    if rating_match:
-                        product_info['rating'] = rating_match.group(1)
-                        break
-            
-            # Number of reviews
-            review_selectors = [
-                '#acrCustomerReviewText',
-                '[data-hook="total-review-count"]',
-                '.a-link-normal .a-size-base'
-            ]
-            
-            for selector in review_selectors:
-                review_element = soup.select_one(selector)
-                if review_element:
-                    review_text = review_element.get_text().strip()
-                    review_match = re.search(r'([\d,]+)', review_text)
-                    if review_match:
-                        product_info['review_count'] = review_match.group(1)
-                        break
-            
-            # Product images
-            img_selectors = [
-                '#landingImage',
-                '.a-dynamic-image',
-                '#imgTagWrapperId img'
-            ]
-            
-            images = []
-            for selector in img_selectors:
-                img_elements = soup.select(selector)
-                for img in img_elements:
-                    src = img.get('src') or img.get('data-src')
-                    if src and src.startswith('http'):
-                        images.append(src)
-            
-            if images:
-                product_info['images'] = list(set(images))  # Remove duplicates
-            
-            # Product description/features
-            feature_selectors = [
-                '#feature-bullets ul li',
-                '.a-unordered-list .a-list-item',
-                '#productDescription p'
-            ]
-            
-            features = []
-            for selector in feature_selectors:
-                feature_elements = soup.select(selector)
-                for feature in feature_elements:
-                    text = feature.get_text().strip()
-                    if text and len(text) > 10:  # Filter out short/empty text
-                        features.append(text)
-                if features:  # If we found features, break
-                    break
-            
-            if features:
-                product_info['features'] = features[:5]  # Limit to first 5 features
-            
-            # Availability
-            availability_selectors = [
-                '#availability span',
-                '.a-size-medium.a-color-success',
-                '.a-size-medium.a-color-price'
-            ]
-            
-            for selector in availability_selectors:
-                avail_element = soup.select_one(selector)
-                if avail_element:
-                    product_info['availability'] = avail_element.get_text().strip()
-                    break
-            
-            # Technical Specifications / Product Details
-            product_info['specifications'] = {}
-            
-            # Method 1: Technical Details table
-            tech_table = soup.select_one('#productDetails_techSpec_section_1')
-            if tech_table:
-                rows = tech_table.select('tr')
-                for row in rows:
-                    cols = row.select('td')
-                    if len(cols) >= 2:
-                        key = cols[0].get_text().strip()
-                        value = cols[1].get_text().strip()
-                        if key and value:
-                            product_info['specifications'][key] = value
-            
-            # Method 2: Feature bullets for specifications
-            detail_bullets = soup.select('#feature-bullets ul li, .a-unordered-list.a-nostyle li')
-            for bullet in detail_bullets:
-                text = bullet.get_text().strip()
-                if ':' in text and len(text) < 200:  # Likely a specification
-                    parts = text.split(':', 1)
-                    if len(parts) == 2:
-                        key = parts[0].strip()
-                        value = parts[1].strip()
-                        if key and value and not key.lower().startswith('make sure'):
-                            product_info['specifications'][key] = value
-            
-            # Method 3: Product Overview section
-            overview_section = soup.select_one('#poExpander')
-            if overview_section:
-                overview_rows = overview_section.select('.po-display-name')
-                overview_values = overview_section.select('.po-break-word')
-                for i, row in enumerate(overview_rows):
-                    if i < len(overview_values):
-                        key = row.get_text().strip()
-                        value = overview_values[i].get_text().strip()
-                        if key and value:
-                            product_info['specifications'][key] = value
-            
-            # Method 4: Additional Information table
-            additional_info = soup.select('#productDetails_detailBullets_sections1 tr')
-            for row in additional_info:
-                th = row.select_one('th')
-                td = row.select_one('td')
-                if th and td:
-                    key = th.get_text().strip()
-                    value = td.get_text().strip()
-                    if key and value:
-                        product_info['specifications'][key] = value
-            
-            # Extract specific important fields from specifications
-            specs = product_info.get('specifications', {})
-            
-            # Color
-            color_keys = ['Color', 'Colour', 'Color Name', 'Item Color']
-            for key in color_keys:
-                if key in specs:
-                    product_info['color'] = specs[key]
-                    break
-            
-            # Material
-            material_keys = ['Material', 'Materials', 'Item Material', 'Frame Material', 'Fabric Type']
-            for key in material_keys:
-                if key in specs:
-                    product_info['material'] = specs[key]
-                    break
-            
-            # Size/Dimensions
-            size_keys = ['Size', 'Dimensions', 'Item Dimensions', 'Package Dimensions', 'Product Dimensions']
-            for key in size_keys:
-                if key in specs:
-                    product_info['dimensions'] = specs[key]
-                    break
-            
-            # Weight
-            weight_keys = ['Weight', 'Item Weight', 'Package Weight', 'Shipping Weight']
-            for key in weight_keys:
-                if key in specs:
-                    product_info['weight'] = specs[key]
-                    break
-            
-            # Model Number
-            model_keys = ['Model Number', 'Model', 'Item model number', 'Part Number']
-            for key in model_keys:
-                if key in specs:
-                    product_info['model_number'] = specs[key]
-                    break
-            
-            # Department/Category
-            category_selectors = [
-                '#wayfinding-breadcrumbs_feature_div a',
-                '.a-breadcrumb a',
-                '[data-hook="breadcrumb"] a'
-            ]
-            
-            categories = []
-            for selector in category_selectors:
-                category_links = soup.select(selector)
-                for link in category_links:
-                    cat_text = link.get_text().strip()
-                    if cat_text and cat_text not in categories:
-                        categories.append(cat_text)
-            
-            if categories:
-                product_info['categories'] = categories
-                product_info['primary_category'] = categories[-1] if categories else None
-            
-            # Best Sellers Rank
-            rank_element = soup.select_one('#SalesRank, .a-icon-badge')
-            if rank_element:
-                rank_text = rank_element.get_text().strip()
-                if 'Best Sellers Rank' in rank_text or '#' in rank_text:
-                    product_info['bestsellers_rank'] = rank_text
-            
-            # Prime eligibility
-            prime_elements = soup.select('.a-icon-prime, [data-csa-c-content-id="prime-sash"]')
-            if prime_elements:
-                product_info['prime_eligible'] = True
-            else:
-                product_info['prime_eligible'] = False
-            
-            # Product description (detailed)
-            description_selectors = [
-                '#productDescription p',
-                '#aplus_feature_div',
-                '.a-section.a-spacing-medium.apm-A1sMoFEeI'
-            ]
-            
-            descriptions = []
-            for selector in description_selectors:
-                desc_elements = soup.select(selector)
-                for desc in desc_elements:
-                    desc_text = desc.get_text().strip()
-                    if desc_text and len(desc_text) > 20 and desc_text not in descriptions:
-                        descriptions.append(desc_text)
-            
-            if descriptions:
-                product_info['detailed_description'] = descriptions
-            
-            # Variations (size, color options)
-            variations = {}
-            
-            # Color variations
-            color_swatches = soup.select('.imgSwatch, .a-button-text .a-size-base')
-            if color_swatches:
-                color_options = []
-                for swatch in color_swatches:
-                    color_name = swatch.get('title') or swatch.get_text().strip()
-                    if color_name and color_name not in color_options:
-                        color_options.append(color_name)
-                if color_options:
-                    variations['colors'] = color_options
-            
-            # Size variations
-            size_select = soup.select('#native_dropdown_selected_size_name option, .a-size-base.a-color-base')
-            if size_select:
-                size_options = []
-                for size in size_select:
-                    size_name = size.get_text().strip()
-                    if size_name and size_name not in ['Select', 'Choose', ''] and size_name not in size_options:
-                        size_options.append(size_name)
-                if size_options:
-                    variations['sizes'] = size_options
-            
-            if variations:
-                product_info['variations'] = variations
-            
-            # Shipping information
-            shipping_element = soup.select_one('#deliveryBlockMessage, .a-spacing-top-base .a-color-price')
-            if shipping_element:
-                shipping_text = shipping_element.get_text().strip()
-                if 'delivery' in shipping_text.lower() or 'shipping' in shipping_text.lower():
-                    product_info['shipping_info'] = shipping_text
-            
-            # Seller information
-            seller_element = soup.select_one('#sellerProfileTriggerId, .a-size-small.mbcMerchantName')
-            if seller_element:
-                seller_text = seller_element.get_text().strip()
-                if seller_text:
-                    product_info['seller'] = seller_text
-            
-        except Exception as e:
-            print(f"Error extracting product info: {e}")
-        
-        return product_info
-
-    def scrape_product(self, url):
-        """Main method to scrape product from Amazon URL"""
-        
-        # Validate URL
-        if not self.validate_amazon_url(url):
-            return {
-                'error': 'Invalid Amazon product URL. Please provide a valid Amazon product link.'
-            }
-        
-        try:
-            # Add random delay to avoid rate limiting
-            time.sleep(random.uniform(1, 3))
-            
-            # Make request with random headers
-            response = self.session.get(url, headers=self.get_random_headers())
-            response.raise_for_status()
-            
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract product information
-            product_info = self.extract_product_info(soup)
-            
-            # Add URL and timestamp
-            product_info['url'] = url
-            product_info['scraped_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
-            
-            return product_info
-            
-        except requests.exceptions.RequestException as e:
-            return {
-                'error': f'Network error: {str(e)}'
-            }
-        except Exception as e:
-            return {
-                'error': f'Scraping error: {str(e)}'
-            }
-
-# ===================================================================
-# AMAZON SEARCH SCRAPER CLASS
-# ===================================================================
-
-class AmazonSearchScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.base_scraper = AmazonScraper()
-        
-        # User agents for rotation
-        self.user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        ]
-        
-        self.headers = {
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
-
-    def get_random_headers(self):
-        """Get random headers to avoid detection"""
-        headers = self.headers.copy()
-        headers['User-Agent'] = random.choice(self.user_agents)
-        return headers
-
-    def validate_search_url(self, url):
-        """Validate if the URL is an Amazon search URL"""
-        parsed_url = urlparse(url)
-        amazon_domains = ['amazon.com', 'amazon.co.uk', 'amazon.de', 'amazon.fr', 'amazon.it', 'amazon.es', 'amazon.jp']
-        
-        if not any(domain in parsed_url.netloc for domain in amazon_domains):
-            return False
-        
-        # Check if it's a search URL (contains /s? or has 'k=' parameter)
-        if '/s?' in url or 'k=' in url:
-            return True
-        
-        return False
-
-    def build_page_url(self, base_url, page_num):
-        """Build URL for specific page number"""
-        if page_num == 1:
-            return base_url
-        
-        # Parse the URL and add page parameter
-        parsed_url = urlparse(base_url)
-        query_params = parse_qs(parsed_url.query)
-        
-        # Add page parameter
-        query_params['page'] = [str(page_num)]
-        
-        # Reconstruct URL
-        new_query = urlencode(query_params, doseq=True)
-        new_url = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}?{new_query}"
-        
-        return new_url
-
-    def extract_product_links(self, soup):
-        """Extract product links from search results page"""
-        product_links = []
-        
-        # Various selectors for product links
-        selectors = [
-            'h2.a-size-mini a',
-            '.s-result-item h3 a',
-            '[data-component-type="s-search-result"] h3 a',
-            '.s-product-image-container a',
-            'a.a-link-normal.s-underline-text'
-        ]
-        
-        for selector in selectors:
-            links = soup.select(selector)
-            for link in links:
-                href = link.get('href')
-                if href and ('/dp/' in href or '/gp/product/' in href):
-                    # Convert relative URL to absolute
-                    if href.startswith('/'):
-                        href = 'https://www.amazon.com' + href
-                    product_links.append(href)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_links = []
-        for link in product_links:
-            # Clean URL (remove tracking parameters after dp/ASIN)
-            clean_link = re.sub(r'(/dp/[A-Z0-9]{10}).*', r'\1', link)
-            if clean_link not in seen:
-                seen.add(clean_link)
-                unique_links.append(clean_link)
-        
-        return unique_links
-
-    def scrape_search_results(self, search_url, max_pages=1, progress_callback=None):
-        """Scrape products from Amazon search results"""
-        
-        if not self.validate_search_url(search_url):
-            return {
-                'error': 'Invalid Amazon search URL. Please provide a valid Amazon search link.'
-            }
-        
-        all_products = []
-        total_scraped = 0
-        
-        try:
-            for page_num in range(1, max_pages + 1):
-                if progress_callback:
-                    progress_callback(f"Đang scrape trang {page_num}/{max_pages}...")
-                
-                # Build URL for current page
-                page_url = self.build_page_url(search_url, page_num)
-                
-                # Add delay between pages
-                if page_num > 1:
-                    time.sleep(random.uniform(2, 4))
-                
-                # Get search results page
-                response = self.session.get(page_url, headers=self.get_random_headers())
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Extract product links
-                product_links = self.extract_product_links(soup)
-                
-                if not product_links:
-                    if progress_callback:
-                        progress_callback(f"Không tìm thấy sản phẩm ở trang {page_num}")
-                    break
-                
-                if progress_callback:
-                    progress_callback(f"Tìm thấy {len(product_links)} sản phẩm ở trang {page_num}")
-                
-                # Scrape each product
-                page_products = []
-                for i, product_url in enumerate(product_links, 1):  # Scrape ALL products on page
-                    if progress_callback:
-                        progress_callback(f"Trang {page_num}: Scraping sản phẩm {i}/{len(product_links)}")
-                    
-                    try:
-                        # Use the base scraper to get product details
-                        product_data = self.base_scraper.scrape_product(product_url)
-                        
-                        if 'error' not in product_data:
-                            product_data['page_number'] = page_num
-                            product_data['position_on_page'] = i
-                            page_products.append(product_data)
-                            total_scraped += 1
-                        
-                        # Add delay between products
-                        time.sleep(random.uniform(1, 2))
-                        
-                    except Exception as e:
-                        if progress_callback:
-                            progress_callback(f"Lỗi scraping {product_url}: {str(e)}")
-                        continue
-                
-                all_products.extend(page_products)
-                
-                if progress_callback:
-                    progress_callback(f"Hoàn thành trang {page_num}: {len(page_products)} sản phẩm")
-            
-            # Prepare final result
-            result = {
-                'search_url': search_url,
-                'total_pages_scraped': max_pages,
-                'total_products': len(all_products),
-                'products': all_products,
-                'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'summary': {
-                    'pages_processed': page_num,
-                    'products_found': total_scraped,
-                    'success_rate': f"{(total_scraped/max(len(product_links)*max_pages, 1)*100):.1f}%" if product_links else "0%"
-                }
-            }
-            
-            return result
-            
-        except requests.exceptions.RequestException as e:
-            return {
-                'error': f'Network error: {str(e)}'
-            }
-        except Exception as e:
-            return {
-                'error': f'Scraping error: {str(e)}'
-            }
+from amazon_scraper import (AmazonScraper, AmazonSearchScraper, NdjsonWriter, ProductStore,
+                            analyze_products, format_analytics)
 
 # ===================================================================
 # GUI INTERFACE CLASS
@@ -641,8 +28,10 @@ class AmazonSearchScraper:
 class AmazonScraperGUI:
     def __init__(self, root):
         self.root = root
-        self.scraper = AmazonScraper()
         self.search_scraper = AmazonSearchScraper()
+        # Single products and search results share keep-alive connections and metrics
+        self.scraper = AmazonScraper(connection_pool=self.search_scraper.connection_pool,
+                                     metrics=self.search_scraper.metrics)
         self.current_result = None
         
         # Configure main window
@@ -777,9 +166,13 @@ class AmazonScraperGUI:
         self.browser_button = ttk.Button(buttons_frame, text="🌐 Mở trình duyệt", command=self.open_in_browser, state='disabled')
         self.browser_button.grid(row=0, column=2, padx=(0, 15))
         
+        # Metrics Button
+        self.metrics_button = ttk.Button(buttons_frame, text="📊 Xuất metrics", command=self.export_metrics)
+        self.metrics_button.grid(row=0, column=3, padx=(0, 15))
+        
         # About Button
         self.about_button = ttk.Button(buttons_frame, text="ℹ️ Về chương trình", command=self.show_about)
-        self.about_button.grid(row=0, column=3)
+        self.about_button.grid(row=0, column=4)
         
         # Configure main frame row weights
         main_frame.rowconfigure(4, weight=1)
@@ -1069,6 +462,12 @@ class AmazonScraperGUI:
         if 'summary' in result:
             output += f"📊 Tỷ lệ scrape thành công: {result['summary']['success_rate']}\n"
         
+        if result['products']:
+            output += "\n" + "="*70 + "\n"
+            output += "📈 THỐNG KÊ GIÁ / RATING / REVIEWS\n"
+            output += "="*70 + "\n\n"
+            output += format_analytics(analyze_products(result['products'])) + "\n"
+        
         output += "\n" + "="*70 + "\n"
         output += "📋 DANH SÁCH SẢN PHẨM\n"
         output += "="*70 + "\n\n"
@@ -1153,7 +552,7 @@ class AmazonScraperGUI:
         self.browser_button.config(state='disabled')
 
     def save_results(self):
-        """Save results to JSON file"""
+        """Save results to JSON file (or NDJSON: one product per line, summary last; or a SQLite product database)"""
         if not self.current_result:
             messagebox.showwarning("⚠️ Cảnh báo", "Không có dữ liệu để lưu!")
             return
@@ -1170,15 +569,30 @@ class AmazonScraperGUI:
         # Ask user for save location
         filename = filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            filetypes=[("JSON files", "*.json"), ("NDJSON files", "*.ndjson"),
+                       ("SQLite database", "*.sqlite3 *.db"), ("All files", "*.*")],
             initialfile=default_filename,
             title="Lưu kết quả scraping Amazon"
         )
         
         if filename:
             try:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(self.current_result, f, ensure_ascii=False, indent=2)
+                if filename.endswith(('.sqlite3', '.db')):
+                    # Products are added to the database, which keeps earlier runs
+                    with ProductStore(filename) as store:
+                        for product in self.current_result.get('products', [self.current_result]):
+                            store.write_product(product)
+                elif filename.endswith('.ndjson'):
+                    with NdjsonWriter(filename) as writer:
+                        if 'products' in self.current_result:
+                            for product in self.current_result['products']:
+                                writer.write_product(product)
+                            writer.write_summary(self.current_result)
+                        else:
+                            writer.write_product(self.current_result)
+                else:
+                    with open(filename, 'w', encoding='utf-8') as f:
+                        json.dump(self.current_result, f, ensure_ascii=False, indent=2)
                 
                 # Show success message with file info
                 file_size = os.path.getsize(filename) / 1024  # KB
@@ -1193,6 +607,23 @@ class AmazonScraperGUI:
             except Exception as e:
                 messagebox.showerror("❌ Lỗi", f"Không thể lưu file:\n{str(e)}")
 
+    def export_metrics(self):
+        """Save the timing metrics of this session (JSON snapshot or Prometheus text)"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON snapshot", "*.json"), ("Prometheus text", "*.prom"), ("All files", "*.*")],
+            initialfile=f"amazon_scraper_metrics_{timestamp}.json",
+            title="Xuất metrics"
+        )
+        
+        if filename:
+            try:
+                self.search_scraper.metrics.export(filename)
+                self.status_var.set(f"📊 Đã xuất metrics: {os.path.basename(filename)}")
+            except Exception as e:
+                messagebox.showerror("❌ Lỗi", f"Không thể lưu file:\n{str(e)}")
+
     def open_in_browser(self):
         """Open the scraped product URL in browser"""
         if not self.current_result:
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: ProductAnalytics summary with NumPy vs pure Python
+
+Builds --count products (default 300,000) from the fixture product pages
+with varied prices, ratings and review counts, loads them into
+ProductAnalytics once and times summary() with each engine (quantiles,
+histograms, price outliers, best value and the per-page breakdown). Both
+engines must give the same numbers (exit code 1 otherwise).
+
+Usage: python benchmarks/bench_analytics.py [--count N] [--json results.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import amazon_scraper
+from amazon_scraper import ProductAnalytics
+from bench_records import load_templates, make_products
+
+
+def same(a, b):
+    """Equal summaries, floats compared with a relative tolerance"""
+    if isinstance(a, dict):
+        return isinstance(b, dict) and a.keys() == b.keys() and all(same(a[key], b[key]) for key in a)
+    if isinstance(a, list):
+        return isinstance(b, list) and len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    return a == b
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ProductAnalytics: NumPy vs pure Python')
+    parser.add_argument('--count', type=int, default=300000, help='products analysed (default: 300000)')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    templates = load_templates()
+    analytics = ProductAnalytics()
+    add_seconds = 0.0
+    for i, product in enumerate(make_products(templates, args.count)):
+        product['rating'] = f'{1 + i * 37 % 41 / 10:.1f} out of 5 stars'
+        start = time.perf_counter()
+        analytics.add(product)
+        add_seconds += time.perf_counter() - start
+
+    numpy_module = amazon_scraper.np
+    results = {'count': args.count, 'add_seconds': round(add_seconds, 2)}
+    summaries = {}
+    for engine, module in (('numpy', numpy_module), ('python', None)):
+        if engine == 'numpy' and module is None:
+            continue
+        amazon_scraper.np = module
+        start = time.perf_counter()
+        summaries[engine] = analytics.summary()
+        results[f'{engine}_summary_seconds'] = round(time.perf_counter() - start, 3)
+    amazon_scraper.np = numpy_module
+
+    ok = True
+    if len(summaries) == 2:
+        summaries['numpy'].pop('engine')
+        summaries['python'].pop('engine')
+        ok = same(summaries['numpy'], summaries['python'])
+    results['same_result'] = ok
+
+    print(f"{args.count:,} products, add() {add_seconds:.2f}s ({args.count / add_seconds:,.0f} products/s)")
+    for engine in summaries:
+        print(f"  summary() {engine:<7} {results[f'{engine}_summary_seconds']:>8.3f}s")
+    if 'numpy' not in summaries:
+        print("  numpy not installed: python engine only")
+    else:
+        print(f"  same result: {'OK' if ok else 'MISMATCH'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'analytics', 'results': results}, f, indent=2)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
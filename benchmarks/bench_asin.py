@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: ASIN detection via str(soup) vs AmazonScraper.resolve_asin
+
+Reports time and peak allocation per page for the legacy approach (serialize
+the whole tree, then regex it) and for each resolve_asin() source.
+
+Usage: python benchmarks/bench_asin.py [--repeat N] [--json results.json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_scraper import AmazonScraper, DomIndex, make_soup
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def legacy_asin(soup):
+    """ASIN detection as it was done before resolve_asin()"""
+    page_content = str(soup)
+    for pattern in [r'/dp/([A-Z0-9]{10})', r'/gp/product/([A-Z0-9]{10})', r'data-asin="([A-Z0-9]{10})"']:
+        asin_match = re.search(pattern, page_content)
+        if asin_match:
+            return asin_match.group(1)
+    return None
+
+
+def measure(func, repeat):
+    """Return (median ms, peak allocated KB, result) for func()"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1024, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ASIN detection cost per page')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per page and method (default: 20)')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    scraper = AmazonScraper()
+    results = []
+    print(f"{'page':<34} {'method':<18} {'median ms':>10} {'peak KB':>10}  asin")
+    for page in sorted(glob.glob(os.path.join(FIXTURES_DIR, 'product_*.html'))):
+        with open(page, 'rb') as f:
+            content = f.read()
+        soup = make_soup(content, scraper.parser, 'utf-8')
+        index = DomIndex(soup)
+        # Strip the ASIN from the canonical link so the data-asin / raw-bytes fallbacks get exercised
+        canonical = index.select_one('link[rel~="canonical"]')
+        canonical_href = canonical['href'] if canonical else None
+        asin = legacy_asin(soup)
+
+        def without_canonical(func):
+            if canonical:
+                canonical['href'] = '/'
+            try:
+                return func()
+            finally:
+                if canonical:
+                    canonical['href'] = canonical_href
+
+        methods = [
+            ('str(soup)', lambda: legacy_asin(soup)),
+            ('request url', lambda: scraper.resolve_asin(soup, index, url=f'https://www.amazon.com/dp/{asin}')),
+            ('canonical link', lambda: scraper.resolve_asin(soup, index)),
+            ('data-asin', lambda: without_canonical(lambda: scraper.resolve_asin(soup, index, raw_content=content))),
+        ]
+        for name, func in methods:
+            median_ms, peak_kb, found = measure(func, args.repeat)
+            results.append({
+                'page': os.path.basename(page),
+                'method': name,
+                'median_ms': round(median_ms, 3),
+                'peak_kb': round(peak_kb, 1),
+                'asin': found,
+            })
+            print(f"{os.path.basename(page):<34} {name:<18} {median_ms:>10.3f} {peak_kb:>10.1f}  {found}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'asin', 'repeat': args.repeat, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
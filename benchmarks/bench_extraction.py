@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: soup construction, extract_product_info and extract_product_links
+over the offline fixture corpus (benchmarks/fixtures/manifest.json)
+
+For every page and stage reports wall time, CPU time, peak memory and
+pages/sec, and checks the extracted values against the manifest (exit code 1
+on a mismatch). Runs fully offline. Save a run with --json and pass it to a
+later run with --compare to see the per-stage change between commits. With
+--fields, product pages also get a stage extracting only those fields.
+
+Usage: python benchmarks/bench_extraction.py [--repeat N] [--json results.json] [--fields price,availability]
+                                             [--compare baseline.json [--max-regression PCT]]
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bs4
+import soupsieve
+
+from amazon_scraper import AmazonSearchScraper, make_soup
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def measure(func, repeat):
+    """Return (wall ms list, cpu ms list, peak KB, result) for func()"""
+    result = func()  # warm-up (selector compilation, imports)
+    walls, cpus = [], []
+    for _ in range(repeat):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        func()
+        walls.append((time.perf_counter() - wall_start) * 1000)
+        cpus.append((time.process_time() - cpu_start) * 1000)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return walls, cpus, peak / 1024, result
+
+
+def check_product(info, expected):
+    return info.get('asin') == expected['asin'] and info.get('title') == expected['title']
+
+
+def get_environment(parser):
+    """Versions and commit the numbers belong to"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(FIXTURES_DIR), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    try:
+        import lxml.etree
+        lxml_version = '.'.join(str(part) for part in lxml.etree.LXML_VERSION)
+    except ImportError:
+        lxml_version = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parser': parser,
+        'beautifulsoup4': bs4.__version__,
+        'soupsieve': soupsieve.__version__,
+        'lxml': lxml_version,
+    }
+
+
+def compare(results, baseline_path, max_regression):
+    """Print the median wall time change per page and stage. Returns the number of regressions"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    before = {(row['page'], row['stage']): row for row in baseline['results']}
+
+    regressions = 0
+    print(f"\ncompared with {baseline_path} (commit {baseline.get('environment', {}).get('commit')})")
+    print(f"{'page':<34} {'stage':<28} {'before ms':>10} {'after ms':>10} {'change':>8}")
+    for row in results:
+        old = before.get((row['page'], row['stage']))
+        if not old or not old['median_ms']:
+            continue
+        change = (row['median_ms'] - old['median_ms']) / old['median_ms'] * 100
+        flag = ''
+        if max_regression is not None and change > max_regression:
+            regressions += 1
+            flag = '  REGRESSION'
+        print(f"{row['page']:<34} {row['stage']:<28} {old['median_ms']:>10.2f} {row['median_ms']:>10.2f} "
+              f"{change:>+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse / extraction benchmark over the offline fixture corpus')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per page and stage (default: 5)')
+    parser.add_argument('--parser', default=None, help='parser backend (default: fastest installed)')
+    parser.add_argument('--pages', default='*', help='only fixtures matching this glob (e.g. "search_*")')
+    parser.add_argument('--fields', help='also time extract_product_info limited to these fields (comma separated)')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--max-regression', type=float, default=None,
+                        help='with --compare: exit code 1 if a stage got slower by more than this percentage')
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES_DIR, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    search_scraper = AmazonSearchScraper(parser=args.parser)
+    product_scraper = search_scraper.base_scraper
+    parser_name = search_scraper.parser
+    fields = [name.strip() for name in args.fields.split(',')] if args.fields else None
+
+    results = []
+    mismatches = 0
+    print(f"{'page':<34} {'stage':<28} {'median ms':>10} {'cpu ms':>9} {'peak KB':>10} {'pages/s':>9}  check")
+    for name, meta in sorted(manifest.items()):
+        if not fnmatch.fnmatch(name, args.pages):
+            continue
+        with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+            content = f.read()
+        url, encoding, expected = meta['url'], meta['encoding'], meta['expected']
+        soup = make_soup(content, parser_name, encoding)
+
+        stages = [('soup', lambda: make_soup(content, parser_name, encoding), None)]
+        if meta['kind'] == 'product':
+            stages.append(('extract_product_info',
+                           lambda: product_scraper.extract_product_info(soup, url, content),
+                           lambda info: check_product(info, expected)))
+            if fields:
+                stages.append(('extract_product_info[fields]',
+                               lambda: product_scraper.extract_product_info(soup, url, content, fields),
+                               lambda info: set(info) <= set(fields)))
+        else:
+            stages.append(('extract_product_links',
+                           lambda: search_scraper.extract_product_links(soup, base_url=url),
+                           lambda links: len(links) == expected['links']))
+            stages.append(('extract_search_cards',
+                           lambda: search_scraper.extract_search_cards(soup, base_url=url),
+                           lambda cards: len(cards) == expected['cards']))
+
+        for stage, func, check in stages:
+            walls, cpus, peak_kb, result = measure(func, args.repeat)
+            ok = check(result) if check else True
+            mismatches += not ok
+            median_ms = statistics.median(walls)
+            row = {
+                'page': name,
+                'kind': meta['kind'],
+                'marketplace': meta['marketplace'],
+                'bytes': len(content),
+                'stage': stage,
+                'median_ms': round(median_ms, 3),
+                'min_ms': round(min(walls), 3),
+                'cpu_ms': round(statistics.median(cpus), 3),
+                'peak_kb': round(peak_kb, 1),
+                'pages_per_sec': round(1000 / median_ms, 1) if median_ms else None,
+                'ok': ok,
+            }
+            results.append(row)
+            print(f"{name:<34} {stage:<28} {row['median_ms']:>10.2f} {row['cpu_ms']:>9.2f} {row['peak_kb']:>10.1f} "
+                  f"{row['pages_per_sec']:>9.1f}  {'OK' if ok else 'MISMATCH'}")
+
+    # Throughput per stage over the whole corpus
+    totals = {}
+    for row in results:
+        total = totals.setdefault(row['stage'], {'pages': 0, 'total_ms': 0.0, 'bytes': 0})
+        total['pages'] += 1
+        total['total_ms'] += row['median_ms']
+        total['bytes'] += row['bytes']
+    print(f"\n{'stage':<28} {'pages':>6} {'pages/s':>9} {'MB/s':>8}")
+    for stage, total in totals.items():
+        seconds = total['total_ms'] / 1000
+        total['total_ms'] = round(total['total_ms'], 3)
+        total['pages_per_sec'] = round(total['pages'] / seconds, 1) if seconds else None
+        total['mb_per_sec'] = round(total['bytes'] / 1048576 / seconds, 2) if seconds else None
+        print(f"{stage:<28} {total['pages']:>6} {total['pages_per_sec']:>9.1f} {total['mb_per_sec']:>8.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'benchmark': 'extraction',
+                'repeat': args.repeat,
+                'environment': get_environment(parser_name),
+                'results': results,
+                'totals': totals,
+            }, f, indent=2)
+
+    regressions = compare(results, args.compare, args.max_regression) if args.compare else 0
+    sys.exit(1 if mismatches or regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: content hash vs full parse for unchanged product pages
+
+For each fixture product page, times get_content_hash() against
+parse_product() (parse + extraction), which is what an incremental
+re-scrape saves on a page whose relevant content did not change. Also
+checks the hash on edited copies of each page: noise (scripts, comments,
+hidden inputs, an ad outside the product containers) must keep the same
+hash, a changed title must not (exit code 1 otherwise).
+
+Usage: python benchmarks/bench_incremental.py [--repeat N] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_scraper import AmazonScraper, get_content_hash
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def add_noise(content):
+    """Same page with request-specific noise changed: what two fetches of an unchanged page differ in"""
+    return (content
+            .replace(b'<script', b'<script data-request-id="R4ND0M"', 1)
+            .replace(b'<body', b'<!-- served by host-42 --><body', 1)
+            .replace(b'</body>', b'<input type="hidden" name="csrf" value="t0k3n">'
+                                 b'<div id="sponsored-ads">Another ad</div></body>', 1))
+
+
+def timed(function, repeat):
+    """Median seconds of `repeat` calls"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Content hash vs parse time for incremental re-scrapes')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per page, median reported (default: 5)')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES_DIR, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    scraper = AmazonScraper()
+
+    results = []
+    failures = 0
+    print(f"{'page':<34} {'parse ms':>9} {'hash ms':>8} {'saved':>7}  noise   change")
+    for name, meta in sorted(manifest.items()):
+        if meta['kind'] != 'product':
+            continue
+        with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+            content = f.read()
+        url, encoding = meta['url'], meta['encoding']
+        product = scraper.parse_product(content, url, encoding)
+
+        parse_seconds = timed(lambda: scraper.parse_product(content, url, encoding), args.repeat)
+        hash_seconds = timed(lambda: get_content_hash(content), args.repeat)
+
+        original = get_content_hash(content)
+        noise_ok = get_content_hash(add_noise(content)) == original
+        retitled = content.replace(product['title'].encode(encoding or 'utf-8'), b'Another title')
+        change_ok = get_content_hash(retitled) != original
+        failures += (not noise_ok) + (not change_ok)
+
+        row = {
+            'page': name,
+            'parse_ms': round(parse_seconds * 1000, 2),
+            'hash_ms': round(hash_seconds * 1000, 2),
+            'saved': round(1 - hash_seconds / parse_seconds, 3),
+            'noise_ignored': noise_ok,
+            'change_detected': change_ok,
+        }
+        results.append(row)
+        print(f"{name:<34} {row['parse_ms']:>9.1f} {row['hash_ms']:>8.1f} {row['saved']:>7.1%}  "
+              f"{'OK' if noise_ok else 'FAIL':<6}  {'OK' if change_ok else 'FAIL'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'incremental', 'results': results}, f, indent=2)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
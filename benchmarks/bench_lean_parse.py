@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: full parse vs lean parse (LEAN_PARSE_STRAINER) on saved product pages
+
+Checks that both modes extract identical fields from every fixture (exit
+code 1 otherwise) and reports parse time, peak memory and tree size.
+
+Usage: python benchmarks/bench_lean_parse.py [--repeat N] [--json results.json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_scraper import AmazonScraper
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def comparable(product):
+    """Product dict without fields that legitimately differ between runs"""
+    product = dict(product)
+    product.pop('scraped_at', None)
+    if 'images' in product:
+        product['images'] = sorted(product['images'])
+    return product
+
+
+def measure(scraper, content, repeat):
+    """Return (median ms, peak KB, product) for parse_product on one page"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scraper.parse_product(content, 'fixture', 'utf-8')
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    product = scraper.parse_product(content, 'fixture', 'utf-8')
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1024, product
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Full vs lean parse: field parity, time and memory')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per page and mode (default: 5)')
+    parser.add_argument('--parser', default=None, help='parser backend (default: fastest installed)')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    full = AmazonScraper(parser=args.parser)
+    lean = AmazonScraper(parser=args.parser, lean_parse=True)
+
+    results = []
+    mismatches = 0
+    print(f"{'page':<34} {'mode':<6} {'median ms':>10} {'peak KB':>10}  parity")
+    for page in sorted(glob.glob(os.path.join(FIXTURES_DIR, 'product_*.html'))):
+        with open(page, 'rb') as f:
+            content = f.read()
+
+        full_ms, full_kb, full_product = measure(full, content, args.repeat)
+        lean_ms, lean_kb, lean_product = measure(lean, content, args.repeat)
+
+        identical = comparable(full_product) == comparable(lean_product)
+        if not identical:
+            mismatches += 1
+            for key in sorted(set(full_product) | set(lean_product)):
+                if comparable(full_product).get(key) != comparable(lean_product).get(key):
+                    print(f"   field differs: {key}")
+
+        name = os.path.basename(page)
+        for mode, median_ms, peak_kb in (('full', full_ms, full_kb), ('lean', lean_ms, lean_kb)):
+            results.append({
+                'page': name,
+                'mode': mode,
+                'parser': full.parser,
+                'median_ms': round(median_ms, 2),
+                'peak_kb': round(peak_kb, 1),
+                'parity': identical,
+            })
+            print(f"{name:<34} {mode:<6} {median_ms:>10.2f} {peak_kb:>10.1f}  {'OK' if identical else 'MISMATCH'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'lean_parse', 'repeat': args.repeat, 'results': results}, f, indent=2)
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: product page parsing in threads vs worker processes (ParsePool)
+
+Parses the fixture product pages (--pages copies of the corpus) with a thread
+pool and with ParsePool at 1, 2, 4, ... processes up to the core count, and
+reports pages/sec and the speedup over one process. Threads stop scaling at
+one core because of the GIL; processes should scale close to linearly until
+the cores run out. Every result is checked against the in-process parse
+(exit code 1 on a difference).
+
+Usage: python benchmarks/bench_parse_pool.py [--pages N] [--max-processes N] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_scraper import AmazonScraper, ParsePool
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def comparable(product):
+    """Product dict without fields that legitimately differ between runs"""
+    product = dict(product)
+    product.pop('scraped_at', None)
+    return product
+
+
+def load_pages(count):
+    """count (content, url, encoding) tuples cycling through the product fixtures"""
+    with open(os.path.join(FIXTURES_DIR, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    corpus = []
+    for name, meta in sorted(manifest.items()):
+        if meta['kind'] == 'product':
+            with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+                corpus.append((f.read(), meta['url'], meta['encoding']))
+    return [corpus[i % len(corpus)] for i in range(count)]
+
+
+def run_threads(scraper, pages, workers):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda page: scraper.parse_product(*page), pages))
+
+
+def run_processes(pool, pages):
+    futures = [pool.submit(*page) for page in pages]
+    return [future.result() for future in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Thread vs process pool parsing throughput')
+    parser.add_argument('--pages', type=int, default=120, help='pages parsed per run (default: 120)')
+    parser.add_argument('--max-processes', type=int, default=os.cpu_count() or 1,
+                        help='largest pool size to try (default: number of cores)')
+    parser.add_argument('--parser', default=None, help='parser backend (default: fastest installed)')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    scraper = AmazonScraper(parser=args.parser)
+    expected = [comparable(scraper.parse_product(*page)) for page in pages]
+
+    sizes = []
+    size = 1
+    while size < args.max_processes:
+        sizes.append(size)
+        size *= 2
+    sizes.append(args.max_processes)
+
+    results = []
+    mismatches = 0
+    print(f"{len(pages)} pages, {os.cpu_count()} cores, parser {scraper.parser}")
+    print(f"{'mode':<10} {'workers':>8} {'seconds':>9} {'pages/s':>9} {'speedup':>8}  check")
+
+    for mode in ('threads', 'processes'):
+        base_rate = None
+        for workers in sizes:
+            if mode == 'threads':
+                start = time.perf_counter()
+                products = run_threads(scraper, pages, workers)
+                seconds = time.perf_counter() - start
+            else:
+                with ParsePool(workers, parser=args.parser) as pool:
+                    run_processes(pool, pages[:workers])  # warm-up: start the workers
+                    start = time.perf_counter()
+                    products = run_processes(pool, pages)
+                    seconds = time.perf_counter() - start
+
+            ok = [comparable(product) for product in products] == expected
+            mismatches += not ok
+            rate = len(pages) / seconds
+            base_rate = base_rate or rate
+            row = {
+                'mode': mode,
+                'workers': workers,
+                'seconds': round(seconds, 3),
+                'pages_per_sec': round(rate, 1),
+                'speedup': round(rate / base_rate, 2),
+                'ok': ok,
+            }
+            results.append(row)
+            print(f"{mode:<10} {workers:>8} {row['seconds']:>9.2f} {row['pages_per_sec']:>9.1f} "
+                  f"{row['speedup']:>7.2f}x  {'OK' if ok else 'MISMATCH'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'benchmark': 'parse_pool',
+                'pages': len(pages),
+                'cores': os.cpu_count(),
+                'parser': scraper.parser,
+                'results': results,
+            }, f, indent=2)
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
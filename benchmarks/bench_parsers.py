@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: BeautifulSoup parse time per backend on saved product pages
+
+Usage: python benchmarks/bench_parsers.py [--repeat N] [--json results.json]
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_scraper import PARSER_BACKENDS, is_parser_available, make_soup
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def time_parse(content, parser, encoding, repeat):
+    """Return per-page parse times (ms) for one backend"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        make_soup(content, parser, encoding)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-page parse time for each BeautifulSoup backend')
+    parser.add_argument('--repeat', type=int, default=5, help='parses per page and backend (default: 5)')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    pages = sorted(glob.glob(os.path.join(FIXTURES_DIR, 'product_*.html')))
+    backends = [backend for backend in PARSER_BACKENDS if is_parser_available(backend)]
+
+    results = []
+    print(f"{'page':<34} {'backend':<12} {'encoding':<10} {'median ms':>10} {'min ms':>9}")
+    for page in pages:
+        with open(page, 'rb') as f:
+            content = f.read()
+        for backend in backends:
+            # None = BeautifulSoup sniffs the charset itself, 'utf-8' = declared by the server
+            for encoding in (None, 'utf-8'):
+                timings = time_parse(content, backend, encoding, args.repeat)
+                row = {
+                    'page': os.path.basename(page),
+                    'bytes': len(content),
+                    'backend': backend,
+                    'encoding_hint': encoding,
+                    'median_ms': round(statistics.median(timings), 2),
+                    'min_ms': round(min(timings), 2),
+                }
+                results.append(row)
+                print(f"{row['page']:<34} {backend:<12} {str(encoding):<10} {row['median_ms']:>10.2f} {row['min_ms']:>9.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'parsers', 'repeat': args.repeat, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: memory of product dicts vs ProductRecord for a large result set
+
+Builds --count products (default 100,000) from the fixture product pages,
+each with its own ASIN, URL, price, review count and position, the way a
+crawl collects them, and reports the bytes held per product as plain dicts
+and as compact records. Every record is checked to convert back to exactly
+its original dict (exit code 1 otherwise).
+
+Usage: python benchmarks/bench_records.py [--count N] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_scraper import AmazonScraper, ProductRecord
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_templates():
+    """Product dicts extracted from the fixture product pages, as JSON text"""
+    with open(os.path.join(FIXTURES_DIR, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    scraper = AmazonScraper()
+    templates = []
+    for name, meta in sorted(manifest.items()):
+        if meta['kind'] == 'product':
+            with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+                product = scraper.parse_product(f.read(), meta['url'], meta['encoding'])
+            templates.append(json.dumps(product, ensure_ascii=False))
+    return templates
+
+
+def make_products(templates, count):
+    """count independent product dicts (fresh objects, as parsed from separate pages)"""
+    for i in range(count):
+        product = json.loads(templates[i % len(templates)])
+        asin = f'B{i:09d}'
+        product['asin'] = asin
+        product['url'] = product['url'].rsplit('/dp/', 1)[0] + '/dp/' + asin
+        product['price'] = f"{(i % 5000) + 1:,}.{i % 100:02d}"
+        product['review_count'] = f'{i * 7 % 250000:,}'
+        product['page_number'] = i // 48 + 1
+        product['position_on_page'] = i % 48 + 1
+        yield product
+
+
+def measure(build):
+    """(bytes held by build()'s result, seconds, result)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return held, seconds, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory per product: dicts vs ProductRecord')
+    parser.add_argument('--count', type=int, default=100000, help='products to hold (default: 100000)')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    templates = load_templates()
+
+    dict_bytes, dict_seconds, products = measure(lambda: list(make_products(templates, args.count)))
+    del products
+    record_bytes, record_seconds, records = measure(
+        lambda: [ProductRecord(product) for product in make_products(templates, args.count)])
+
+    # Lossless: every record gives back its original dict, key order included
+    start = time.perf_counter()
+    mismatches = sum(
+        record.to_dict() != product or list(record) != list(product)
+        for record, product in zip(records, make_products(templates, args.count))
+    )
+    to_dict_seconds = time.perf_counter() - start
+
+    results = {
+        'count': args.count,
+        'dict_bytes_per_product': round(dict_bytes / args.count),
+        'record_bytes_per_product': round(record_bytes / args.count),
+        'saving': round(1 - record_bytes / dict_bytes, 3),
+        'dict_build_seconds': round(dict_seconds, 2),
+        'record_build_seconds': round(record_seconds, 2),
+        'to_dict_check_seconds': round(to_dict_seconds, 2),
+        'mismatches': mismatches,
+    }
+    print(f"{args.count:,} products")
+    print(f"  dict          {results['dict_bytes_per_product']:>8,} bytes/product  "
+          f"({dict_bytes / 1048576:,.1f} MB, built in {dict_seconds:.1f}s)")
+    print(f"  ProductRecord {results['record_bytes_per_product']:>8,} bytes/product  "
+          f"({record_bytes / 1048576:,.1f} MB, built in {record_seconds:.1f}s)")
+    print(f"  saving        {results['saving']:.1%}")
+    print(f"  round trip    {'OK' if not mismatches else f'{mismatches} MISMATCHES'} "
+          f"(to_dict check {to_dict_seconds:.1f}s)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'records', 'results': results}, f, indent=2)
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: ProductStore (SQLite) sink throughput and latest-price queries
+
+Writes --count products built from the fixture product pages (repeated
+ASINs across several days, as repeated crawls produce) into a fresh
+database for each batch size, and reports products/sec and rows/sec
+(side-table rows included). Then compares "latest price per ASIN" from the
+database with the same answer computed by scanning an NDJSON export.
+
+Usage: python benchmarks/bench_store.py [--count N] [--asins N] [--batch-sizes 1,100,500,2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_scraper import NdjsonWriter, ProductStore, get_marketplace
+from bench_records import load_templates, make_products
+
+
+def make_history(templates, count, asins):
+    """count products over `asins` distinct ASINs, one crawl per day"""
+    per_day = max(1, asins)
+    for i, product in enumerate(make_products(templates, count)):
+        asin = f'B{i % asins:09d}'
+        product['asin'] = asin
+        product['url'] = product['url'].rsplit('/dp/', 1)[0] + '/dp/' + asin
+        product['scraped_at'] = f'2026-{1 + i // per_day // 28 % 12:02d}-{1 + i // per_day % 28:02d} 08:00:00'
+        yield product
+
+
+def side_rows(product):
+    return len(product.get('specifications') or {}) + len(product.get('images') or ()) + len(product.get('features') or ())
+
+
+def latest_from_ndjson(path):
+    """Latest price per (asin, marketplace) by reading every line"""
+    latest = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            product = json.loads(line)
+            if product.get('price') is None:
+                continue
+            key = (product.get('asin'), get_marketplace(product['url']))
+            if key not in latest or product['scraped_at'] >= latest[key][0]:
+                latest[key] = (product['scraped_at'], product['price'])
+    return latest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ProductStore throughput and query latency')
+    parser.add_argument('--count', type=int, default=50000, help='products written per run (default: 50000)')
+    parser.add_argument('--asins', type=int, default=2000, help='distinct ASINs (default: 2000)')
+    parser.add_argument('--batch-sizes', default='1,100,500,2000', help='batch sizes to compare')
+    args = parser.parse_args()
+
+    templates = load_templates()
+    products = list(make_history(templates, args.count, args.asins))
+    total_side_rows = sum(side_rows(product) for product in products)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.count:,} products ({total_side_rows:,} side-table rows), {args.asins:,} ASINs")
+        print(f"{'batch':>6} {'seconds':>9} {'products/s':>11} {'rows/s':>10}")
+        db_path = None
+        for batch_size in (int(size) for size in args.batch_sizes.split(',')):
+            db_path = os.path.join(tmp, f'store_{batch_size}.sqlite3')
+            start = time.perf_counter()
+            with ProductStore(db_path, batch_size=batch_size) as store:
+                for product in products:
+                    store.write_product(product)
+            seconds = time.perf_counter() - start
+            rows = args.count + total_side_rows
+            print(f"{batch_size:>6} {seconds:>9.2f} {args.count / seconds:>11,.0f} {rows / seconds:>10,.0f}")
+
+        ndjson_path = os.path.join(tmp, 'products.ndjson')
+        with NdjsonWriter(ndjson_path) as writer:
+            for product in products:
+                writer.write_product(product)
+
+        start = time.perf_counter()
+        scanned = latest_from_ndjson(ndjson_path)
+        scan_ms = (time.perf_counter() - start) * 1000
+
+        with ProductStore(db_path) as store:
+            start = time.perf_counter()
+            latest = store.latest_prices()
+            all_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            one = store.latest_prices(['B000000042'])
+            one_ms = (time.perf_counter() - start) * 1000
+
+        ok = {(row['asin'], row['marketplace']): (row['scraped_at'], row['price']) for row in latest} == scanned
+        print(f"\nlatest price per ASIN ({len(latest):,} ASIN/marketplace pairs)")
+        print(f"  NDJSON scan          {scan_ms:>9.1f} ms")
+        print(f"  SQLite, all ASINs    {all_ms:>9.1f} ms")
+        print(f"  SQLite, one ASIN     {one_ms:>9.2f} ms ({len(one)} rows)")
+        print(f"  same answer: {'OK' if ok else 'MISMATCH'}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generate the offline fixture corpus used by the benchmarks
+
+Synthetic product and search result pages modelled on Amazon's markup
+(same ids, classes and nesting the extractors rely on, plus the scripts,
+styles and carousels that make real pages heavy), for several marketplaces.
+Output is deterministic (seeded), so every commit is benchmarked on
+byte-identical input. Also writes fixtures/manifest.json with each page's
+kind, marketplace, URL and the values the extractors are expected to find.
+
+Usage: python benchmarks/make_fixtures.py [--output DIR]
+"""
+
+import argparse
+import html
+import json
+import os
+import random
+from urllib.parse import quote_plus
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def carousel(rng, cid, n, marketplace):
+    """A sponsored-products carousel of n cards"""
+    cards = []
+    for i in range(n):
+        asin = 'B0' + ''.join(rng.choice('ABCDEFGHJKLMNPQRSTUVWXYZ0123456789') for _ in range(8))
+        cards.append(f'''<li class="a-carousel-card" role="listitem" aria-setsize="{n}" aria-posinset="{i+1}">
+<div data-asin="{asin}" class="a-section sp_offerVertical p13n-asin sp_ltr_offer">
+<a class="a-link-normal" href="/sspa/click?ie=UTF8&amp;spc=MTo{rng.randrange(10**12)}&amp;url=%2Fdp%2F{asin}%2Fref%3Dsspa_dk_detail_{i}">
+<img alt="Sponsored product {i}" src="https://m.media-amazon.com/images/I/{asin}._AC_UL160_SR160,160_.jpg" height="160" width="160" data-a-dynamic-image="{{}}"></a>
+<div class="sponsored-products-truncator-truncated">Recommended item number {i} in carousel {cid} with a fairly long marketing title</div>
+<div class="a-row"><i class="a-icon a-icon-star a-star-4"><span class="a-icon-alt">4.{rng.randrange(10)} out of 5 stars</span></i>
+<a class="a-link-normal" href="/product-reviews/{asin}"><span class="a-size-small">{rng.randrange(10, 99999):,}</span></a></div>
+<div class="a-row"><span class="a-price" data-a-size="l"><span class="a-offscreen">{rng.randrange(5,300)}.99</span></span></div>
+</div></li>''')
+    return f'''<div id="{cid}" class="a-section a-spacing-large celwidget" data-csa-c-type="widget">
+<h2 class="a-carousel-heading">Products related to this item</h2>
+<div class="a-carousel-viewport"><ol class="a-carousel" role="list">{"".join(cards)}</ol></div></div>'''
+
+def script_blob(rng, k):
+    """An inline script of the size Amazon pages carry by the dozen"""
+    data = {f'key{j}': ''.join(rng.choice('abcdefghijklmnop') for _ in range(40)) for j in range(60)}
+    return f'<script type="text/javascript">P.when("A", "ready").execute(function(A) {{ var cfg{k} = {json.dumps(data)}; A.trigger("init{k}", cfg{k}); }});</script>'
+
+def style_blob(rng, k):
+    """An inline stylesheet"""
+    rules = ''.join(f'.cls{k}_{j}{{margin:{j}px;padding:{j%7}px;color:#{rng.randrange(16**6):06x}}}' for j in range(120))
+    return f'<style type="text/css">{rules}</style>'
+
+def page(p):
+    """A product detail page"""
+    rng = random.Random(p['seed'])
+    dom = p['domain']
+    esc = html.escape
+    head_scripts = ''.join(script_blob(rng, k) for k in range(p.get('scripts', 30)))
+    styles = ''.join(style_blob(rng, k) for k in range(p.get('styles', 12)))
+    features = ''.join(f'<li><span class="a-list-item"> {esc(f)} </span></li>' for f in p['features'])
+    tech_td = ''.join(f'<tr><td class="a-span3"> {esc(k)} </td><td class="a-span9"> {esc(v)} </td></tr>' for k, v in p['tech'].items())
+    addl = ''.join(f'<tr><th class="a-color-secondary a-size-base prodDetSectionEntry"> {esc(k)} </th><td class="a-size-base prodDetAttrValue"> {esc(v)} </td></tr>' for k, v in p['additional'].items())
+    po = ''.join(f'<tr class="a-spacing-small po-{esc(k.lower().replace(" ", "_"))}"><td class="a-span3"><span class="a-size-base a-text-bold po-display-name">{esc(k)}</span></td><td class="a-span9"><span class="a-size-base po-break-word">{esc(v)}</span></td></tr>' for k, v in p['overview'].items())
+    crumbs = '<li><span class="a-list-item"><span class="a-list-item a-color-tertiary">›</span></span></li>'.join(
+        f'<li><span class="a-list-item"><a class="a-link-normal a-color-tertiary" href="/b/ref=dp_bc_{i}?node={1000+i}"> {esc(c)} </a></span></li>' for i, c in enumerate(p['crumbs']))
+    swatches = ''.join(f'<li title="Click to select {esc(c)}"><span class="a-list-item"><img class="imgSwatch" alt="{esc(c)}" title="{esc(c)}" src="https://m.media-amazon.com/images/I/sw{i}._SS36_.jpg"></span></li>' for i, c in enumerate(p['colors']))
+    sizes = ''.join(f'<option value="{i}">{esc(s)}</option>' for i, s in enumerate(['Select'] + p['sizes']))
+    images = ''.join(f'<li class="image item itemNo{i}"><img src="https://m.media-amazon.com/images/I/{p["asin"]}{i}._AC_SX425_.jpg" class="a-dynamic-image" data-old-hires=""></li>' for i in range(1, 4))
+    carousels = ''.join(carousel(rng, f'sims-{k}', p.get('cards', 18), dom) for k in range(p.get('carousels', 4)))
+    desc = ''.join(f'<p> {esc(d)} </p>' for d in p['description'])
+    return f'''<!doctype html><html lang="{p["lang"]}" class="a-no-js" data-19ax5a9jf="dingo"><head>
+<meta charset="utf-8">
+<title>{esc(p["title"])} : {esc(p["crumbs"][0])}</title>
+<link rel="canonical" href="https://www.{dom}/{esc(p["slug"])}/dp/{p["asin"]}">
+<link rel="alternate" hreflang="en-us" href="https://www.amazon.com/dp/{p["asin"]}">
+{styles}{head_scripts}
+</head><body class="a-m-us a-aui_72554-c dp">
+<div id="a-page"><header id="navbar-main" class="nav-opt-sprite"><div id="nav-belt">
+<a href="/ref=nav_logo" class="nav-logo-link" aria-label="Amazon">Amazon</a>
+<form id="nav-search-bar-form" action="/s/ref=nav_bb_sb" method="GET"><input type="text" id="twotabsearchtextbox" name="field-keywords"></form>
+<div id="nav-tools"><a href="/gp/css/homepage.html?ref_=nav_orders_first" class="nav-a">Returns &amp; Orders</a><a href="/gp/cart/view.html?ref_=nav_cart" class="nav-a">Cart</a></div>
+</div></header>
+<div id="dp" class="{esc(p["crumbs"][0].lower())} {p["lang"]}_{p["lang"].upper()}"><div id="dp-container" class="a-container" role="main">
+<div id="wayfinding-breadcrumbs_feature_div" class="celwidget"><div class="a-subheader a-breadcrumb feature"><ul class="a-unordered-list a-horizontal a-size-small">{crumbs}</ul></div></div>
+<div id="ppd">
+<div id="leftCol" class="a-column a-span5"><div id="imageBlock"><div id="imgTagWrapperId" class="imgTagWrapper">
+<img alt="{esc(p["title"])}" src="https://m.media-amazon.com/images/I/{p["asin"]}._AC_SX679_.jpg" data-old-hires="https://m.media-amazon.com/images/I/{p["asin"]}._AC_SL1500_.jpg" id="landingImage" class="a-dynamic-image a-stretch-vertical" data-a-dynamic-image="{{}}"></div>
+<ul class="a-unordered-list a-nostyle a-horizontal list maintain-height">{images}</ul></div></div>
+<div id="centerCol" class="centerColAlign">
+<div id="title_feature_div" class="celwidget"><h1 id="title" class="a-size-large a-spacing-none"><span id="productTitle" class="a-size-large product-title-word-break"> {esc(p["title"])} </span></h1></div>
+<div id="bylineInfo_feature_div" class="celwidget"><a id="bylineInfo" class="a-link-normal" href="/stores/{esc(p["brand"])}/page/ABC">{esc(p["byline"])}</a></div>
+<div id="averageCustomerReviews_feature_div" class="celwidget"><div id="averageCustomerReviews" data-asin="{p["asin"]}">
+<span class="a-declarative"><a class="a-popover-trigger a-declarative" href="javascript:void(0)"><i class="a-icon a-icon-star a-star-4-5"><span class="a-icon-alt">{esc(p["rating_text"])}</span></i></a></span>
+<a id="acrCustomerReviewLink" class="a-link-normal" href="#customerReviews"><span id="acrCustomerReviewText" class="a-size-base">{esc(p["reviews_text"])}</span></a></div></div>
+<div id="corePrice_feature_div" class="celwidget"><div class="a-section a-spacing-micro"><span class="a-price aok-align-center" data-a-size="xl" data-a-color="base"><span class="a-offscreen">{esc(p["price_text"])}</span><span aria-hidden="true"><span class="a-price-symbol">{esc(p["symbol"])}</span><span class="a-price-whole">{esc(p["whole"])}<span class="a-price-decimal">{esc(p["decimal"])}</span></span><span class="a-price-fraction">{esc(p["fraction"])}</span></span></span></div></div>
+<div id="primeBadge"><i class="a-icon a-icon-prime a-icon-medium" role="img" aria-label="Amazon Prime"></i></div>
+<div id="variation_color_name" class="a-section a-spacing-small"><ul class="a-unordered-list a-nostyle a-button-list a-horizontal">{swatches}</ul></div>
+<div id="variation_size_name"><select name="dropdown_selected_size_name" id="native_dropdown_selected_size_name" class="a-native-dropdown">{sizes}</select></div>
+<div id="productOverview_feature_div" class="celwidget"><div id="poExpander" class="a-expander-container"><table class="a-normal a-spacing-micro">{po}</table></div></div>
+<div id="feature-bullets" class="a-section a-spacing-medium a-spacing-top-small"><h1 class="a-size-base-plus a-text-bold"> About this item </h1><ul class="a-unordered-list a-vertical a-spacing-mini">{features}</ul></div>
+</div>
+<div id="rightCol" class="a-column a-span3 a-span-last"><div id="buybox">
+<div id="deliveryBlockMessage" class="a-section"><span data-csa-c-type="element">{esc(p["delivery"])}</span></div>
+<div id="availability" class="a-section a-spacing-base"><span class="a-size-medium a-color-success"> {esc(p["availability"])} </span></div>
+<div id="merchant-info" class="a-section a-spacing-mini">Ships from and sold by <a id="sellerProfileTriggerId" href="/gp/help/seller/at-a-glance.html">{esc(p["seller"])}</a></div>
+</div></div>
+</div>
+{carousels[:len(carousels)//2]}
+<div id="productDescription_feature_div" class="celwidget"><div id="productDescription" class="a-section a-spacing-small">{desc}</div></div>
+<div id="prodDetails" class="a-section"><h2>Product information</h2>
+<div class="a-column a-span6"><table id="productDetails_techSpec_section_1" class="a-keyvalue prodDetTable" role="presentation">{tech_td}</table></div>
+<div class="a-column a-span6 a-span-last"><table id="productDetails_detailBullets_sections1" class="a-keyvalue prodDetTable" role="presentation">{addl}
+<tr><th class="a-color-secondary a-size-base prodDetSectionEntry"> Best Sellers Rank </th><td><span id="SalesRank"> {esc(p["rank"])} </span></td></tr></table></div></div>
+{carousels[len(carousels)//2:]}
+<div id="reviewsMedley" class="a-section"><div data-hook="total-review-count"><span class="a-size-base a-color-secondary">{esc(p["reviews_text"])}</span></div></div>
+</div></div>
+<div id="navFooter" class="navLeftFooter nav-sprite-v1"><div class="navFooterVerticalColumn"><a href="/careers" class="nav_a">Careers</a><a href="/gp/help/customer/display.html" class="nav_a">Help</a></div></div>
+{''.join(script_blob(rng, 100 + k) for k in range(p.get('tail_scripts', 20)))}
+</div></body></html>'''
+
+
+PRICE_STYLES = {
+    'us': lambda v: f'${v:,.2f}',
+    'uk': lambda v: f'£{v:,.2f}',
+    'de': lambda v: f'{v:,.2f}'.replace(',', ' ').replace('.', ',').replace(' ', '.') + ' €',
+    'fr': lambda v: f'{v:,.2f}'.replace(',', ' ').replace('.', ',') + ' €',
+    'jp': lambda v: f'￥{int(v):,}',
+}
+
+RATING_STYLES = {
+    'us': lambda r: f'{r} out of 5 stars',
+    'uk': lambda r: f'{r} out of 5 stars',
+    'de': lambda r: f'{r} von 5 Sternen'.replace('.', ','),
+    'fr': lambda r: f'{r} sur 5 étoiles'.replace('.', ','),
+    'jp': lambda r: f'5つ星のうち{r}',
+}
+
+
+def search_card(rng, s, index, sponsored):
+    """One s-search-result card; sponsored cards link through /sspa/click like the real ones"""
+    esc = html.escape
+    asin = 'B0' + ''.join(rng.choice('ABCDEFGHJKLMNPQRSTUVWXYZ0123456789') for _ in range(8))
+    title = f'{rng.choice(s["brands"])} {s["item"]} {rng.choice(s["variants"])} {rng.randrange(100, 999)}'
+    slug = title.replace(' ', '-')
+    price = rng.randrange(8, 400) + rng.choice((0.99, 0.49, 0.0, 0.95))
+    rating = f'{rng.randrange(3, 5)}.{rng.randrange(10)}'
+    reviews = rng.randrange(3, 250000)
+    if sponsored:
+        href = f'/sspa/click?ie=UTF8&amp;spc=MTo{rng.randrange(10**15)}&amp;url=%2F{esc(slug)}%2Fdp%2F{asin}%2Fref%3Dsr_1_{index}_sspa'
+        review_href = href + '%23customerReviews'
+        label = f'<div class="a-row a-spacing-micro"><span class="puis-label-popover-default"><span class="a-color-secondary">{esc(s["sponsored"])}</span></span></div>'
+    else:
+        href = f'/{esc(slug)}/dp/{asin}/ref=sr_1_{index}?keywords={esc(s["keywords"])}&amp;qid=1697000000&amp;sr=8-{index}'
+        review_href = f'/{esc(slug)}/dp/{asin}/ref=sr_1_{index}?keywords={esc(s["keywords"])}#customerReviews'
+        label = ''
+    price_text = PRICE_STYLES[s['style']](price)
+    prime = '<i class="a-icon a-icon-prime a-icon-medium" role="img" aria-label="Amazon Prime"></i>' if rng.random() < 0.6 else ''
+    return f'''<div data-asin="{asin}" data-index="{index}" data-uuid="{rng.randrange(16**12):012x}" data-component-type="s-search-result" class="sg-col-4-of-24 sg-col-4-of-12 s-result-item s-asin sg-col-4-of-16 sg-col s-widget-spacing-small sg-col-4-of-20" data-component-id="{index}" data-cel-widget="search_result_{index}">
+<div class="sg-col-inner"><div class="s-widget-container s-spacing-small s-widget-container-height-small celwidget slot=MAIN template=SEARCH_RESULTS widgetId=search-results_{index}">
+<div class="s-card-container s-overflow-hidden aok-relative puis-include-content-margin puis s-latency-cf-section s-card-border"><div class="a-section">
+<div class="s-product-image-container aok-relative s-text-center s-image-overlay-grey puis-image-overlay-grey s-padding-left-small s-padding-right-small puis-spacing-small s-height-equalized puis">
+<span data-component-type="s-product-image" class="rush-component"><a class="a-link-normal s-no-outline" href="{href}"><div class="a-section aok-relative s-image-square-aspect"><img class="s-image" src="https://m.media-amazon.com/images/I/{asin}._AC_UL320_.jpg" srcset="https://m.media-amazon.com/images/I/{asin}._AC_UL320_.jpg 1x, https://m.media-amazon.com/images/I/{asin}._AC_UL480_FMwebp_QL65_.jpg 1.5x" alt="{esc(title)}" data-image-index="{index}" data-image-load="" data-image-latency="s-product-image" data-image-source-density="1"></div></a></span></div>
+<div class="a-section a-spacing-small puis-padding-left-small puis-padding-right-small">{label}
+<div data-cy="title-recipe" class="a-section a-spacing-none a-spacing-top-small s-title-instructions-style"><h2 class="a-size-mini a-spacing-none a-color-base s-line-clamp-4"><a class="a-link-normal s-underline-text s-underline-link-text s-link-style a-text-normal" href="{href}"><span class="a-size-base-plus a-color-base a-text-normal">{esc(title)}</span></a></h2></div>
+<div data-cy="reviews-block" class="a-section a-spacing-none a-spacing-top-micro"><div class="a-row a-size-small"><span aria-label="{esc(RATING_STYLES[s["style"]](rating))}"><span class="a-declarative"><a href="javascript:void(0)" role="button" class="a-popover-trigger a-declarative"><i class="a-icon a-icon-star-small a-star-small-4-5 aok-align-bottom"><span class="a-icon-alt">{esc(RATING_STYLES[s["style"]](rating))}</span></i><i class="a-icon a-icon-popover"></i></a></span></span>
+<span aria-label="{reviews:,}"><a class="a-link-normal s-underline-text s-underline-link-text s-link-style" href="{review_href}"><span class="a-size-base s-underline-text">{reviews:,}</span></a></span></div></div>
+<div data-cy="price-recipe" class="a-section a-spacing-none a-spacing-top-small s-price-instructions-style"><div class="a-row a-size-base a-color-base"><a class="a-link-normal s-no-hover s-underline-text s-underline-link-text s-link-style a-text-normal" href="{href}"><span class="a-price" data-a-size="xl" data-a-color="base"><span class="a-offscreen">{esc(price_text)}</span><span aria-hidden="true">{esc(price_text)}</span></span></a></div></div>
+<div data-cy="delivery-recipe" class="a-section a-spacing-none a-spacing-top-micro"><div class="a-row a-size-base a-color-secondary s-align-children-center">{prime}<span class="a-color-base">{esc(s["delivery"])}</span></div></div>
+</div></div></div></div></div></div>'''
+
+
+def search_page(s):
+    """A search results page: header, refinements sidebar, cards and pagination"""
+    rng = random.Random(s['seed'])
+    esc = html.escape
+    cards = []
+    organic = 0
+    for index in range(1, s['cards'] + 1):
+        sponsored = index in s['sponsored_positions']
+        cards.append(search_card(rng, s, index, sponsored))
+        organic += not sponsored
+    refinements = ''.join(
+        f'<li id="p_{k}/{rng.randrange(10**6)}" aria-label="{esc(b)}" class="a-spacing-micro"><span class="a-list-item"><a class="a-link-normal s-navigation-item" href="/s?k={esc(s["keywords"])}&amp;rh=p_{k}%3A{esc(b)}&amp;ref=sr_nr_p_{k}_{i}"><div class="a-checkbox a-checkbox-fancy s-navigation-checkbox aok-float-left"><label><input type="checkbox" name=""><i class="a-icon a-icon-checkbox"></i><span class="a-label a-checkbox-label"></span></label></div><span class="a-size-base a-color-base">{esc(b)}</span></a></span></li>'
+        for k in range(4) for i, b in enumerate(s['brands']))
+    pages = ''.join(f'<a href="/s?k={esc(s["keywords"])}&amp;page={n}&amp;qid=1697000000&amp;ref=sr_pg_{n}" aria-label="Go to page {n}" class="s-pagination-item s-pagination-button">{n}</a>' for n in range(2, 8))
+    head_scripts = ''.join(script_blob(rng, k) for k in range(s.get('scripts', 25)))
+    styles = ''.join(style_blob(rng, k) for k in range(s.get('styles', 10)))
+    body = f'''<!doctype html><html lang="{s["lang"]}" class="a-no-js" data-19ax5a9jf="dingo"><head>
+<meta charset="utf-8">
+<title>Amazon.{esc(s["tld"])} : {esc(s["keywords"])}</title>
+{styles}{head_scripts}
+</head><body class="a-m-{s["lang"]} a-aui_72554-c search">
+<div id="a-page"><header id="navbar-main" class="nav-opt-sprite"><div id="nav-belt">
+<a href="/ref=nav_logo" class="nav-logo-link" aria-label="Amazon">Amazon</a>
+<form id="nav-search-bar-form" action="/s/ref=nav_bb_sb" method="GET"><input type="text" id="twotabsearchtextbox" name="field-keywords" value="{esc(s["keywords"])}"></form>
+<div id="nav-tools"><a href="/gp/css/homepage.html?ref_=nav_orders_first" class="nav-a">Returns &amp; Orders</a><a href="/gp/cart/view.html?ref_=nav_cart" class="nav-a">Cart</a></div>
+</div></header>
+<div id="search" class="s-desktop-width-max s-desktop-content s-wide-grid-style sg-row">
+<div class="sg-col-4-of-24 sg-col-4-of-12 s-matching-dir sg-col-4-of-16 sg-col sg-col-4-of-20"><div class="sg-col-inner"><div id="s-refinements" class="a-section a-spacing-none"><ul class="a-unordered-list a-nostyle a-vertical a-spacing-medium">{refinements}</ul></div></div></div>
+<div class="s-main-slot s-result-list s-search-results sg-row">
+<div class="a-section a-spacing-small a-spacing-top-small"><span>1-{s["cards"]} of over 10,000 results for</span> <span class="a-color-state a-text-bold">"{esc(s["keywords"])}"</span></div>
+{"".join(cards)}
+<div class="a-section a-text-center s-pagination-container" role="navigation"><span class="s-pagination-strip"><span class="s-pagination-item s-pagination-previous s-pagination-disabled" aria-disabled="true">Previous</span><span class="s-pagination-item s-pagination-selected" aria-label="Current page, page 1">1</span>{pages}<a href="/s?k={esc(s["keywords"])}&amp;page=2&amp;qid=1697000000&amp;ref=sr_pg_1" class="s-pagination-item s-pagination-next s-pagination-button s-pagination-separator">Next</a></span></div>
+</div></div>
+<div id="navFooter" class="navLeftFooter nav-sprite-v1"><div class="navFooterVerticalColumn"><a href="/careers" class="nav_a">Careers</a><a href="/gp/help/customer/display.html" class="nav_a">Help</a></div></div>
+{''.join(script_blob(rng, 100 + k) for k in range(s.get('tail_scripts', 15)))}
+</div></body></html>'''
+    return body, organic
+
+
+PRODUCTS = {
+ 'product_com_echo_dot.html': dict(seed=1, domain='amazon.com', lang='en', asin='B08N5WRWNW', slug='Echo-Dot-4th-Gen-Charcoal',
+   title='Echo Dot (4th Gen) | Smart speaker with Alexa | Charcoal', brand='Amazon', byline='Visit the Amazon Store',
+   rating_text='4.7 out of 5 stars', reviews_text='412,876 ratings', price_text='$49.99', symbol='$', whole='49', decimal='.', fraction='99',
+   features=['OUR BEST SOUNDING ECHO DOT YET - Enjoy an improved audio experience compared to any previous Echo Dot with Alexa for clearer vocals, deeper bass and vibrant sound in any room.',
+             'YOUR FAVORITE MUSIC AND CONTENT - Play music, audiobooks, and podcasts from Amazon Music, Apple Music, Spotify and others or via Bluetooth throughout your home.',
+             'ALEXA IS HAPPY TO HELP - Ask Alexa for weather updates and to set hands-free timers, get answers to your questions and even hear jokes.',
+             'KEEP YOUR HOME COMFORTABLE - Control compatible smart home devices with your voice and routines triggered by built-in motion or indoor temperature sensors.',
+             'Connectivity: Wi-Fi and Bluetooth', 'Power Source: Corded Electric'],
+   tech={'Color': 'Charcoal', 'Item Weight': '12 ounces', 'Product Dimensions': '3.9 x 3.9 x 3.5 inches', 'Model Number': 'B7W64E', 'Speaker Maximum Output Power': '15 Watts'},
+   additional={'ASIN': 'B08N5WRWNW', 'Customer Reviews': '4.7 out of 5 stars', 'Date First Available': 'September 24, 2020', 'Manufacturer': 'Amazon'},
+   overview={'Brand': 'Amazon', 'Connectivity Technology': 'Wi-Fi, Bluetooth', 'Material': 'Fabric', 'Special Feature': 'Voice control'},
+   crumbs=['Amazon Devices & Accessories', 'Amazon Devices', 'Echo Smart Speakers & Displays'],
+   colors=['Charcoal', 'Glacier White', 'Twilight Blue'], sizes=['Without clock', 'With clock'],
+   delivery='FREE delivery Monday, October 20', availability='In Stock', seller='Amazon.com',
+   rank='#1 in Amazon Devices & Accessories (See Top 100 in Amazon Devices)',
+   description=['Meet Echo Dot - Our most popular smart speaker with a fabric design. It is our most compact smart speaker that fits perfectly into small spaces.',
+                'Voice control your music - Stream songs from Amazon Music, Apple Music, Spotify, SiriusXM, and others.']),
+ 'product_com_headphones.html': dict(seed=2, domain='amazon.com', lang='en', asin='B0863TXGM3', slug='Sony-WH-1000XM4-Canceling-Headphones',
+   title='Sony WH-1000XM4 Wireless Premium Noise Canceling Overhead Headphones', brand='Sony', byline='Brand: Sony',
+   rating_text='4.6 out of 5 stars', reviews_text='58,211 ratings', price_text='$1,299.99', symbol='$', whole='1,299', decimal='.', fraction='99',
+   features=['Industry-leading noise canceling with Dual Noise Sensor technology', 'Next-level music with Edge-AI, co-developed with Sony Music Studios Tokyo',
+             'Up to 30-hour battery life with quick charging (10 min charge for 5 hours of playback)', 'Touch Sensor controls to pause play skip tracks, control volume, activate your voice assistant, and answer phone calls',
+             'Speak-to-chat technology automatically reduces volume during conversations'],
+   tech={'Colour': 'Black', 'Item Weight': '8.96 ounces', 'Item Dimensions': '7.27 x 3.03 x 10.42 inches', 'Item model number': 'WH1000XM4/B', 'Material': 'Plastic'},
+   additional={'ASIN': 'B0863TXGM3', 'Batteries': '1 Lithium Ion batteries required. (included)', 'Date First Available': 'August 6, 2020', 'Manufacturer': 'Sony'},
+   overview={'Brand': 'Sony', 'Model Name': 'WH1000XM4/B', 'Color': 'Black', 'Form Factor': 'Over Ear', 'Connectivity Technology': 'Wireless'},
+   crumbs=['Electronics', 'Headphones, Earbuds & Accessories', 'Headphones & Earbuds', 'Over-Ear Headphones'],
+   colors=['Black', 'Blue', 'Silver', 'Midnight Blue'], sizes=[],
+   delivery='FREE delivery Tuesday, October 21. Order within 5 hrs 12 mins', availability='Only 7 left in stock - order soon.', seller='Amazon.com',
+   rank='#12 in Electronics (See Top 100 in Electronics) #1 in Over-Ear Headphones',
+   description=['Sony’s intelligent industry-leading noise canceling headphones with premium sound elevate your listening experience with the ability to personalize and control everything you hear.'],
+   cards=24, carousels=6, scripts=45),
+}
+
+PRODUCTS.update({
+ 'product_de_kaffeemaschine.html': dict(seed=3, domain='amazon.de', lang='de', asin='B07QFHQ4KX', slug='Philips-Kaffeevollautomat-Milchaufschäumer',
+   title='Philips 2200 Serie Kaffeevollautomat, Milchaufschäumer, Touchdisplay, Schwarz', brand='Philips', byline='Besuche den Philips-Store',
+   rating_text='4,4 von 5 Sternen', reviews_text='41.873 Sternebewertungen', price_text='299,99 €', symbol='€', whole='299', decimal=',', fraction='99',
+   features=['Genießen Sie 2 köstliche Kaffeespezialitäten, Espresso und Kaffee, aus frischen Bohnen mit dem Kaffeevollautomaten.',
+             'Der klassische Milchaufschäumer bereitet mühelos seidig-weichen Milchschaum für Ihren Cappuccino zu.',
+             'Intuitives Touchdisplay: Wählen Sie Ihre Lieblingskaffeespezialität ganz einfach aus.',
+             'Bis zu 5000 Tassen ohne Entkalken dank AquaClean-Filter.',
+             'Farbe: Schwarz'],
+   tech={'Farbe': 'Schwarz', 'Artikelgewicht': '7,5 Kilogramm', 'Produktabmessungen': '43,3 x 24,6 x 37,1 cm', 'Modellnummer': 'EP2220/10', 'Material': 'Kunststoff'},
+   additional={'ASIN': 'B07QFHQ4KX', 'Kundenrezensionen': '4,4 von 5 Sternen', 'Im Angebot von Amazon.de seit': '15. Juli 2019', 'Hersteller': 'Philips'},
+   overview={'Marke': 'Philips', 'Farbe': 'Schwarz', 'Kapazität': '1,8 Liter', 'Besonderes Merkmal': 'Milchaufschäumer'},
+   crumbs=['Küche, Haushalt & Wohnen', 'Kaffee, Tee & Espresso', 'Kaffeevollautomaten'],
+   colors=['Schwarz', 'Weiß'], sizes=[],
+   delivery='KOSTENFREIE Lieferung Mittwoch, 22. Oktober', availability='Auf Lager', seller='Amazon',
+   rank='Nr. 3 in Küche, Haushalt & Wohnen (Siehe Top 100 in Küche, Haushalt & Wohnen)',
+   description=['Mit dem Philips Kaffeevollautomaten genießen Sie jeden Tag Kaffeespezialitäten aus frisch gemahlenen Bohnen – ganz einfach per Fingertipp.']),
+ 'product_uk_kettle.html': dict(seed=4, domain='amazon.co.uk', lang='en', asin='B01M0A2BTB', slug='Russell-Hobbs-Textures-Electric-Kettle',
+   title='Russell Hobbs 21271 Textures Electric Kettle, 1.7 Litre, 3000 W, Black', brand='Russell Hobbs', byline='Visit the Russell Hobbs Store',
+   rating_text='4.5 out of 5 stars', reviews_text='23,412 ratings', price_text='£29.99', symbol='£', whole='29', decimal='.', fraction='99',
+   features=['Fast boil - boils one cup of water in approximately 55 seconds, saving energy', 'Removable and washable anti-scale filter for cleaner water',
+             'Perfect pour spout, 360 degree base with cord storage', 'Water level window on both sides of the kettle for easy filling', 'Capacity: 1.7 litres'],
+   tech={'Colour': 'Black', 'Item Weight': '1.3 kg', 'Product Dimensions': '24 x 17 x 25 cm', 'Model Number': '21271', 'Material': 'Plastic'},
+   additional={'ASIN': 'B01M0A2BTB', 'Customer Reviews': '4.5 out of 5 stars', 'Date First Available': '10 Jan. 2017', 'Manufacturer': 'Russell Hobbs'},
+   overview={'Brand': 'Russell Hobbs', 'Colour': 'Black', 'Capacity': '1.7 Litres', 'Wattage': '3000 watts'},
+   crumbs=['Home & Kitchen', 'Small Kitchen Appliances', 'Kettles'],
+   colors=['Black', 'White', 'Stainless Steel'], sizes=[],
+   delivery='FREE delivery Thursday, 23 October on your first eligible order', availability='In stock', seller='Amazon.co.uk',
+   rank='#2 in Home & Kitchen (See Top 100 in Home & Kitchen)',
+   description=['The Russell Hobbs textures kettle offers a stylish textured design with fast boil technology that saves water, energy and time.'],
+   cards=12, carousels=3),
+ 'product_fr_aspirateur.html': dict(seed=5, domain='amazon.fr', lang='fr', asin='B08L5M9BTJ', slug='Dyson-V8-Absolute-Aspirateur-Balai',
+   title='Dyson V8 Absolute Aspirateur Balai sans Fil, Nickel/Jaune', brand='Dyson', byline='Visiter la boutique Dyson',
+   rating_text='4,5 sur 5 étoiles', reviews_text='9 876 évaluations', price_text='349,00 €', symbol='€', whole='349', decimal=',', fraction='00',
+   features=['Jusqu’à 40 minutes d’autonomie en mode standard pour nettoyer toute la maison.',
+             'Filtration avancée du système entier qui capture 99,97 % des particules fines.',
+             'Se transforme en aspirateur à main pour un nettoyage rapide et facile.',
+             'Vidage du collecteur hygiénique sans contact avec la poussière.'],
+   tech={'Couleur': 'Nickel/Jaune', "Poids de l'article": '2,61 Kilogrammes', 'Dimensions du produit': '25 x 22,4 x 124,4 cm', 'Numéro du modèle': '394482-01', 'Matériau': 'Plastique'},
+   additional={'ASIN': 'B08L5M9BTJ', 'Commentaires client': '4,5 sur 5 étoiles', 'Date de mise en ligne sur Amazon.fr': '6 octobre 2020', 'Fabricant': 'Dyson'},
+   overview={'Marque': 'Dyson', 'Couleur': 'Nickel/Jaune', 'Type de filtre': 'HEPA', 'Caractéristique spéciale': 'Sans fil'},
+   crumbs=['Cuisine et Maison', 'Aspirateurs et nettoyage des sols', 'Aspirateurs balais'],
+   colors=['Nickel/Jaune', 'Violet'], sizes=[],
+   delivery='Livraison GRATUITE vendredi 24 octobre', availability='En stock', seller='Amazon',
+   rank='n°5 en Cuisine et Maison (Voir les 100 premiers en Cuisine et Maison)',
+   description=['Le Dyson V8 Absolute offre une puissance d’aspiration élevée et une autonomie prolongée pour un nettoyage en profondeur de toute la maison.'],
+   scripts=35),
+ 'product_jp_suihanki.html': dict(seed=6, domain='amazon.co.jp', lang='ja', asin='B09T3GBNSZ', slug='象印-炊飯器-5.5合-圧力IH',
+   title='象印マホービン 炊飯器 5.5合 圧力IH式 極め炊き ブラック NW-JX10-BA', brand='象印マホービン(ZOJIRUSHI)', byline='ブランド: 象印マホービン(ZOJIRUSHI)',
+   rating_text='5つ星のうち4.3', reviews_text='2,846個の評価', price_text='￥24,800', symbol='￥', whole='24,800', decimal='', fraction='',
+   features=['圧力IHで芯までふっくら、もちもちのごはんを炊き上げます。', '豪熱沸とうIHで、大火力で一気に炊き上げるから、お米のうまみを引き出します。',
+             '内なべは鉄器コートプラチナ厚釜で、発熱効率がアップ。', 'お手入れ簡単、洗うのは内なべ、ふたの2点だけ。'],
+   tech={'色': 'ブラック', '商品の重量': '6.5 kg', '梱包サイズ': '36.5 x 28.5 x 25 cm', 'モデル番号': 'NW-JX10-BA', '素材': 'ステンレス'},
+   additional={'ASIN': 'B09T3GBNSZ', 'カスタマーレビュー': '5つ星のうち4.3', 'Amazon.co.jp での取り扱い開始日': '2022/2/21', 'メーカー': '象印マホービン(ZOJIRUSHI)'},
+   overview={'ブランド': '象印マホービン', '色': 'ブラック', '容量': '1 リットル', '特徴': '圧力IH'},
+   crumbs=['ホーム&キッチン', 'キッチン家電', '炊飯器'],
+   colors=['ブラック', 'ホワイト'], sizes=['5.5合', '1升'],
+   delivery='無料配送 10月25日 土曜日', availability='在庫あり。', seller='Amazon.co.jp',
+   rank='- 12位ホーム&キッチン (の売れ筋ランキングを見るホーム&キッチン)',
+   description=['おいしさと使いやすさにこだわった圧力IH炊飯ジャーです。'],
+   cards=20, carousels=4),
+})
+
+# Search result pages: sponsored cards link through /sspa/click (no /dp/ in the href)
+SEARCHES = {
+ 'search_com_headphones.html': dict(seed=101, tld='com', domain='amazon.com', lang='en', style='us', keywords='wireless headphones',
+   item='Wireless Headphones', brands=['Sony', 'Bose', 'JBL', 'Anker', 'Sennheiser', 'Beats'],
+   variants=['Over-Ear Bluetooth', 'Noise Cancelling', 'On-Ear Foldable', 'Sport Earbuds'],
+   sponsored='Sponsored', delivery='FREE delivery Mon, Oct 20', cards=60, sponsored_positions={1, 2, 9, 10, 31, 32, 59, 60}),
+ 'search_com_echo.html': dict(seed=102, tld='com', domain='amazon.com', lang='en', style='us', keywords='smart speaker',
+   item='Smart Speaker', brands=['Amazon', 'Google', 'Apple', 'Sonos'], variants=['with Alexa', 'Mini', 'Max', 'Home'],
+   sponsored='Sponsored', delivery='FREE delivery Tue, Oct 21', cards=24, sponsored_positions={1, 12}, scripts=15),
+ 'search_de_kaffee.html': dict(seed=103, tld='de', domain='amazon.de', lang='de', style='de', keywords='kaffeevollautomat',
+   item='Kaffeevollautomat', brands=['Philips', 'De’Longhi', 'Siemens', 'Melitta', 'Jura'], variants=['mit Milchsystem', 'Touchdisplay', 'Edelstahl', 'kompakt'],
+   sponsored='Gesponsert', delivery='KOSTENFREIE Lieferung Mi., 22. Okt.', cards=48, sponsored_positions={1, 2, 3, 25, 26}),
+ 'search_uk_kettle.html': dict(seed=104, tld='co.uk', domain='amazon.co.uk', lang='en', style='uk', keywords='kettle',
+   item='Electric Kettle', brands=['Russell Hobbs', 'Breville', 'Morphy Richards', 'Swan'], variants=['1.7 Litre', 'Rapid Boil', 'Glass', 'Cordless'],
+   sponsored='Sponsored', delivery='FREE delivery Thu, 23 Oct', cards=48, sponsored_positions={1, 2, 24}),
+ 'search_fr_aspirateur.html': dict(seed=105, tld='fr', domain='amazon.fr', lang='fr', style='fr', keywords='aspirateur balai',
+   item='Aspirateur Balai', brands=['Dyson', 'Rowenta', 'Philips', 'Bosch'], variants=['sans Fil', 'Puissant', 'Léger', 'Multifonction'],
+   sponsored='Sponsorisé', delivery='Livraison GRATUITE ven. 24 oct.', cards=48, sponsored_positions={1, 2, 3, 4}),
+ 'search_jp_suihanki.html': dict(seed=106, tld='co.jp', domain='amazon.co.jp', lang='ja', style='jp', keywords='炊飯器',
+   item='炊飯器', brands=['象印', 'タイガー', 'パナソニック', 'アイリスオーヤマ'], variants=['5.5合', '圧力IH', 'マイコン式', '一人暮らし'],
+   sponsored='スポンサー', delivery='無料配送 10月25日 土曜日', cards=48, sponsored_positions={1, 2, 40}),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Regenerate the benchmark fixture corpus and manifest.json')
+    parser.add_argument('--output', default=FIXTURES_DIR, help='output directory (default: benchmarks/fixtures)')
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest = {}
+    for name, p in PRODUCTS.items():
+        with open(os.path.join(args.output, name), 'w', encoding='utf-8', newline='\n') as f:
+            f.write(page(p))
+        manifest[name] = {
+            'kind': 'product',
+            'marketplace': p['domain'],
+            'url': f'https://www.{p["domain"]}/{p["slug"]}/dp/{p["asin"]}',
+            'encoding': 'utf-8',
+            'expected': {'asin': p['asin'], 'title': p['title']},
+        }
+    for name, s in SEARCHES.items():
+        body, organic = search_page(s)
+        with open(os.path.join(args.output, name), 'w', encoding='utf-8', newline='\n') as f:
+            f.write(body)
+        manifest[name] = {
+            'kind': 'search',
+            'marketplace': s['domain'],
+            'url': f'https://www.{s["domain"]}/s?k={quote_plus(s["keywords"])}',
+            'encoding': 'utf-8',
+            # Sponsored cards only link through /sspa/click, so they have no product link
+            'expected': {'links': organic, 'cards': s['cards']},
+        }
+    with open(os.path.join(args.output, 'manifest.json'), 'w', encoding='utf-8', newline='\n') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write('\n')
+    print(f"{len(manifest)} fixtures written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
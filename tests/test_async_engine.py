@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""AsyncAmazonScraper against a local stand-in server (ordering, concurrency cap, retries, 304)"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import amazon_scraper
+from amazon_scraper import AsyncAmazonScraper, DomainRateLimiter, RetryPolicy
+
+pytestmark = pytest.mark.skipif(amazon_scraper.aiohttp is None, reason='aiohttp is not installed')
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+with open(os.path.join(FIXTURES_DIR, 'manifest.json'), encoding='utf-8') as f:
+    PRODUCT_PAGE = next(name for name, meta in sorted(json.load(f).items()) if meta['kind'] == 'product')
+with open(os.path.join(FIXTURES_DIR, PRODUCT_PAGE), 'rb') as f:
+    PRODUCT_HTML = f.read()
+
+
+def asin(i):
+    return f'B0TEST{i:04d}'
+
+
+class StandIn(ThreadingHTTPServer):
+    """Serves one search page of `cards` products; per-ASIN delays and scripted statuses"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.cards = 0
+        self.delays = {}
+        # ASIN -> statuses answered before the product page (consumed one per request)
+        self.scripted = {}
+        self.hits = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def search_page(self):
+        cards = ''.join(f'<div data-component-type="s-search-result" data-asin="{asin(i)}">'
+                        f'<h2 class="a-size-mini"><a href="/Item-{i}/dp/{asin(i)}/ref=sr_1_{i}"><span>Item {i}</span></a></h2></div>'
+                        for i in range(1, self.cards + 1))
+        return f'<html><body>{cards}</body></html>'.encode()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body=b''):
+        self.send_response(status)
+        if status != 304:
+            self.send_header('Content-Type', 'text/html; charset=UTF-8')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if self.path.startswith('/s'):
+                self.reply(200, server.search_page() if 'page=' not in self.path else b'<html></html>')
+                return
+            product = self.path.split('/dp/')[1][:10]
+            with server.lock:
+                server.hits[product] = server.hits.get(product, 0) + 1
+                statuses = server.scripted.get(product)
+                status = statuses.pop(0) if statuses else 200
+            time.sleep(server.delays.get(product, 0))
+            self.reply(status, PRODUCT_HTML if status == 200 else b'busy')
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def server():
+    srv = StandIn()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def make_scraper(**kwargs):
+    kwargs.setdefault('rate_limiter', DomainRateLimiter(rate=1000, burst=1000))
+    kwargs.setdefault('retry_policy', RetryPolicy(max_retries=2, backoff_base=0.01, jitter=False, timeout=(5, 5)))
+    return AsyncAmazonScraper(validate_urls=False, **kwargs)
+
+
+def run(coroutine_function, scraper):
+    async def main():
+        async with scraper:
+            return await coroutine_function(scraper)
+    return asyncio.run(main())
+
+
+def test_products_keep_their_search_page_order(server):
+    server.cards = 8
+    # Earlier positions answer last
+    server.delays = {asin(i): 0.05 * (9 - i) for i in range(1, 9)}
+
+    result = run(lambda s: s.scrape_search_results(f'{server.base}/s?k=test', max_pages=1), make_scraper())
+
+    assert 'error' not in result
+    products = result['products']
+    assert [product['url'] for product in products] == [f'{server.base}/Item-{i}/dp/{asin(i)}' for i in range(1, 9)]
+    assert [product['position_on_page'] for product in products] == list(range(1, 9))
+    assert all(product['page_number'] == 1 for product in products)
+
+
+def test_concurrency_is_capped(server):
+    server.cards = 12
+    server.delays = {asin(i): 0.1 for i in range(1, 13)}
+
+    result = run(lambda s: s.scrape_search_results(f'{server.base}/s?k=test', max_pages=1),
+                 make_scraper(max_concurrency=3))
+
+    assert result['total_products'] == 12
+    assert 1 < server.max_in_flight <= 3
+
+
+def test_rate_limit_wait_does_not_hold_a_slot(server):
+    # One marketplace (the slow host) waits ~0.5s for its next token; with a
+    # single slot, the other host's request must not queue behind that wait
+    other_base = server.base.replace('127.0.0.1', 'localhost')
+    limiter = DomainRateLimiter(rate=1000, burst=1000, domain_limits={'127.0.0.1': (2, 1)})
+
+    async def scrape(s):
+        await s.scrape_product(f'{server.base}/dp/{asin(1)}')
+        start = time.perf_counter()
+        slow = asyncio.ensure_future(s.scrape_product(f'{server.base}/dp/{asin(2)}'))
+        await asyncio.sleep(0.05)
+        await s.scrape_product(f'{other_base}/dp/{asin(3)}')
+        fast_seconds = time.perf_counter() - start
+        await slow
+        return fast_seconds
+
+    assert run(scrape, make_scraper(max_concurrency=1, rate_limiter=limiter)) < 0.3
+
+
+def test_transient_errors_are_retried(server):
+    server.scripted = {asin(1): [503, 503]}
+
+    product = run(lambda s: s.scrape_product(f'{server.base}/dp/{asin(1)}'), make_scraper())
+
+    assert 'error' not in product
+    assert product['title']
+    assert server.hits[asin(1)] == 3
+
+
+def test_persistent_throttling_is_reported(server):
+    server.scripted = {asin(1): [503] * 5}
+
+    product = run(lambda s: s.scrape_product(f'{server.base}/dp/{asin(1)}'), make_scraper())
+
+    assert product['throttled'] is True
+    assert 'error' in product
+    # First attempt plus max_retries
+    assert server.hits[asin(1)] == 3
+
+
+def test_not_modified_is_an_error_not_an_empty_product(server):
+    server.scripted = {asin(1): [304]}
+
+    product = run(lambda s: s.scrape_product(f'{server.base}/dp/{asin(1)}'), make_scraper())
+
+    assert product == {'error': f'Network error: HTTP 304 for url: {server.base}/dp/{asin(1)}'}
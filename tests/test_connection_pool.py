@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""ConnectionPool statistics, direct and through an HTTP proxy"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from amazon_scraper import ConnectionPool
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answers any GET; as a forward proxy it sees the absolute URL of the target"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        body = b'<html></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    srv.daemon_threads = True
+    srv.paths = []
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def base(server):
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def test_direct_requests_reuse_connections(server):
+    pool = ConnectionPool()
+    for i in range(3):
+        pool.get(f'{base(server)}/dp/{i}', timeout=5).close()
+    stats = pool.stats()
+    pool.close()
+
+    assert stats['requests'] == 3
+    assert stats['new_connections'] == 1
+    assert stats['reused_connections'] == 2
+
+
+def test_proxied_requests_are_counted(server):
+    pool = ConnectionPool()
+    # The target host does not exist: only the proxy can answer
+    proxies = {'http': base(server)}
+    for i in range(3):
+        pool.get(f'http://www.amazon.invalid/dp/{i}', proxies=proxies, timeout=5).close()
+    stats = pool.stats()
+    pool.close()
+
+    assert server.paths == [f'http://www.amazon.invalid/dp/{i}' for i in range(3)]
+    assert stats['requests'] == 3
+    assert stats['new_connections'] == 1
+    assert stats['reused_connections'] == 2
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""CrawlJournal: a crawl is only resumed with the parameters it was started with"""
+
+import os
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import amazon_scraper
+from amazon_scraper import AmazonSearchScraper, CrawlJournal, DomainRateLimiter, RetryPolicy
+
+SEARCH_URL = 'https://www.amazon.com/s?k=kettle'
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = CrawlJournal(str(tmp_path / 'journal.sqlite3'))
+    yield journal
+    journal.close()
+
+
+def test_resume_with_the_same_params(journal):
+    crawl_id = journal.start_crawl(SEARCH_URL, 2, params={'mode': 'shallow', 'deep_asins': ['B000000001']})
+    journal.record_page(crawl_id, 1, SEARCH_URL, ['https://www.amazon.com/dp/B000000001'])
+
+    assert journal.start_crawl(SEARCH_URL, 2, resume=True,
+                               params={'deep_asins': ['B000000001'], 'mode': 'shallow'}) == crawl_id
+    assert journal.get_page_links(crawl_id, 1) == ['https://www.amazon.com/dp/B000000001']
+
+
+@pytest.mark.parametrize('started, resumed', [
+    ({'mode': 'shallow', 'deep_asins': []}, {'mode': 'deep'}),
+    ({'mode': 'deep'}, {'mode': 'shallow', 'deep_asins': []}),
+    ({'mode': 'shallow', 'deep_asins': []}, {'mode': 'shallow', 'deep_asins': ['B000000001']}),
+])
+def test_resume_with_other_params_is_refused(journal, started, resumed):
+    crawl_id = journal.start_crawl(SEARCH_URL, 2, params=started)
+    journal.record_page(crawl_id, 1, SEARCH_URL, ['https://www.amazon.com/dp/B000000001'])
+
+    with pytest.raises(ValueError):
+        journal.start_crawl(SEARCH_URL, 2, resume=True, params=resumed)
+    # Nothing was wiped; starting over (no resume) is still allowed
+    assert journal.get_page_links(crawl_id, 1) == ['https://www.amazon.com/dp/B000000001']
+    journal.start_crawl(SEARCH_URL, 2, params=resumed)
+    assert journal.get_page_links(crawl_id, 1) is None
+
+
+def test_journal_without_params_column_is_migrated(tmp_path):
+    path = str(tmp_path / 'old.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE crawls ('
+                 ' crawl_id TEXT PRIMARY KEY, max_pages INTEGER, status TEXT, started_at TEXT, updated_at TEXT)')
+    conn.execute("INSERT INTO crawls VALUES (?, 2, 'interrupted', '', '')", (SEARCH_URL,))
+    conn.commit()
+    conn.close()
+
+    journal = CrawlJournal(path)
+    try:
+        assert journal.start_crawl(SEARCH_URL, 2, resume=True, params={'mode': 'deep'}) == SEARCH_URL
+        with pytest.raises(ValueError):
+            journal.start_crawl(SEARCH_URL, 2, resume=True, params={'mode': 'shallow', 'deep_asins': []})
+    finally:
+        journal.close()
+
+
+def test_search_scraper_reports_a_refused_resume(journal):
+    journal.start_crawl(SEARCH_URL, 1, params={'mode': 'shallow', 'deep_asins': []})
+
+    # Refused before any request is sent
+    result = AmazonSearchScraper().scrape_search_results(SEARCH_URL, 1, journal=journal, resume=True)
+
+    assert 'error' in result
+    assert 'resumable' not in result
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Search page 1 links three products; page 2 is a robot check until `throttled` is cleared"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith('/s'):
+            page = 2 if 'page=2' in self.path else 1
+            if page == 2 and self.server.throttled:
+                self.reply(503, b'busy')
+                return
+            cards = ''.join(f'<div data-component-type="s-search-result" data-asin="B0PAGE{page}{i:03d}">'
+                            f'<h2 class="a-size-mini"><a href="/Item/dp/B0PAGE{page}{i:03d}"><span>Item {i}</span></a>'
+                            f'</h2></div>' for i in range(1, 4))
+            self.reply(200, f'<html><body>{cards}</body></html>'.encode())
+        else:
+            with open(os.path.join(FIXTURES_DIR, 'product_com_echo_dot.html'), 'rb') as f:
+                self.reply(200, f.read())
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    srv.daemon_threads = True
+    srv.throttled = True
+    srv.search_url = f'http://127.0.0.1:{srv.server_address[1]}/s?k=kettle'
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setattr(amazon_scraper, 'AMAZON_DOMAINS', amazon_scraper.AMAZON_DOMAINS + ['127.0.0.1'])
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def crawl(journal, url, resume, shallow=False, fields=None):
+    scraper = AmazonSearchScraper(rate_limiter=DomainRateLimiter(rate=1000, burst=1000),
+                                  retry_policy=RetryPolicy(max_retries=0), fields=fields)
+    return scraper.scrape_search_results(url, 2, journal=journal, resume=resume, shallow=shallow)
+
+
+@pytest.mark.parametrize('changed', [{'shallow': True}, {'fields': ['price']}])
+def test_interrupted_crawl_resumes_only_with_its_parameters(journal, server, changed):
+    interrupted = crawl(journal, server.search_url, False)
+    assert interrupted['throttled'] and interrupted['resumable']
+
+    refused = crawl(journal, server.search_url, True, **changed)
+    assert 'error' in refused and 'resumable' not in refused
+    assert journal.get_progress(server.search_url) == {'pages': 1, 'pending': 0, 'done': 3, 'failed': 0}
+
+    server.throttled = False
+    resumed = crawl(journal, server.search_url, True)
+    assert 'error' not in resumed
+    assert [(p['page_number'], p['position_on_page']) for p in resumed['products']] == \
+        [(page, position) for page in (1, 2) for position in (1, 2, 3)]
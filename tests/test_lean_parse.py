@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Lean parse (LEAN_PARSE_STRAINER) extracts the same product as a full parse"""
+
+import json
+import os
+
+import pytest
+
+import amazon_scraper
+from amazon_scraper import AmazonScraper, is_parser_available
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+with open(os.path.join(FIXTURES_DIR, 'manifest.json'), encoding='utf-8') as f:
+    MANIFEST = json.load(f)
+
+PRODUCT_PAGES = sorted(name for name, meta in MANIFEST.items() if meta['kind'] == 'product')
+
+# html5lib cannot build a partial tree
+LEAN_PARSERS = [parser for parser in ('lxml', 'html.parser') if is_parser_available(parser)]
+
+
+def comparable(product):
+    """Product dict without the fetch timestamp"""
+    product = dict(product)
+    product.pop('scraped_at', None)
+    return product
+
+
+@pytest.mark.parametrize('parser', LEAN_PARSERS)
+@pytest.mark.parametrize('page', PRODUCT_PAGES)
+def test_lean_parse_matches_full_parse(page, parser):
+    meta = MANIFEST[page]
+    with open(os.path.join(FIXTURES_DIR, page), 'rb') as f:
+        content = f.read()
+
+    full = AmazonScraper(parser=parser).parse_product(content, meta['url'], meta['encoding'])
+    lean = AmazonScraper(parser=parser, lean_parse=True).parse_product(content, meta['url'], meta['encoding'])
+
+    assert 'error' not in full
+    assert comparable(lean) == comparable(full)
+    for key, value in meta['expected'].items():
+        assert lean[key] == value
+
+
+@pytest.mark.parametrize('parser', LEAN_PARSERS)
+def test_lean_parse_falls_back_without_product_title(parser, monkeypatch):
+    # #productTitle outside every container the strainer keeps: the lean tree has no title
+    content = (b'<html><head><title>New layout</title></head><body>'
+               b'<div id="newLayout"><h1><span id="productTitle"> Kettle 1.7 L </span></h1>'
+               b'<span class="a-price"><span class="a-offscreen">$24.99</span></span></div>'
+               b'</body></html>')
+    url = 'https://www.amazon.com/Kettle/dp/B000TEST01'
+    trees = []
+    make_soup = amazon_scraper.make_soup
+
+    def recording_make_soup(content, parser, encoding=None, parse_only=None):
+        trees.append('lean' if parse_only is not None else 'full')
+        return make_soup(content, parser, encoding, parse_only)
+
+    monkeypatch.setattr(amazon_scraper, 'make_soup', recording_make_soup)
+
+    full = AmazonScraper(parser=parser).parse_product(content, url, 'utf-8')
+    trees.clear()
+    lean = AmazonScraper(parser=parser, lean_parse=True).parse_product(content, url, 'utf-8')
+
+    assert trees == ['lean', 'full']
+    assert lean['title'] == 'Kettle 1.7 L'
+    assert comparable(lean) == comparable(full)